@@ -25,10 +25,15 @@ __all__ = [
     '__version__',
 ]
 
-from .bindings import BindingSpec
-__all__.extend(['BindingSpec'])
+from .bindings import BindingSpec, LazyBindingSpec
+__all__.extend(['BindingSpec', 'LazyBindingSpec'])
 from .decorators import annotate_arg, inject, injectable, provides
 __all__.extend(['annotate_arg', 'inject', 'injectable', 'provides'])
+from .decorators import (
+    set_decorators_validate_eagerly, set_decorators_wrap_fns)
+__all__.extend(['set_decorators_validate_eagerly', 'set_decorators_wrap_fns'])
+from .finding import discover_classes_on_import, IMPORT_DISCOVERED_MODULES
+__all__.extend(['discover_classes_on_import', 'IMPORT_DISCOVERED_MODULES'])
 for thing_name in dir(errors):
     thing = getattr(errors, thing_name)
     if type(thing) == type(str):
@@ -14,9 +14,14 @@ limitations under the License.
 """
 
 
+import weakref
+
+
 class Annotation(object):
     """A binding annotation."""
 
+    __slots__ = ('_annotation_obj', '_hash', '__weakref__')
+
     def __init__(self, annotation_obj):
         """Initializer.
 
@@ -25,6 +30,7 @@ class Annotation(object):
               implements __eq__() and __hash__()
         """
         self._annotation_obj = annotation_obj
+        self._hash = hash(annotation_obj)
 
     def as_adjective(self):
         """Returns the annotation as an adjective phrase.
@@ -41,19 +47,22 @@ class Annotation(object):
         return '<{0}>'.format(self.as_adjective())
 
     def __eq__(self, other):
-        return (isinstance(other, Annotation) and
-                self._annotation_obj == other._annotation_obj)
+        return (self is other or
+                (isinstance(other, Annotation) and
+                 self._annotation_obj == other._annotation_obj))
 
     def __ne__(self, other):
         return not (self == other)
 
     def __hash__(self):
-        return hash(self._annotation_obj)
+        return self._hash
 
 
 class _NoAnnotation(object):
     """A polymorph for Annotation but that actually means "no annotation"."""
 
+    __slots__ = ()
+
     def as_adjective(self):
         return 'unannotated'
 
@@ -71,3 +80,23 @@ class _NoAnnotation(object):
 
 
 NO_ANNOTATION = _NoAnnotation()
+
+
+_annotation_obj_to_annotation = weakref.WeakValueDictionary()
+
+
+def new(annotation_obj):
+    """Returns the (interned) Annotation for an annotation object.
+
+    Args:
+      annotation_obj: the annotation object, which can be any object that
+          implements __eq__() and __hash__()
+    Returns:
+      an Annotation, the same one for equal annotation objects as long as it
+          is in use
+    """
+    annotation = _annotation_obj_to_annotation.get(annotation_obj)
+    if annotation is None:
+        annotation = _annotation_obj_to_annotation.setdefault(
+            annotation_obj, Annotation(annotation_obj))
+    return annotation
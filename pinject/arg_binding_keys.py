@@ -21,6 +21,8 @@ from . import provider_indirections
 class ArgBindingKey(object):
     """The binding key for an arg of a function."""
 
+    __slots__ = ('_arg_name', 'binding_key', 'provider_indirection')
+
     def __init__(self, arg_name, binding_key, provider_indirection):
         self._arg_name = arg_name
         self.binding_key = binding_key
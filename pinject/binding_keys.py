@@ -14,12 +14,16 @@ limitations under the License.
 """
 
 
+import weakref
+
 from . import annotations
 
 
 class BindingKey(object):
     """The key for a binding."""
 
+    __slots__ = ('_name', '_annotation', '_hash', '__weakref__')
+
     def __init__(self, name, annotation):
         """Initializer.
 
@@ -29,6 +33,12 @@ class BindingKey(object):
         """
         self._name = name
         self._annotation = annotation
+        self._hash = hash(name) ^ hash(annotation)
+
+    @property
+    def arg_name(self):
+        """The name of the bound arg."""
+        return self._name
 
     def __repr__(self):
         return '<{0}>'.format(self)
@@ -41,28 +51,41 @@ class BindingKey(object):
         return self._annotation.as_adjective()
 
     def __eq__(self, other):
-        return (isinstance(other, BindingKey) and
-                self._name == other._name and
-                self._annotation == other._annotation)
+        return (self is other or
+                (isinstance(other, BindingKey) and
+                 self._hash == other._hash and
+                 self._name == other._name and
+                 self._annotation == other._annotation))
 
     def __ne__(self, other):
         return not (self == other)
 
     def __hash__(self):
-        return hash(self._name) ^ hash(self._annotation)
+        return self._hash
+
+
+_name_and_annotated_with_to_binding_key = weakref.WeakValueDictionary()
 
 
 def new(arg_name, annotated_with=None):
-    """Creates a BindingKey.
+    """Creates (or reuses) a BindingKey.
+
+    Binding keys are interned, so equal binding keys are usually identical,
+    which makes looking them up in dicts cheap.
 
     Args:
       arg_name: the name of the bound arg
       annotation: an Annotation, or None to create an unannotated binding key
     Returns:
-      a new BindingKey
+      a BindingKey
     """
-    if annotated_with is not None:
-        annotation = annotations.Annotation(annotated_with)
-    else:
-        annotation = annotations.NO_ANNOTATION
-    return BindingKey(arg_name, annotation)
+    intern_key = (arg_name, annotated_with)
+    binding_key = _name_and_annotated_with_to_binding_key.get(intern_key)
+    if binding_key is None:
+        if annotated_with is not None:
+            annotation = annotations.new(annotated_with)
+        else:
+            annotation = annotations.NO_ANNOTATION
+        binding_key = _name_and_annotated_with_to_binding_key.setdefault(
+            intern_key, BindingKey(arg_name, annotation))
+    return binding_key
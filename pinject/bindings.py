@@ -16,32 +16,159 @@ limitations under the License.
 
 import re
 import inspect
+import sys
 import threading
+import weakref
 
 from . import binding_keys
 from . import decorators
 from . import errors
+from . import lazy_classes
 from . import locations
 from . import providing
 from . import scoping
+from . import support
 
 
 class Binding(object):
+    """A binding from a binding key to a target, in some scope.
 
-    def __init__(self, binding_key, proviser_fn, get_binding_target_desc_fn,
-                 scope_id, get_binding_loc_fn):
+    Subclasses implement proviser_fn() and get_binding_target_desc_fn().
+
+    Attributes:
+      binding_key: the BindingKey bound
+      scope_id: the ID of the scope in which the target is provided
+    """
+
+    __slots__ = ('binding_key', 'scope_id', '_binding_loc')
+
+    def __init__(self, binding_key, scope_id, binding_loc):
+        """Initializer.
+
+        Args:
+          binding_key: a BindingKey
+          scope_id: a scope ID
+          binding_loc: the "file:line" location at which the binding was
+              created, or a class or function whose location is the binding's
+              location (looked up only when needed)
+        """
         self.binding_key = binding_key
-        self.proviser_fn = proviser_fn
-        self.get_binding_target_desc_fn = get_binding_target_desc_fn
         self.scope_id = scope_id
-        self._get_binding_loc_fn = get_binding_loc_fn
+        self._binding_loc = binding_loc
+
+    @property
+    def scope_key(self):
+        """The key under which the binding's scope caches what it provides."""
+        return self.binding_key
+
+    def get_binding_loc(self):
+        return _get_binding_loc(self._binding_loc)
 
     def __str__(self):
         return 'the binding at {0}, from {1} to {2}, in "{3}" scope'.format(
-            self._get_binding_loc_fn(), self.binding_key,
+            self.get_binding_loc(), self.binding_key,
             self.get_binding_target_desc_fn(), self.scope_id)
 
 
+def _get_binding_loc(binding_loc):
+    if support.is_string(binding_loc):
+        return binding_loc
+    return locations.get_loc(binding_loc)
+
+
+class _ClassBinding(Binding):
+
+    __slots__ = ('_to_class',)
+
+    def __init__(self, binding_key, to_class, scope_id, binding_loc):
+        Binding.__init__(self, binding_key, scope_id, binding_loc)
+        self._to_class = to_class
+
+    def proviser_fn(self, injection_context, obj_provider, pargs, kwargs):
+        return obj_provider.provide_class(
+            self._to_class, injection_context, pargs, kwargs)
+
+    def get_binding_target_desc_fn(self):
+        return 'the class {0}'.format(
+            locations.get_name_and_loc(self._to_class))
+
+
+class _SharedScopeClassBinding(_ClassBinding):
+    """A class binding whose scope caches under a key shared by bindings.
+
+    Binding specs can bind several binding keys to the same class in the same
+    scope, and all of those bindings must then provide the same instance.
+    """
+
+    __slots__ = ('scope_key',)
+
+    def __init__(self, binding_key, to_class, scope_id, binding_loc,
+                 scope_key):
+        _ClassBinding.__init__(
+            self, binding_key, to_class, scope_id, binding_loc)
+        self.scope_key = scope_key
+
+
+class _LazyClassBinding(_ClassBinding):
+    """A binding to a class whose module is imported when first provided."""
+
+    __slots__ = ()
+
+    def proviser_fn(self, injection_context, obj_provider, pargs, kwargs):
+        return obj_provider.provide_class(
+            self._to_class.resolve(), injection_context, pargs, kwargs)
+
+    def get_binding_target_desc_fn(self):
+        return 'the class {0}'.format(self._to_class.get_name_and_loc())
+
+
+class _SharedScopeLazyClassBinding(_LazyClassBinding):
+    """A lazy class binding whose scope caches under a shared key."""
+
+    __slots__ = ('scope_key',)
+
+    def __init__(self, binding_key, to_class, scope_id, binding_loc,
+                 scope_key):
+        _LazyClassBinding.__init__(
+            self, binding_key, to_class, scope_id, binding_loc)
+        self.scope_key = scope_key
+
+
+class _InstanceBinding(Binding):
+
+    __slots__ = ('_to_instance',)
+
+    def __init__(self, binding_key, to_instance, scope_id, binding_loc):
+        Binding.__init__(self, binding_key, scope_id, binding_loc)
+        self._to_instance = to_instance
+
+    def proviser_fn(self, injection_context, obj_provider, pargs, kwargs):
+        if pargs or kwargs:
+            raise TypeError('instance provider takes no arguments'
+                            ' ({0} given)'.format(len(pargs) + len(kwargs)))
+        return self._to_instance
+
+    def get_binding_target_desc_fn(self):
+        return 'the instance {0!r}'.format(self._to_instance)
+
+
+class _ProviderFnBinding(Binding):
+
+    __slots__ = ('_provider_fn',)
+
+    def __init__(self, binding_key, provider_fn, scope_id):
+        Binding.__init__(self, binding_key, scope_id, provider_fn)
+        self._provider_fn = provider_fn
+
+    def proviser_fn(self, injection_context, obj_provider, pargs, kwargs):
+        return obj_provider.call_with_injection(
+            self._provider_fn, injection_context, pargs, kwargs)
+
+    def get_binding_target_desc_fn(self):
+        return 'the provider method {0}'.format(
+            locations.get_name_and_loc(self._provider_fn))
+
+
 def _handle_explicit_binding_collision(
         colliding_binding, binding_key_to_binding, *pargs):
     other_binding = binding_key_to_binding[colliding_binding.binding_key]
@@ -104,34 +231,203 @@ def get_overall_binding_key_to_binding_maps(bindings_lists):
 class BindingMapping(object):
 
     def __init__(self, binding_key_to_binding,
-                 collided_binding_key_to_bindings):
+                 collided_binding_key_to_bindings,
+                 implicit_class_bindings=None, lazy_binding_specs=(),
+                 load_lazy_binding_spec_fn=None):
+        """Initializer.
+
+        Args:
+          binding_key_to_binding: a map from BindingKey to Binding
+          collided_binding_key_to_bindings: a map from BindingKey to the
+              Bindings that collided for it
+          implicit_class_bindings: an ImplicitClassBindings, whose bindings
+              are used for binding keys in neither map, or None
+          lazy_binding_specs: the LazyBindingSpecs to load when one of their
+              binding keys is first looked up
+          load_lazy_binding_spec_fn: a function taking a LazyBindingSpec and
+              returning the explicit Bindings, RequiredBindings, and further
+              LazyBindingSpecs that loading it creates
+        """
         self._binding_key_to_binding = binding_key_to_binding
         self._collided_binding_key_to_bindings = (
             collided_binding_key_to_bindings)
+        self._implicit_class_bindings = implicit_class_bindings
+        self._binding_key_to_lazy_binding_spec = {}
+        self._add_lazy_binding_specs(lazy_binding_specs)
+        # The binding keys looked up without an explicit binding, which a
+        # lazy binding spec loaded later mustn't bind.
+        self._looked_up_binding_keys = set()
+        self._load_lazy_binding_spec_fn = load_lazy_binding_spec_fn
+        # Loading a binding spec can look up bindings, and so load others.
+        self._lazy_binding_specs_lock = threading.RLock()
+
+    def _add_lazy_binding_specs(self, lazy_binding_specs):
+        for lazy_binding_spec in lazy_binding_specs:
+            for binding_key in lazy_binding_spec.binding_keys:
+                if binding_key not in self._binding_key_to_binding:
+                    self._binding_key_to_lazy_binding_spec.setdefault(
+                        binding_key, lazy_binding_spec)
+
+    def load_lazy_binding_specs(self):
+        """Loads all lazy binding specs not yet loaded."""
+        while self._binding_key_to_lazy_binding_spec:
+            self._load_lazy_binding_spec(
+                next(iter(self._binding_key_to_lazy_binding_spec)))
+
+    def _load_lazy_binding_spec(self, binding_key):
+        """Loads the lazy binding spec declaring binding_key, if any.
+
+        Returns:
+          whether a lazy binding spec was loaded
+        Raises:
+          ConflictingExplicitBindingsError: the binding spec's bindings
+              conflict with existing explicit bindings
+          LazyBindingAlreadyLookedUpError: the binding spec depends on a lazy
+              binding spec declaring a binding key already looked up
+          UndeclaredLazyBindingError: the binding spec created a binding, or
+              depends on a lazy binding spec declaring a binding key, that it
+              didn't declare
+        """
+        with self._lazy_binding_specs_lock:
+            lazy_binding_spec = self._binding_key_to_lazy_binding_spec.get(
+                binding_key)
+            if lazy_binding_spec is None:
+                return False
+            # The binding keys are removed while loading, so that looking
+            # them up meanwhile doesn't load the binding spec again.
+            declared_binding_keys = [
+                x for x in lazy_binding_spec.binding_keys
+                if self._binding_key_to_lazy_binding_spec.get(x) is
+                lazy_binding_spec]
+            for declared_binding_key in declared_binding_keys:
+                del self._binding_key_to_lazy_binding_spec[
+                    declared_binding_key]
+            try:
+                (new_bindings, new_required_bindings,
+                 new_lazy_binding_specs) = self._load_lazy_binding_spec_fn(
+                     lazy_binding_spec)
+                for binding in new_bindings:
+                    if (binding.binding_key not in
+                            lazy_binding_spec.binding_keys):
+                        raise errors.UndeclaredLazyBindingError(
+                            binding.binding_key, binding, lazy_binding_spec)
+                for new_lazy_binding_spec in new_lazy_binding_specs:
+                    self._verify_nested_lazy_binding_spec(
+                        new_lazy_binding_spec, lazy_binding_spec)
+                new_binding_key_to_binding, _ = (
+                    get_overall_binding_key_to_binding_maps([new_bindings]))
+                for binding_key, binding in support.items(
+                        new_binding_key_to_binding):
+                    if binding_key in self._binding_key_to_binding:
+                        raise errors.ConflictingExplicitBindingsError(
+                            [binding,
+                             self._binding_key_to_binding[binding_key]])
+            except Exception:
+                # Nothing was bound, so a later lookup can try again.
+                for declared_binding_key in declared_binding_keys:
+                    self._binding_key_to_lazy_binding_spec.setdefault(
+                        declared_binding_key, lazy_binding_spec)
+                raise
+            self._binding_key_to_binding.update(new_binding_key_to_binding)
+            for binding_key in new_binding_key_to_binding:
+                self._collided_binding_key_to_bindings.pop(binding_key, None)
+            self._add_lazy_binding_specs(new_lazy_binding_specs)
+            self.verify_requirements(new_required_bindings)
+        return True
+
+    def _verify_nested_lazy_binding_spec(self, nested_lazy_binding_spec,
+                                         lazy_binding_spec):
+        # Looking up a binding key of the nested binding spec would have
+        # loaded lazy_binding_spec first only if it declares the key too.
+        for binding_key in nested_lazy_binding_spec.binding_keys:
+            if binding_key not in lazy_binding_spec.binding_keys:
+                raise errors.UndeclaredLazyBindingError(
+                    binding_key, 'the lazy binding spec {0} at {1}'.format(
+                        nested_lazy_binding_spec.import_path,
+                        nested_lazy_binding_spec.loc),
+                    lazy_binding_spec)
+            if binding_key in self._looked_up_binding_keys:
+                raise errors.LazyBindingAlreadyLookedUpError(
+                    binding_key, nested_lazy_binding_spec, lazy_binding_spec)
+
+    def _get_colliding_bindings(self, binding_key):
+        colliding_bindings = self._collided_binding_key_to_bindings.get(
+            binding_key)
+        if colliding_bindings is None:
+            implicit_bindings = self._get_implicit_bindings(binding_key)
+            if len(implicit_bindings) > 1:
+                colliding_bindings = implicit_bindings
+        return colliding_bindings
+
+    def _get_implicit_bindings(self, binding_key):
+        if self._implicit_class_bindings is None:
+            return ()
+        return self._implicit_class_bindings.get(binding_key)
 
     def verify_requirements(self, required_bindings):
         for required_binding in required_bindings:
-            required_binding_key = required_binding.binding_key
-            if required_binding_key not in self._binding_key_to_binding:
-                if (required_binding_key in
-                    self._collided_binding_key_to_bindings):
+            if self.find(required_binding.binding_key) is None:
+                colliding_bindings = self._get_colliding_bindings(
+                    required_binding.binding_key)
+                if colliding_bindings:
                     raise errors.ConflictingRequiredBindingError(
-                        required_binding,
-                        self._collided_binding_key_to_bindings[
-                            required_binding_key])
+                        required_binding, colliding_bindings)
                 else:
                     raise errors.MissingRequiredBindingError(required_binding)
 
-    def get(self, binding_key, injection_site_desc):
-        if binding_key in self._binding_key_to_binding:
-            return self._binding_key_to_binding[binding_key]
-        elif binding_key in self._collided_binding_key_to_bindings:
+    def find(self, binding_key):
+        """Returns the binding for binding_key, or None if there's none.
+
+        Unlike get(), this doesn't raise an error for a missing or ambiguous
+        binding key; call get() to raise it.
+        """
+        binding = self._binding_key_to_binding.get(binding_key)
+        if binding is None:
+            # Loading a lazy binding spec can leave binding_key to a lazy
+            # binding spec on which it depends.
+            while (binding is None and
+                   binding_key in self._binding_key_to_lazy_binding_spec and
+                   self._load_lazy_binding_spec(binding_key)):
+                binding = self._binding_key_to_binding.get(binding_key)
+            if binding is None:
+                self._looked_up_binding_keys.add(binding_key)
+                if binding_key not in self._collided_binding_key_to_bindings:
+                    implicit_bindings = self._get_implicit_bindings(
+                        binding_key)
+                    if len(implicit_bindings) == 1:
+                        binding = implicit_bindings[0]
+        return binding
+
+    def get(self, binding_key, get_injection_site_desc_fn):
+        """Returns the binding for binding_key.
+
+        Args:
+          binding_key: a BindingKey
+          get_injection_site_desc_fn: a function taking no args and returning
+              a description of the injection site, called only if there's no
+              single binding for binding_key
+        Returns:
+          a Binding
+        Raises:
+          AmbiguousArgNameError: multiple implicit bindings for binding_key
+          NothingInjectableForArgError: no binding for binding_key
+        """
+        binding = self.find(binding_key)
+        if binding is not None:
+            return binding
+        colliding_bindings = self._get_colliding_bindings(binding_key)
+        if colliding_bindings:
             raise errors.AmbiguousArgNameError(
-                injection_site_desc, binding_key,
-                self._collided_binding_key_to_bindings[binding_key])
+                get_injection_site_desc_fn(), binding_key, colliding_bindings)
         else:
             raise errors.NothingInjectableForArgError(
-                binding_key, injection_site_desc)
+                binding_key, get_injection_site_desc_fn())
+
+
+_CLASS_NAME_PART_RE = re.compile(r'([A-Z][a-z]*|[0-9][a-z0-9]*)(.*)')
+# From class name to the arg names that
+# default_get_arg_names_from_class_name() returns for it.
+_class_name_to_default_arg_names = {}
 
 
 def default_get_arg_names_from_class_name(class_name):
@@ -145,19 +441,24 @@ def default_get_arg_names_from_class_name(class_name):
     Returns:
       all likely corresponding arg names, e.g., ["foo_bar"]
     """
-    parts = []
-    rest = class_name
-    if rest.startswith('_'):
-        rest = rest[1:]
-    while True:
-        m = re.match(r'([A-Z][a-z]*|[0-9][a-z0-9]*)(.*)', rest)
-        if m is None:
-            break
-        parts.append(m.group(1))
-        rest = m.group(2)
-    if not parts:
-        return []
-    return ['_'.join(part.lower() for part in parts)]
+    arg_names = _class_name_to_default_arg_names.get(class_name)
+    if arg_names is None:
+        parts = []
+        rest = class_name
+        if rest.startswith('_'):
+            rest = rest[1:]
+        while True:
+            m = _CLASS_NAME_PART_RE.match(rest)
+            if m is None:
+                break
+            parts.append(m.group(1))
+            rest = m.group(2)
+        if parts:
+            arg_names = ('_'.join(part.lower() for part in parts),)
+        else:
+            arg_names = ()
+        _class_name_to_default_arg_names[class_name] = arg_names
+    return list(arg_names)
 
 
 def get_explicit_class_bindings(
@@ -165,52 +466,171 @@ def get_explicit_class_bindings(
         get_arg_names_from_class_name=default_get_arg_names_from_class_name):
     explicit_bindings = []
     for cls in classes:
-        if decorators.is_explicitly_injectable(cls):
-            for arg_name in get_arg_names_from_class_name(cls.__name__):
+        if isinstance(cls, lazy_classes.LazyClass):
+            is_explicitly_injectable = cls.is_explicitly_injectable
+        else:
+            is_explicitly_injectable = decorators.is_explicitly_injectable(cls)
+        if is_explicitly_injectable:
+            class_name, binding_loc = _get_class_name_and_binding_loc(cls)
+            for arg_name in get_arg_names_from_class_name(class_name):
                 explicit_bindings.append(new_binding_to_class(
                     binding_keys.new(arg_name), cls, scoping.DEFAULT_SCOPE,
-                    lambda cls=cls: locations.get_loc(cls)))
+                    binding_loc))
     return explicit_bindings
 
 
 def get_provider_bindings(
         binding_spec, known_scope_ids,
         get_arg_names_from_provider_fn_name=(
-            providing.default_get_arg_names_from_provider_fn_name)):
+            providing.default_get_arg_names_from_provider_fn_name),
+        use_cache=False):
+    if use_cache:
+        provider_binding_descs = _get_cached_provider_binding_descs(
+            binding_spec, get_arg_names_from_provider_fn_name)
+        if provider_binding_descs is not None:
+            provider_bindings = []
+            for fn_name, binding_key, scope_id in provider_binding_descs:
+                fn = getattr(binding_spec, fn_name)
+                _verify_provider_scope(scope_id, fn, known_scope_ids)
+                provider_bindings.append(
+                    _ProviderFnBinding(binding_key, fn, scope_id))
+            return provider_bindings
     provider_bindings = []
+    provider_binding_descs = []
     fns = inspect.getmembers(binding_spec, lambda x: inspect.ismethod(x))
-    for _, fn in fns:
+    for fn_name, fn in fns:
         default_arg_names = get_arg_names_from_provider_fn_name(fn.__name__)
-        fn_bindings = get_provider_fn_bindings(fn, default_arg_names)
-        for binding in fn_bindings:
-            if binding.scope_id not in known_scope_ids:
-                raise errors.UnknownScopeError(
-                    binding.scope_id, locations.get_name_and_loc(fn))
-        provider_bindings.extend(fn_bindings)
+        for binding in get_provider_fn_bindings(fn, default_arg_names):
+            _verify_provider_scope(binding.scope_id, fn, known_scope_ids)
+            provider_bindings.append(binding)
+            provider_binding_descs.append(
+                (fn_name, binding.binding_key, binding.scope_id))
+    if use_cache:
+        _cache_provider_binding_descs(
+            binding_spec, get_arg_names_from_provider_fn_name,
+            provider_binding_descs)
     return provider_bindings
 
 
+def _verify_provider_scope(scope_id, provider_fn, known_scope_ids):
+    if scope_id not in known_scope_ids:
+        raise errors.UnknownScopeError(
+            scope_id, locations.get_name_and_loc(provider_fn))
+
+
+# From BindingSpec subclass to a map from get_arg_names_from_provider_fn_name
+# to the subclass's provider binding descriptions, each a (method name,
+# binding key, scope ID) triple.
+_binding_spec_class_to_provider_binding_descs = weakref.WeakKeyDictionary()
+_provider_binding_descs_lock = threading.Lock()
+
+
+def _get_cached_provider_binding_descs(binding_spec,
+                                       get_arg_names_from_provider_fn_name):
+    """Returns a binding spec's cached provider binding descs, or None."""
+    with _provider_binding_descs_lock:
+        return _binding_spec_class_to_provider_binding_descs.get(
+            type(binding_spec), {}).get(get_arg_names_from_provider_fn_name)
+
+
+def _cache_provider_binding_descs(binding_spec,
+                                  get_arg_names_from_provider_fn_name,
+                                  provider_binding_descs):
+    with _provider_binding_descs_lock:
+        _binding_spec_class_to_provider_binding_descs.setdefault(
+            type(binding_spec), weakref.WeakKeyDictionary()).setdefault(
+                get_arg_names_from_provider_fn_name, provider_binding_descs)
+
+
 def get_implicit_class_bindings(
         classes,
         get_arg_names_from_class_name=(
             default_get_arg_names_from_class_name)):
     implicit_bindings = []
     for cls in classes:
-        arg_names = get_arg_names_from_class_name(cls.__name__)
+        class_name, binding_loc = _get_class_name_and_binding_loc(cls)
+        arg_names = get_arg_names_from_class_name(class_name)
         for arg_name in arg_names:
             implicit_bindings.append(new_binding_to_class(
                 binding_keys.new(arg_name), cls, scoping.DEFAULT_SCOPE,
-                lambda cls=cls: locations.get_loc(cls)))
+                binding_loc))
     return implicit_bindings
 
 
+def _new_implicit_class_binding(binding_key, cls):
+    _, binding_loc = _get_class_name_and_binding_loc(cls)
+    return new_binding_to_class(
+        binding_key, cls, scoping.DEFAULT_SCOPE, binding_loc)
+
+
+class ImplicitClassBindings(object):
+    """The implicit bindings to classes, created as binding keys are looked up.
+
+    Most implicit bindings are never used, so rather than creating a binding
+    for each arg name of each class up front, this indexes the classes by
+    their arg names on the first lookup, and then creates bindings only for
+    the binding keys looked up.
+    """
+
+    def __init__(self, classes,
+                 get_arg_names_from_class_name=(
+                     default_get_arg_names_from_class_name)):
+        """Initializer.
+
+        Args:
+          classes: the classes (or LazyClasses) to bind implicitly
+          get_arg_names_from_class_name: a function mapping a class name to a
+              sequence of the arg names to which the class should be bound
+        """
+        self._classes = classes
+        self._get_arg_names_from_class_name = get_arg_names_from_class_name
+        self._arg_name_to_classes = None
+        self._binding_key_to_bindings = {}
+        self._lock = threading.Lock()
+
+    def get(self, binding_key):
+        """Returns a tuple of the implicit bindings for binding_key."""
+        bindings = self._binding_key_to_bindings.get(binding_key)
+        if bindings is None:
+            with self._lock:
+                bindings = self._binding_key_to_bindings.get(binding_key)
+                if bindings is None:
+                    bindings = tuple(
+                        _new_implicit_class_binding(binding_key, cls)
+                        for cls in self._get_classes(binding_key))
+                    self._binding_key_to_bindings[binding_key] = bindings
+        return bindings
+
+    def _get_classes(self, binding_key):
+        # Implicit bindings are only for unannotated binding keys.
+        arg_name = binding_key.arg_name
+        if binding_key != binding_keys.new(arg_name):
+            return ()
+        if self._arg_name_to_classes is None:
+            self._arg_name_to_classes = self._get_arg_name_to_classes()
+        return self._arg_name_to_classes.get(arg_name, ())
+
+    def _get_arg_name_to_classes(self):
+        arg_name_to_classes = {}
+        for cls in self._classes:
+            class_name, _ = _get_class_name_and_binding_loc(cls)
+            for arg_name in self._get_arg_names_from_class_name(class_name):
+                arg_name_to_classes.setdefault(arg_name, []).append(cls)
+        return arg_name_to_classes
+
+
+def _get_class_name_and_binding_loc(cls):
+    if isinstance(cls, lazy_classes.LazyClass):
+        return cls.class_name.rpartition('.')[2], cls.loc
+    return cls.__name__, cls
+
+
 class Binder(object):
 
     def __init__(self, collected_bindings, scope_ids):
         self._collected_bindings = collected_bindings
         self._scope_ids = scope_ids
         self._lock = threading.Lock()
-        self._class_bindings_created = []
 
     def bind(self, arg_name, annotated_with=None,
              to_class=None, to_instance=None, in_scope=scoping.DEFAULT_SCOPE):
@@ -230,59 +650,143 @@ class Binder(object):
             raise errors.MultipleBindingTargetArgsError(
                 binding_loc, binding_key, specified_to_params)
 
-        # TODO(kurts): this is such a hack; isn't there a better way?
+        back_frame_loc = locations.get_back_frame_loc()
         if to_class is not None:
-            @decorators.annotate_arg('_pinject_class', (to_class, in_scope))
-            @decorators.provides(annotated_with=annotated_with,
-                                 in_scope=in_scope)
-            def provide_it(_pinject_class):
-                return _pinject_class
-            with self._lock:
-                self._collected_bindings.extend(
-                    get_provider_fn_bindings(provide_it, [arg_name]))
-                if (to_class, in_scope) not in self._class_bindings_created:
-                    back_frame_loc = locations.get_back_frame_loc()
-                    self._collected_bindings.append(new_binding_to_class(
-                        binding_keys.new('_pinject_class',
-                                         (to_class, in_scope)),
-                        to_class, in_scope, lambda: back_frame_loc))
-                    self._class_bindings_created.append((to_class, in_scope))
+            binding = _new_bound_class_binding(
+                binding_key, to_class, in_scope, back_frame_loc)
         else:
-            back_frame_loc = locations.get_back_frame_loc()
-            with self._lock:
-                self._collected_bindings.append(new_binding_to_instance(
-                    binding_key, to_instance, in_scope,
-                    lambda: back_frame_loc))
-
+            binding = new_binding_to_instance(
+                binding_key, to_instance, in_scope, back_frame_loc)
+        with self._lock:
+            self._collected_bindings.append(binding)
+
+    def bind_many(self, to_instances=None, to_classes=None,
+                  in_scope=scoping.DEFAULT_SCOPE):
+        """Creates many bindings, all in the same scope.
+
+        This is equivalent to calling bind() once per binding, but is faster
+        for many bindings.
+
+        Each key of to_instances and to_classes is either an arg name, or an
+        (arg name, annotation object) pair, e.g.,
+          bind_many(to_instances={'foo': 'a-foo', ('bar', 'fast'): 'a-bar'})
+        is the same as
+          bind('foo', to_instance='a-foo')
+          bind('bar', annotated_with='fast', to_instance='a-bar')
+
+        Args:
+          to_instances: a mapping from binding names to the instances to
+              which to bind them, or None
+          to_classes: a mapping from binding names to the classes (or
+              "package.module:Class" import paths) to which to bind them, or
+              None
+          in_scope: a scope ID
+        Raises:
+          EmptyBindManyError: neither to_instances nor to_classes is given
+        """
+        back_frame_loc = locations.get_back_frame_loc()
+        if to_instances is None and to_classes is None:
+            raise errors.EmptyBindManyError(back_frame_loc)
+        if in_scope not in self._scope_ids:
+            raise errors.UnknownScopeError(in_scope, back_frame_loc)
+        new_bindings = []
+        for arg, to_things, new_binding_fn in [
+                ('to_instances', to_instances, new_binding_to_instance),
+                ('to_classes', to_classes, _new_bound_class_binding)]:
+            if to_things is None:
+                continue
+            if not support.is_mapping(to_things):
+                raise errors.WrongArgTypeError(
+                    arg, 'mapping (of binding names to binding targets)',
+                    type(to_things).__name__)
+            for binding_name, to_thing in support.items(to_things):
+                if isinstance(binding_name, tuple):
+                    binding_key = binding_keys.new(*binding_name)
+                else:
+                    binding_key = binding_keys.new(binding_name)
+                if to_thing is None:
+                    raise errors.NoBindingTargetArgsError(
+                        back_frame_loc, binding_key)
+                new_bindings.append(new_binding_fn(
+                    binding_key, to_thing, in_scope, back_frame_loc))
+        with self._lock:
+            self._collected_bindings.extend(new_bindings)
+
+
+def _new_bound_class_binding(binding_key, to_class, in_scope, binding_loc):
+    # All of a binding spec's bindings to the same class (or import path) in
+    # the same scope provide the same instance.
+    if support.is_string(to_class) and ':' in to_class:
+        to_class = lazy_classes.new_from_import_path(to_class, binding_loc)
+    scope_key = binding_keys.new(
+        '_pinject_class', (_get_bound_class_id(to_class), in_scope))
+    return new_binding_to_class(
+        binding_key, to_class, in_scope, binding_loc, scope_key=scope_key)
+
+
+def _get_bound_class_id(to_class):
+    """Returns the same ID for a class and for its import path.
+
+    A class is identified by its module name and qualified name if that's
+    how it can be imported, else (e.g., for a class defined in a function)
+    by itself.
+    """
+    if isinstance(to_class, lazy_classes.LazyClass):
+        return to_class.module_name, to_class.class_name
+    if inspect.isclass(to_class):
+        module_name = to_class.__module__
+        class_name = getattr(to_class, '__qualname__', to_class.__name__)
+        module = sys.modules.get(module_name)
+        if (module is not None and
+                lazy_classes.get_class_in_module(module, class_name) is
+                to_class):
+            return module_name, class_name
+    return to_class
+
+
+def new_binding_to_class(binding_key, to_class, in_scope, binding_loc,
+                         scope_key=None):
+    """Creates a binding to a class.
 
-def new_binding_to_class(binding_key, to_class, in_scope, get_binding_loc_fn):
+    Args:
+      binding_key: a BindingKey
+      to_class: the class to which to bind, or a LazyClass
+      in_scope: a scope ID
+      binding_loc: the location at which the binding was created (see
+          Binding)
+      scope_key: the key under which the scope caches what the binding
+          provides, if it's shared with other bindings, else None (to use
+          binding_key)
+    Returns:
+      a Binding
+    Raises:
+      InvalidBindingTargetError: to_class is not a class
+    """
+    if isinstance(to_class, lazy_classes.LazyClass):
+        if scope_key is not None:
+            return _SharedScopeLazyClassBinding(
+                binding_key, to_class, in_scope, binding_loc, scope_key)
+        return _LazyClassBinding(binding_key, to_class, in_scope, binding_loc)
     if not inspect.isclass(to_class):
         raise errors.InvalidBindingTargetError(
-            get_binding_loc_fn(), binding_key, to_class, 'class')
-    def Proviser(injection_context, obj_provider, pargs, kwargs):
-        return obj_provider.provide_class(
-            to_class, injection_context, pargs, kwargs)
-    def GetBindingTargetDesc():
-        return 'the class {0}'.format(locations.get_name_and_loc(to_class))
-    return Binding(binding_key, Proviser, GetBindingTargetDesc, in_scope,
-                   get_binding_loc_fn)
+            _get_binding_loc(binding_loc), binding_key, to_class, 'class')
+    if scope_key is not None:
+        return _SharedScopeClassBinding(
+            binding_key, to_class, in_scope, binding_loc, scope_key)
+    return _ClassBinding(binding_key, to_class, in_scope, binding_loc)
 
 
-def new_binding_to_instance(
-        binding_key, to_instance, in_scope, get_binding_loc_fn):
-    def Proviser(injection_context, obj_provider, pargs, kwargs):
-        if pargs or kwargs:
-            raise TypeError('instance provider takes no arguments'
-                            ' ({0} given)'.format(len(pargs) + len(kwargs)))
-        return to_instance
-    def GetBindingTargetDesc():
-        return 'the instance {0!r}'.format(to_instance)
-    return Binding(binding_key, Proviser, GetBindingTargetDesc, in_scope,
-                   get_binding_loc_fn)
+def new_binding_to_instance(binding_key, to_instance, in_scope, binding_loc):
+    return _InstanceBinding(binding_key, to_instance, in_scope, binding_loc)
 
 
 class BindingSpec(object):
 
+    # Whether what configure() and dependencies() do depends only on the
+    # binding spec's class, so that object graphs created with
+    # cache_binding_specs=True can record it once and replay it.
+    is_pure = False
+
     def configure(self, bind):
         raise NotImplementedError()
 
@@ -296,19 +800,76 @@ class BindingSpec(object):
         return hash(type(self))
 
 
+class LazyBindingSpec(BindingSpec):
+    """A binding spec whose module is imported only when it's needed.
+
+    An object graph imports the binding spec's module, and configures the
+    binding spec (and its dependencies), the first time that it looks up one
+    of the declared binding names.
+
+    Attributes:
+      import_path: the binding spec class's "package.module:Class" path
+      binding_keys: the BindingKeys of the declared binding names
+      loc: the "file:line" location at which this was created
+    """
+
+    def __init__(self, import_path, binding_names):
+        """Initializer.
+
+        Args:
+          import_path: the binding spec class's module name and class name,
+              separated by a colon, e.g., "myapp.binding_specs:SomeBindingSpec"
+          binding_names: a sequence of the binding names for which the
+              binding spec and its dependencies create bindings, each an arg
+              name or an (arg name, annotation) pair
+        Raises:
+          InvalidImportPathError: import_path is not of the right form
+        """
+        self.loc = locations.get_back_frame_loc()
+        if not support.is_string(import_path):
+            raise errors.WrongArgTypeError(
+                'import_path', 'string', type(import_path).__name__)
+        if (not support.is_sequence(binding_names) or
+                support.is_string(binding_names)):
+            raise errors.WrongArgTypeError(
+                'binding_names', 'sequence (of binding names)',
+                type(binding_names).__name__)
+        self.import_path = import_path
+        self.binding_keys = frozenset(
+            binding_keys.new(*binding_name)
+            if isinstance(binding_name, tuple)
+            else binding_keys.new(binding_name)
+            for binding_name in binding_names)
+        self._lazy_class = lazy_classes.new_from_import_path(
+            import_path, self.loc)
+
+    def new_binding_spec(self):
+        """Imports the binding spec class, and returns an instance of it.
+
+        Raises:
+          WrongArgTypeError: the class is not a BindingSpec subclass
+        """
+        binding_spec_class = self._lazy_class.resolve()
+        if not issubclass(binding_spec_class, BindingSpec):
+            raise errors.WrongArgTypeError(
+                'import_path', 'import path of a subclass of BindingSpec',
+                binding_spec_class.__name__)
+        return binding_spec_class()
+
+    def __eq__(self, other):
+        return (isinstance(other, LazyBindingSpec) and
+                self.import_path == other.import_path)
+
+    def __hash__(self):
+        return hash(self.import_path)
+
+
 def get_provider_fn_bindings(provider_fn, default_arg_names):
     provider_decorations = decorators.get_provider_fn_decorations(
         provider_fn, default_arg_names)
-    def Proviser(injection_context, obj_provider, pargs, kwargs):
-        return obj_provider.call_with_injection(
-            provider_fn, injection_context, pargs, kwargs)
-    def GetBindingTargetDescFn():
-        return 'the provider method {0}'.format(
-            locations.get_name_and_loc(provider_fn))
     return [
-        Binding(binding_keys.new(provider_decoration.arg_name,
-                                 provider_decoration.annotated_with),
-                Proviser, GetBindingTargetDescFn,
-                provider_decoration.in_scope_id,
-                lambda p_fn=provider_fn: locations.get_loc(p_fn))
+        _ProviderFnBinding(
+            binding_keys.new(provider_decoration.arg_name,
+                             provider_decoration.annotated_with),
+            provider_fn, provider_decoration.in_scope_id)
         for provider_decoration in provider_decorations]
@@ -14,6 +14,10 @@ limitations under the License.
 """
 
 
+import functools
+import threading
+import weakref
+
 import decorator
 
 from . import arg_binding_keys
@@ -26,8 +30,88 @@ _ARG_BINDING_KEYS_ATTR = '_pinject_arg_binding_keys'
 _IS_WRAPPER_ATTR = '_pinject_is_wrapper'
 _NON_INJECTABLE_ARG_NAMES_ATTR = '_pinject_non_injectables'
 _ORIG_FN_ATTR = '_pinject_orig_fn'
+_PENDING_DECORATIONS_ATTR = '_pinject_pending_decorations'
 _PROVIDER_DECORATIONS_ATTR = '_pinject_provider_decorations'
 
+_fn_to_injectable_arg_binding_keys = weakref.WeakKeyDictionary()
+
+# The initializers decorated so far, so that explicitly injectable classes
+# can be found without searching through modules.
+_decorated_init_fns = weakref.WeakSet()
+_decorated_init_fns_lock = threading.Lock()
+
+_wrap_fns = True
+
+
+def set_decorators_wrap_fns(wrap_fns):
+    """Sets whether Pinject's decorators wrap the functions they decorate.
+
+    By default, @inject, @annotate_arg, and @provides return a
+    signature-preserving wrapper of the decorated function, and keep Pinject's
+    metadata on the wrapper.  If wrap_fns is False, then functions decorated
+    afterwards get the metadata set on them directly and are returned
+    unchanged, so that no wrapper is compiled at import time and calling them
+    (e.g., constructing an object directly) costs no extra call.
+
+    Because decorators run when modules are imported, call this before
+    importing the modules whose decorations should be affected.
+
+    Args:
+      wrap_fns: whether to wrap decorated functions
+    """
+    global _wrap_fns
+    _wrap_fns = wrap_fns
+
+
+_validate_eagerly = True
+# Weak references to the decorated functions whose decorations haven't been
+# validated yet, in decoration order.
+_pending_fn_refs = []
+_pending_decorations_lock = threading.RLock()
+
+
+def set_decorators_validate_eagerly(validate_eagerly):
+    """Sets whether Pinject's decorators validate their decorations eagerly.
+
+    By default, @inject, @annotate_arg, and @provides check that the args
+    they name exist on the decorated function (raising, e.g., NoSuchArgError)
+    as soon as they're applied, i.e., while the decorated function's module
+    is being imported.  If validate_eagerly is False, then decorations
+    applied afterwards are only recorded, along with where they were applied,
+    and validated all at once when the next object graph is created (or
+    earlier, if a decorated function's metadata is needed before then).  The
+    same errors are raised either way, only later.
+
+    Because decorators run when modules are imported, call this before
+    importing the modules whose decorations should be affected.
+
+    Args:
+      validate_eagerly: whether to validate decorations when they're applied
+    """
+    global _validate_eagerly
+    _validate_eagerly = validate_eagerly
+
+
+def validate_pending_decorations():
+    """Validates all decorations whose validation has been deferred.
+
+    Raises:
+      Error: a decoration is invalid (in which case it stays pending, so
+          that it's reported again the next time this is called)
+    """
+    with _pending_decorations_lock:
+        fn_refs = list(_pending_fn_refs)
+        del _pending_fn_refs[:]
+        for index, fn_ref in enumerate(fn_refs):
+            fn = fn_ref()
+            if fn is None:
+                continue
+            try:
+                _apply_pending_decorations(fn)
+            except errors.Error:
+                _pending_fn_refs[:0] = fn_refs[index:]
+                raise
+
 
 def annotate_arg(arg_name, with_annotation):
     """Adds an annotation to an injected arg.
@@ -49,7 +133,7 @@ def annotate_arg(arg_name, with_annotation):
       a function that will decorate functions passed to it
     """
     arg_binding_key = arg_binding_keys.new(arg_name, with_annotation)
-    return _get_pinject_wrapper(locations.get_back_frame_loc(),
+    return _get_pinject_wrapper(locations.get_back_frame_file_and_line(),
                                 arg_binding_key=arg_binding_key)
 
 
@@ -76,13 +160,15 @@ def inject(arg_names=None, all_except=None):
     specified.  A function may be decorated by @inject at most once.
 
     """
-    back_frame_loc = locations.get_back_frame_loc()
+    decorator_site = locations.get_back_frame_file_and_line()
     if arg_names is not None and all_except is not None:
-        raise errors.TooManyArgsToInjectDecoratorError(back_frame_loc)
+        raise errors.TooManyArgsToInjectDecoratorError(
+            locations.get_file_and_line_loc(decorator_site))
     for arg, arg_value in [('arg_names', arg_names), ('all_except', all_except)]:
         if arg_value is not None:
             if not arg_value:
-                raise errors.EmptySequenceArgError(back_frame_loc, arg)
+                raise errors.EmptySequenceArgError(
+                    locations.get_file_and_line_loc(decorator_site), arg)
             if (not support.is_sequence(arg_value) or
                     support.is_string(arg_value)):
                 raise errors.WrongArgTypeError(
@@ -90,7 +176,7 @@ def inject(arg_names=None, all_except=None):
     if arg_names is None and all_except is None:
         all_except = []
     return _get_pinject_wrapper(
-        back_frame_loc, inject_arg_names=arg_names,
+        decorator_site, inject_arg_names=arg_names,
         inject_all_except_arg_names=all_except)
 
 
@@ -127,7 +213,7 @@ def provides(arg_name=None, annotated_with=None, in_scope=None):
     """
     if arg_name is None and annotated_with is None and in_scope is None:
         raise errors.EmptyProvidesDecoratorError(locations.get_back_frame_loc())
-    return _get_pinject_wrapper(locations.get_back_frame_loc(),
+    return _get_pinject_wrapper(locations.get_back_frame_file_and_line(),
                                 provider_arg_name=arg_name,
                                 provider_annotated_with=annotated_with,
                                 provider_in_scope_id=in_scope)
@@ -142,6 +228,8 @@ class ProviderDecoration(object):
       in_scope_id: a scope ID
     """
 
+    __slots__ = ('arg_name', 'annotated_with', 'in_scope_id')
+
     def __init__(self, arg_name, annotated_with, in_scope_id):
         self.arg_name = arg_name
         self.annotated_with = annotated_with
@@ -173,6 +261,7 @@ def get_provider_fn_decorations(provider_fn, default_arg_names):
       a sequence of ProviderDecoration
     """
     if hasattr(provider_fn, _IS_WRAPPER_ATTR):
+        _apply_pending_decorations(provider_fn)
         provider_decorations = getattr(provider_fn, _PROVIDER_DECORATIONS_ATTR)
         if provider_decorations:
             expanded_provider_decorations = []
@@ -200,106 +289,178 @@ def _get_pinject_decorated_fn(fn):
     if hasattr(fn, _IS_WRAPPER_ATTR):
         pinject_decorated_fn = fn
     else:
-        def _pinject_decorated_fn(fn_to_wrap, *pargs, **kwargs):
-            return fn_to_wrap(*pargs, **kwargs)
-
-        pinject_decorated_fn = decorator.decorator(_pinject_decorated_fn, fn)
+        if _wrap_fns:
+            def _pinject_decorated_fn(fn_to_wrap, *pargs, **kwargs):
+                return fn_to_wrap(*pargs, **kwargs)
+
+            pinject_decorated_fn = decorator.decorator(
+                _pinject_decorated_fn, fn)
+        else:
+            pinject_decorated_fn = fn
         # TODO(kurts): split this so that __init__() decorators don't get
         # the provider attribute.
         setattr(pinject_decorated_fn, _ARG_BINDING_KEYS_ATTR, [])
         setattr(pinject_decorated_fn, _IS_WRAPPER_ATTR, True)
         setattr(pinject_decorated_fn, _ORIG_FN_ATTR, fn)
         setattr(pinject_decorated_fn, _PROVIDER_DECORATIONS_ATTR, [])
+        if getattr(fn, '__name__', None) == '__init__':
+            with _decorated_init_fns_lock:
+                _decorated_init_fns.add(pinject_decorated_fn)
     return pinject_decorated_fn
 
 
 # TODO(kurts): separate out the parts for different decorators.
 def _get_pinject_wrapper(
-        decorator_loc, arg_binding_key=None, provider_arg_name=None,
+        decorator_site, arg_binding_key=None, provider_arg_name=None,
         provider_annotated_with=None, provider_in_scope_id=None,
         inject_arg_names=None, inject_all_except_arg_names=None):
     def get_pinject_decorated_fn_with_additions(fn):
         pinject_decorated_fn = _get_pinject_decorated_fn(fn)
-        orig_arg_names, unused_varargs, unused_keywords, unused_defaults = (
-            support.get_method_args(getattr(pinject_decorated_fn, _ORIG_FN_ATTR)))
-        if arg_binding_key is not None:
-            if not arg_binding_key.can_apply_to_one_of_arg_names(orig_arg_names):
-                raise errors.NoSuchArgToInjectError(decorator_loc, arg_binding_key, fn)
-            if arg_binding_key.conflicts_with_any_arg_binding_key(
-                getattr(pinject_decorated_fn, _ARG_BINDING_KEYS_ATTR)):
-                raise errors.MultipleAnnotationsForSameArgError(
-                    arg_binding_key, decorator_loc)
-            getattr(pinject_decorated_fn, _ARG_BINDING_KEYS_ATTR).append(
-                arg_binding_key)
-        if (provider_arg_name is not None or
-            provider_annotated_with is not None or
-                provider_in_scope_id is not None):
-            provider_decorations = getattr(
-                pinject_decorated_fn, _PROVIDER_DECORATIONS_ATTR)
-            provider_decorations.append(ProviderDecoration(
-                provider_arg_name, provider_annotated_with,
-                provider_in_scope_id))
-        if (inject_arg_names is not None or
-                inject_all_except_arg_names is not None):
-            if hasattr(pinject_decorated_fn, _NON_INJECTABLE_ARG_NAMES_ATTR):
-                raise errors.DuplicateDecoratorError('inject', decorator_loc)
-            non_injectable_arg_names = []
-            setattr(pinject_decorated_fn, _NON_INJECTABLE_ARG_NAMES_ATTR,
-                    non_injectable_arg_names)
-            if inject_arg_names is not None:
-                non_injectable_arg_names[:] = [
-                    x for x in orig_arg_names if x not in inject_arg_names]
-                arg_names_to_verify = inject_arg_names
-            else:
-                non_injectable_arg_names[:] = inject_all_except_arg_names
-                arg_names_to_verify = inject_all_except_arg_names
-            for arg_name in arg_names_to_verify:
-                if arg_name not in orig_arg_names:
-                    raise errors.NoSuchArgError(decorator_loc, arg_name)
-            if len(non_injectable_arg_names) == len(orig_arg_names):
-                raise errors.NoRemainingArgsToInjectError(decorator_loc)
+        _fn_to_injectable_arg_binding_keys.pop(pinject_decorated_fn, None)
+        add_decoration_fn = functools.partial(
+            _add_decoration, fn=fn, decorator_site=decorator_site,
+            arg_binding_key=arg_binding_key,
+            provider_arg_name=provider_arg_name,
+            provider_annotated_with=provider_annotated_with,
+            provider_in_scope_id=provider_in_scope_id,
+            inject_arg_names=inject_arg_names,
+            inject_all_except_arg_names=inject_all_except_arg_names)
+        if _validate_eagerly:
+            _apply_pending_decorations(pinject_decorated_fn)
+            add_decoration_fn(pinject_decorated_fn)
+        else:
+            with _pending_decorations_lock:
+                if not hasattr(pinject_decorated_fn, _PENDING_DECORATIONS_ATTR):
+                    setattr(pinject_decorated_fn, _PENDING_DECORATIONS_ATTR, [])
+                    _pending_fn_refs.append(weakref.ref(pinject_decorated_fn))
+                getattr(pinject_decorated_fn, _PENDING_DECORATIONS_ATTR).append(
+                    add_decoration_fn)
         return pinject_decorated_fn
 
     return get_pinject_decorated_fn_with_additions
 
 
+def _apply_pending_decorations(pinject_decorated_fn):
+    pinject_decorated_fn = getattr(
+        pinject_decorated_fn, '__func__', pinject_decorated_fn)
+    if not hasattr(pinject_decorated_fn, _PENDING_DECORATIONS_ATTR):
+        return
+    with _pending_decorations_lock:
+        pending_decorations = getattr(
+            pinject_decorated_fn, _PENDING_DECORATIONS_ATTR, [])
+        while pending_decorations:
+            pending_decorations[0](pinject_decorated_fn)
+            del pending_decorations[0]
+        if hasattr(pinject_decorated_fn, _PENDING_DECORATIONS_ATTR):
+            delattr(pinject_decorated_fn, _PENDING_DECORATIONS_ATTR)
+
+
+def _add_decoration(
+        pinject_decorated_fn, fn, decorator_site, arg_binding_key,
+        provider_arg_name, provider_annotated_with, provider_in_scope_id,
+        inject_arg_names, inject_all_except_arg_names):
+    # Everything is verified before pinject_decorated_fn is modified, so that
+    # a decoration that fails validation can be validated again later.
+    orig_arg_names = support.get_arg_spec(
+        getattr(pinject_decorated_fn, _ORIG_FN_ATTR)).arg_names
+    if arg_binding_key is not None:
+        if not arg_binding_key.can_apply_to_one_of_arg_names(orig_arg_names):
+            raise errors.NoSuchArgToInjectError(
+                locations.get_file_and_line_loc(decorator_site),
+                arg_binding_key, fn)
+        if arg_binding_key.conflicts_with_any_arg_binding_key(
+                getattr(pinject_decorated_fn, _ARG_BINDING_KEYS_ATTR)):
+            raise errors.MultipleAnnotationsForSameArgError(
+                arg_binding_key,
+                locations.get_file_and_line_loc(decorator_site))
+        getattr(pinject_decorated_fn, _ARG_BINDING_KEYS_ATTR).append(
+            arg_binding_key)
+    if (provider_arg_name is not None or
+        provider_annotated_with is not None or
+            provider_in_scope_id is not None):
+        provider_decorations = getattr(
+            pinject_decorated_fn, _PROVIDER_DECORATIONS_ATTR)
+        provider_decorations.append(ProviderDecoration(
+            provider_arg_name, provider_annotated_with,
+            provider_in_scope_id))
+    if (inject_arg_names is not None or
+            inject_all_except_arg_names is not None):
+        if hasattr(pinject_decorated_fn, _NON_INJECTABLE_ARG_NAMES_ATTR):
+            raise errors.DuplicateDecoratorError(
+                'inject', locations.get_file_and_line_loc(decorator_site))
+        if inject_arg_names is not None:
+            non_injectable_arg_names = [
+                x for x in orig_arg_names if x not in inject_arg_names]
+            arg_names_to_verify = inject_arg_names
+        else:
+            non_injectable_arg_names = list(inject_all_except_arg_names)
+            arg_names_to_verify = inject_all_except_arg_names
+        for arg_name in arg_names_to_verify:
+            if arg_name not in orig_arg_names:
+                raise errors.NoSuchArgError(
+                    locations.get_file_and_line_loc(decorator_site), arg_name)
+        if len(non_injectable_arg_names) == len(orig_arg_names):
+            raise errors.NoRemainingArgsToInjectError(
+                locations.get_file_and_line_loc(decorator_site))
+        setattr(pinject_decorated_fn, _NON_INJECTABLE_ARG_NAMES_ATTR,
+                non_injectable_arg_names)
+
+
+def get_decorated_init_fns():
+    """Returns the (still existing) initializers decorated so far."""
+    with _decorated_init_fns_lock:
+        return list(_decorated_init_fns)
+
+
 def is_explicitly_injectable(cls):
     return (hasattr(cls, '__init__') and
             hasattr(cls.__init__, _IS_WRAPPER_ATTR))
 
 
 def get_injectable_arg_binding_keys(fn, direct_pargs, direct_kwargs):
+    """Returns the arg binding keys of the injectable args of a function.
+
+    When nothing is passed directly, the result depends only on fn, and so
+    it's memoized per function.
+
+    Args:
+      fn: a (possibly decorated) function
+      direct_pargs: the positional args passed directly to fn
+      direct_kwargs: the keyword args passed directly to fn
+    Returns:
+      a tuple of ArgBindingKey
+    """
+    arg_spec = support.get_arg_spec(getattr(fn, _ORIG_FN_ATTR, fn))
+    if direct_pargs or direct_kwargs:
+        return _new_injectable_arg_binding_keys(fn, arg_spec)
+    key = getattr(fn, '__func__', fn)
+    try:
+        memoized = _fn_to_injectable_arg_binding_keys.get(key)
+    except TypeError:
+        return _new_injectable_arg_binding_keys(fn, arg_spec)
+    if memoized is not None and memoized[0] is arg_spec:
+        return memoized[1]
+    all_arg_binding_keys = _new_injectable_arg_binding_keys(fn, arg_spec)
+    _fn_to_injectable_arg_binding_keys[key] = (arg_spec, all_arg_binding_keys)
+    return all_arg_binding_keys
+
+
+def _new_injectable_arg_binding_keys(fn, arg_spec):
     non_injectable_arg_names = []
     if hasattr(fn, _IS_WRAPPER_ATTR):
+        _apply_pending_decorations(fn)
         existing_arg_binding_keys = getattr(fn, _ARG_BINDING_KEYS_ATTR)
-        orig_fn = getattr(fn, _ORIG_FN_ATTR)
         if hasattr(fn, _NON_INJECTABLE_ARG_NAMES_ATTR):
             non_injectable_arg_names = getattr(
                 fn, _NON_INJECTABLE_ARG_NAMES_ATTR)
     else:
         existing_arg_binding_keys = []
-        orig_fn = fn
 
-    arg_names, unused_varargs, unused_keywords, defaults = support.get_method_args(orig_fn)
-    num_args_with_defaults = len(defaults) if defaults is not None else 0
-    if num_args_with_defaults:
-        arg_names = arg_names[:-num_args_with_defaults]
     unbound_injectable_arg_names = arg_binding_keys.get_unbound_arg_names(
-        [arg_name for arg_name in _remove_self_if_exists(arg_names)
+        [arg_name for arg_name in arg_spec.required_arg_names
          if arg_name not in non_injectable_arg_names],
         existing_arg_binding_keys)
 
-    all_arg_binding_keys = list(existing_arg_binding_keys)
-    all_arg_binding_keys.extend([arg_binding_keys.new(arg_name)
-                                 for arg_name in unbound_injectable_arg_names])
-    return all_arg_binding_keys
-
-
-# TODO(kurts): this feels icky.  Is there no way around this, because
-# cls.__init__() takes self but instance.__init__() doesn't, and python is
-# awkward here?
-def _remove_self_if_exists(args):
-    if args and args[0] == 'self':
-        return args[1:]
-    else:
-        return args
+    return tuple(existing_arg_binding_keys) + tuple(
+        arg_binding_keys.new(arg_name)
+        for arg_name in unbound_injectable_arg_names)
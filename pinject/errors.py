@@ -104,6 +104,14 @@ class DuplicateDecoratorError(Error):
                 second_decorator_loc, decorator_name))
 
 
+class EmptyBindManyError(Error):
+
+    def __init__(self, binding_loc):
+        Error.__init__(
+            self, 'bind_many() at {0} needs to_instances, to_classes, or'
+            ' both'.format(binding_loc))
+
+
 class EmptyBindingSpecError(Error):
 
     def __init__(self, binding_spec):
@@ -149,6 +157,27 @@ class InvalidBindingTargetError(Error):
                 type(binding_target).__name__, expected_type_str))
 
 
+class InvalidImportPathError(Error):
+
+    def __init__(self, import_path, loc):
+        Error.__init__(
+            self, 'import path {0!r} at {1} is not of the form'
+            ' "package.module:Class"'.format(import_path, loc))
+
+
+class LazyBindingAlreadyLookedUpError(Error):
+
+    def __init__(self, binding_key, nested_lazy_binding_spec,
+                 lazy_binding_spec):
+        Error.__init__(
+            self, 'loading the binding spec {0} at {1} created the lazy'
+            ' binding spec {2} at {3}, declaring {4}, but {4} was already'
+            ' looked up without it'.format(
+                lazy_binding_spec.import_path, lazy_binding_spec.loc,
+                nested_lazy_binding_spec.import_path,
+                nested_lazy_binding_spec.loc, binding_key))
+
+
 class MissingRequiredBindingError(Error):
 
     def __init__(self, required_binding):
@@ -249,6 +278,17 @@ class PargsDisallowedWhenCopyingArgsError(Error):
                 decorator_name, locations.get_name_and_loc(fn), pargs_arg_name))
 
 
+class SingletonDeadlockError(Error):
+
+    def __init__(self, awaited_binding_keys):
+        Error.__init__(
+            self, 'deadlock while providing singletons: each of these is'
+            ' being provided by a thread waiting for the next (and the last'
+            ' for the first):\n{0}'.format(
+                '\n'.join('  {0}'.format(binding_key)
+                          for binding_key in awaited_binding_keys)))
+
+
 class TooManyArgsToInjectDecoratorError(Error):
 
     def __init__(self, decorator_loc):
@@ -257,6 +297,16 @@ class TooManyArgsToInjectDecoratorError(Error):
             ' all_except'.format(decorator_loc))
 
 
+class UndeclaredLazyBindingError(Error):
+
+    def __init__(self, binding_key, created_desc, lazy_binding_spec):
+        Error.__init__(
+            self, 'loading the binding spec {0} created {1}, but {2} is not'
+            ' among the binding names declared for the binding spec at'
+            ' {3}'.format(lazy_binding_spec.import_path, created_desc,
+                          binding_key, lazy_binding_spec.loc))
+
+
 class UnknownScopeError(Error):
 
     def __init__(self, scope_id, binding_loc):
@@ -264,6 +314,15 @@ class UnknownScopeError(Error):
                        ' {1}'.format(scope_id, binding_loc))
 
 
+class UnresolvableLazyClassError(Error):
+
+    def __init__(self, lazy_class):
+        Error.__init__(
+            self, 'module {0} has no class {1}, as expected at {2}'.format(
+                lazy_class.module_name, lazy_class.class_name,
+                lazy_class.loc))
+
+
 class WrongArgElementTypeError(Error):
 
     def __init__(self, arg_name, idx, expected_type_desc, actual_type_desc):
@@ -14,36 +14,223 @@ limitations under the License.
 """
 
 
+import fnmatch
 import inspect
+import json
+import os
+import re
 import sys
+import tempfile
+import threading
+import weakref
+
+from . import decorators
+from . import support
 
 
 ALL_IMPORTED_MODULES = object()
+IMPORT_DISCOVERED_MODULES = object()
+
+# From module to (the size of its __dict__, the classes found in it).  A
+# module's classes are only looked for again if it's replaced by another
+# module object or if its __dict__ changes size.
+_module_to_dict_len_and_classes = weakref.WeakKeyDictionary()
+
 
+def find_classes(modules, classes, exclude_modules=None,
+                 class_index_path=None):
+    """Finds the classes to consider for implicit bindings.
 
-def find_classes(modules, classes):
+    Module name patterns are either glob patterns (e.g., "myapp.*"), or, if
+    they contain no wildcards, package names (e.g., "myapp", which matches
+    myapp and all its submodules).
+
+    Args:
+      modules: the modules in which to search for classes, as a sequence of
+          modules and module name patterns (matched against imported
+          modules), or None, or ALL_IMPORTED_MODULES, or
+          IMPORT_DISCOVERED_MODULES (for the modules recorded since calling
+          discover_classes_on_import())
+      classes: the classes to include, or None
+      exclude_modules: a sequence of module name patterns of modules in
+          which not to search for classes, or None
+      class_index_path: the path of a file in which to record which classes
+          each module contains, so that later processes can reuse what's
+          recorded for modules whose source files haven't changed, or None
+    Returns:
+      a set of classes
+    """
     if classes is not None:
         all_classes = set(classes)
     else:
         all_classes = set()
-    for module in _get_explicit_or_default_modules(modules):
+    if class_index_path is not None:
+        class_index = _get_class_index(class_index_path)
+    else:
+        class_index = None
+    if modules is IMPORT_DISCOVERED_MODULES:
+        all_classes |= _import_discovered_classes.get_classes(exclude_modules)
+        return all_classes
+    for module in _get_explicit_or_default_modules(modules, exclude_modules):
         # TODO(kurts): how is a module getting to be None??
         if module is not None:
-            all_classes |= _find_classes_in_module(module)
+            all_classes |= _find_classes_in_module(module, class_index)
+    if class_index is not None:
+        class_index.save_if_changed()
+    return all_classes
+
+
+def find_explicitly_injectable_classes(modules, classes, exclude_modules=None,
+                                       class_index_path=None):
+    """Finds the classes to consider for explicit bindings only.
+
+    This returns the explicitly injectable classes among what find_classes()
+    would return (with the same args), plus any other classes passed in.
+    When searching all imported modules, it avoids searching them by instead
+    looking up the classes of the initializers decorated by Pinject.
+    """
+    if modules is not ALL_IMPORTED_MODULES:
+        return set(
+            cls for cls in find_classes(modules, classes, exclude_modules,
+                                        class_index_path)
+            if decorators.is_explicitly_injectable(cls))
+    if classes is not None:
+        all_classes = set(classes)
+    else:
+        all_classes = set()
+    if exclude_modules:
+        is_excluded_fn = get_module_name_matches_fn(exclude_modules)
+    else:
+        is_excluded_fn = lambda _: None
+    classes_to_visit = []
+    for init_fn in decorators.get_decorated_init_fns():
+        qualname_parts = getattr(init_fn, '__qualname__', '').split('.')
+        if len(qualname_parts) == 2:
+            cls = _get_module_level_class(
+                getattr(init_fn, '__module__', None), qualname_parts[0])
+            if cls is not None and _is_or_wraps(
+                    vars(cls).get('__init__'), init_fn):
+                classes_to_visit.append(cls)
+    # Subclasses inheriting a decorated initializer are explicitly injectable
+    # too.
+    visited_classes = set()
+    while classes_to_visit:
+        cls = classes_to_visit.pop()
+        if cls in visited_classes:
+            continue
+        visited_classes.add(cls)
+        # Only classes that searching the imported modules would find count.
+        if (_get_module_level_class(cls.__module__, cls.__name__) is cls and
+                not is_excluded_fn(cls.__module__)):
+            all_classes.add(cls)
+        classes_to_visit.extend(
+            subclass for subclass in type.__subclasses__(cls)
+            if decorators.is_explicitly_injectable(subclass))
     return all_classes
 
 
-def _get_explicit_or_default_modules(modules):
+def _is_or_wraps(fn, wrapped_fn):
+    """Returns whether fn is wrapped_fn, or wraps it via __wrapped__."""
+    seen_fn_ids = set()
+    while fn is not None and id(fn) not in seen_fn_ids:
+        if fn is wrapped_fn:
+            return True
+        seen_fn_ids.add(id(fn))
+        fn = getattr(fn, '__wrapped__', None)
+    return False
+
+
+def _get_module_level_class(module_name, class_name):
+    module = sys.modules.get(module_name)
+    module_dict = getattr(module, '__dict__', None)
+    if not isinstance(module_dict, dict):
+        return None
+    cls = module_dict.get(class_name)
+    return cls if inspect.isclass(cls) else None
+
+
+def _get_explicit_or_default_modules(modules, exclude_modules=None):
     if modules is ALL_IMPORTED_MODULES:
-        return list(sys.modules.values())
+        names_and_modules = list(sys.modules.items())
     elif modules is None:
         return []
-    return modules
+    else:
+        patterns = [x for x in modules if support.is_string(x)]
+        if not patterns and not exclude_modules:
+            return modules
+        names_and_modules = [(getattr(x, '__name__', None), x)
+                             for x in modules if not support.is_string(x)]
+        if patterns:
+            matches_fn = get_module_name_matches_fn(patterns)
+            names_and_modules.extend(
+                (name, module) for name, module in list(sys.modules.items())
+                if matches_fn(name))
+    if exclude_modules:
+        is_excluded_fn = get_module_name_matches_fn(exclude_modules)
+        names_and_modules = [
+            (name, module) for name, module in names_and_modules
+            if not (support.is_string(name) and is_excluded_fn(name))]
+    return [module for _, module in names_and_modules]
+
 
+def get_module_name_matches_fn(patterns):
+    """Returns a function matching module names against patterns.
 
-def _find_classes_in_module(module):
-    classes = set()
+    Args:
+      patterns: a sequence of module name patterns, each of which is either a
+          module name, matching that module and its submodules, or an
+          fnmatch-style pattern if it contains any of "*?["
+    Returns:
+      a function that takes a module name and returns a true value iff the
+      name matches one of the patterns
+    """
+    regexes = []
+    for pattern in patterns:
+        if any(wildcard in pattern for wildcard in '*?['):
+            regexes.append(fnmatch.translate(pattern))
+        else:
+            regexes.append(re.escape(pattern) + r'(?:\..*)?\Z')
+    return re.compile('|'.join('(?:{0})'.format(x) for x in regexes)).match
 
+
+def _find_classes_in_module(module, class_index=None):
+    module_dict = getattr(module, '__dict__', None)
+    if not isinstance(module_dict, dict):
+        return _find_classes_in_module_members(module)
+    try:
+        dict_len_and_classes = _module_to_dict_len_and_classes.get(module)
+    except TypeError:
+        # The module can't be weakly referenced, so it can't be cached.
+        return _find_classes_in_module_dict(module_dict)
+    dict_len = len(module_dict)
+    if (dict_len_and_classes is not None and
+            dict_len_and_classes[0] == dict_len):
+        return dict_len_and_classes[1]
+    classes = None
+    if class_index is not None:
+        classes = class_index.get_classes(module_dict)
+    if classes is None:
+        named_classes = _find_named_classes_in_module_dict(module_dict)
+        classes = frozenset(cls for _, cls in named_classes)
+        if class_index is not None:
+            class_index.set_class_names(
+                module_dict, [name for name, _ in named_classes])
+    _module_to_dict_len_and_classes[module] = (dict_len, classes)
+    return classes
+
+
+def _find_classes_in_module_dict(module_dict):
+    return frozenset(
+        cls for _, cls in _find_named_classes_in_module_dict(module_dict))
+
+
+def _find_named_classes_in_module_dict(module_dict):
+    # Reading the module's __dict__ directly, unlike inspect.getmembers(),
+    # neither sorts the members nor triggers any lazy module attributes.
+    return list(_get_classes(list(module_dict.items())))
+
+
+def _find_classes_in_module_members(module):
     try:
         # Handle find_classes_in_module when module.__bases__ is not a tuple:
         #   https://github.com/google/pinject/pull/54
@@ -60,10 +247,15 @@ def _find_classes_in_module(module):
     except AttributeError:
         pass
 
-    for member_name, member in inspect.getmembers(module):
+    return set(member for _, member in
+               _get_classes(inspect.getmembers(module)))
+
+
+def _get_classes(members):
+    for member_name, member in members:
         try:
             if inspect.isclass(member) and not member_name == '__class__':
-                classes.add(member)
+                yield member_name, member
         except NameError:
             # In Python 3 calling isinstance() on SWIG's global cvar property
             # raises:
@@ -71,4 +263,259 @@ def _find_classes_in_module(module):
             # In that case just continue, otherwise let the Error through.
             if not member_name == 'cvar':
                 raise
-    return classes
+
+
+_CLASS_INDEX_VERSION = 1
+# os.rename() is atomic but doesn't replace existing files on Windows.
+_replace_file = getattr(os, 'replace', os.rename)
+_path_to_class_index = {}
+_path_to_class_index_lock = threading.Lock()
+
+
+def _get_class_index(path):
+    with _path_to_class_index_lock:
+        class_index = _path_to_class_index.get(path)
+        if class_index is None:
+            class_index = _ClassIndex(path)
+            _path_to_class_index[path] = class_index
+        return class_index
+
+
+class _ClassIndex(object):
+    """An on-disk record of which classes modules contain.
+
+    Each module is recorded under its source file's path, along with its
+    name, its source file's modification time and size, and the size of its
+    __dict__ when it was scanned.  A module's record is only used if all of
+    those still match and each recorded name still names a class in the
+    module; otherwise, the module is scanned as usual.
+
+    The file is replaced atomically, so that concurrent readers never see a
+    partially written index.  Concurrent writers each merge their records
+    into the latest index on disk before replacing it, so at worst a record
+    is lost and the module is scanned again in a later process.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._file_path_to_record = self._load()
+        self._changed_file_path_to_record = {}
+
+    def get_classes(self, module_dict):
+        """Returns the classes recorded for a module, or None."""
+        file_path_and_record = _new_module_record(module_dict)
+        if file_path_and_record is None:
+            return None
+        file_path, new_record = file_path_and_record
+        with self._lock:
+            record = self._file_path_to_record.get(file_path)
+        if record is None or any(record.get(key) != value
+                                 for key, value in support.items(new_record)):
+            return None
+        classes = []
+        for class_name in record['class_names']:
+            cls = module_dict.get(class_name)
+            if not inspect.isclass(cls):
+                return None
+            classes.append(cls)
+        return frozenset(classes)
+
+    def set_class_names(self, module_dict, class_names):
+        """Records the classes found in a module, if it has a source file.
+
+        Args:
+          module_dict: the module's __dict__
+          class_names: the names in module_dict of the classes found
+        """
+        file_path_and_record = _new_module_record(module_dict)
+        if file_path_and_record is None:
+            return
+        file_path, record = file_path_and_record
+        record['class_names'] = sorted(class_names)
+        with self._lock:
+            if self._file_path_to_record.get(file_path) != record:
+                self._file_path_to_record[file_path] = record
+                self._changed_file_path_to_record[file_path] = record
+
+    def save_if_changed(self):
+        with self._lock:
+            if not self._changed_file_path_to_record:
+                return
+            file_path_to_record = self._load()
+            file_path_to_record.update(self._changed_file_path_to_record)
+            self._changed_file_path_to_record = {}
+            index_dir = os.path.dirname(os.path.abspath(self._path))
+            try:
+                fd, temp_path = tempfile.mkstemp(
+                    dir=index_dir, prefix='.pinject-class-index-')
+                try:
+                    with os.fdopen(fd, 'w') as temp_file:
+                        json.dump({'version': _CLASS_INDEX_VERSION,
+                                   'modules': file_path_to_record},
+                                  temp_file, sort_keys=True)
+                    _replace_file(temp_path, self._path)
+                except BaseException:
+                    os.remove(temp_path)
+                    raise
+            except (IOError, OSError):
+                # The index is only an optimization.
+                pass
+
+    def _load(self):
+        try:
+            with open(self._path) as index_file:
+                index = json.load(index_file)
+            if index.get('version') == _CLASS_INDEX_VERSION:
+                return dict(index['modules'])
+        except (IOError, OSError, ValueError, KeyError, AttributeError,
+                TypeError):
+            pass
+        return {}
+
+
+def _new_module_record(module_dict):
+    """Returns a module's source file path and a new record, or None."""
+    module_name = module_dict.get('__name__')
+    file_path = module_dict.get('__file__')
+    if not support.is_string(module_name) or not support.is_string(file_path):
+        return None
+    try:
+        stat = os.stat(file_path)
+    except (IOError, OSError):
+        return None
+    return file_path, {'module_name': module_name, 'mtime': stat.st_mtime,
+                       'size': stat.st_size, 'dict_len': len(module_dict)}
+
+
+def discover_classes_on_import(modules):
+    """Records the classes in modules as they're imported.
+
+    After this is called, each module whose name matches one of the given
+    patterns has its classes recorded as soon as it's been imported, so that
+    creating an object graph with modules=IMPORT_DISCOVERED_MODULES needn't
+    search through any modules.  Matching modules that are already imported
+    are recorded right away.  Calling this again adds more patterns.
+
+    Args:
+      modules: a sequence of module name patterns (see find_classes())
+    """
+    support.verify_pattern_types(modules, 'modules')
+    _import_discovered_classes.add_module_patterns(modules)
+
+
+class _ImportDiscoveredClasses(object):
+    """The classes recorded by an import hook, by module name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._module_patterns = []
+        self._matches_fn = None
+        self._module_name_to_classes = {}
+        self._finder = None
+
+    def add_module_patterns(self, module_patterns):
+        with self._lock:
+            self._module_patterns.extend(module_patterns)
+            self._matches_fn = get_module_name_matches_fn(
+                self._module_patterns)
+            if self._finder is None:
+                self._finder = _ClassDiscoveringFinder(self)
+                sys.meta_path.insert(0, self._finder)
+        for module_name, module in list(sys.modules.items()):
+            if module is not None and self.matches(module_name):
+                self.record_module(module_name, module)
+
+    def matches(self, module_name):
+        matches_fn = self._matches_fn
+        return matches_fn is not None and matches_fn(module_name) is not None
+
+    def record_module(self, module_name, module):
+        classes = _find_classes_in_module(module)
+        with self._lock:
+            self._module_name_to_classes[module_name] = classes
+
+    def get_classes(self, exclude_modules=None):
+        with self._lock:
+            module_name_to_classes = dict(self._module_name_to_classes)
+        if exclude_modules:
+            is_excluded_fn = get_module_name_matches_fn(exclude_modules)
+        else:
+            is_excluded_fn = lambda _: False
+        all_classes = set()
+        for module_name, classes in support.items(module_name_to_classes):
+            if not is_excluded_fn(module_name):
+                all_classes |= classes
+        return all_classes
+
+    def reset(self):
+        # The fields are reset under the existing lock, rather than by
+        # __init__(), which would replace the lock that other threads wait on.
+        with self._lock:
+            if self._finder is not None and self._finder in sys.meta_path:
+                sys.meta_path.remove(self._finder)
+            self._module_patterns = []
+            self._matches_fn = None
+            self._module_name_to_classes = {}
+            self._finder = None
+
+
+_import_discovered_classes = _ImportDiscoveredClasses()
+
+
+class _ClassDiscoveringFinder(object):
+    """A meta path finder that records the classes of matching modules.
+
+    It finds nothing itself, but wraps the loaders of the specs that other
+    finders find for matching modules.
+    """
+
+    def __init__(self, import_discovered_classes):
+        self._import_discovered_classes = import_discovered_classes
+
+    def find_spec(self, fullname, path, target=None):
+        if not self._import_discovered_classes.matches(fullname):
+            return None
+        for finder in list(sys.meta_path):
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _ClassDiscoveringLoader(
+                spec.loader, self._import_discovered_classes)
+        return spec
+
+    def invalidate_caches(self):
+        pass
+
+
+class _ClassDiscoveringLoader(object):
+    """Wraps a loader, to record the classes of a module it's executed.
+
+    Once the module's executed, the module is given back its real loader.
+    """
+
+    def __init__(self, loader, import_discovered_classes):
+        self._loader = loader
+        self._import_discovered_classes = import_discovered_classes
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def exec_module(self, module):
+        try:
+            self._loader.exec_module(module)
+        finally:
+            if getattr(module, '__loader__', None) is self:
+                module.__loader__ = self._loader
+            spec = getattr(module, '__spec__', None)
+            if getattr(spec, 'loader', None) is self:
+                spec.loader = self._loader
+        # Modules may replace themselves in sys.modules while executing.
+        module_name = module.__spec__.name
+        self._import_discovered_classes.record_module(
+            module_name, sys.modules.get(module_name, module))
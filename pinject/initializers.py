@@ -40,11 +40,11 @@ def _copy_args_to_fields(fn, decorator_name, field_prefix):
     if fn.__name__ != '__init__':
         raise errors.DecoratorAppliedToNonInitError(
             decorator_name, fn)
-    arg_names, varargs, unused_keywords, unused_defaults = (
-        support.get_method_args(fn))
-    if varargs is not None:
+    arg_spec = support.get_arg_spec(fn)
+    arg_names = arg_spec.arg_names
+    if arg_spec.varargs is not None:
         raise errors.PargsDisallowedWhenCopyingArgsError(
-            decorator_name, fn, varargs)
+            decorator_name, fn, arg_spec.varargs)
 
     def CopyThenCall(fn_to_wrap, self, *pargs, **kwargs):
         for index, parg in enumerate(pargs, start=1):
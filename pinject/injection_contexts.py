@@ -14,6 +14,8 @@ limitations under the License.
 """
 
 
+import itertools
+
 from . import errors
 from . import locations
 from . import scoping
@@ -31,6 +33,7 @@ class InjectionContextFactory(object):
               into an object from the second scope
         """
         self._is_scope_usable_from_scope_fn = is_scope_usable_from_scope_fn
+        self._binding_bits = _BindingBits()
 
     def new(self, injection_site_fn):
         """Creates a _InjectionContext.
@@ -41,31 +44,60 @@ class InjectionContextFactory(object):
           a new empty _InjectionContext in the default scope
         """
         return _InjectionContext(
-            injection_site_fn, binding_stack=[], scope_id=scoping.UNSCOPED,
-            is_scope_usable_from_scope_fn=self._is_scope_usable_from_scope_fn)
+            injection_site_fn, binding=None, parent=None, binding_stack_bits=0,
+            scope_id=scoping.UNSCOPED,
+            is_scope_usable_from_scope_fn=self._is_scope_usable_from_scope_fn,
+            binding_bits=self._binding_bits)
+
+
+class _BindingBits(object):
+    """Assigns each binding its own bit, for sets of bindings as ints."""
+
+    def __init__(self):
+        self._binding_to_bit = {}
+        self._next_index = itertools.count()
+
+    def get_bit(self, binding):
+        bit = self._binding_to_bit.get(binding)
+        if bit is None:
+            # setdefault() keeps concurrent callers agreeing on the bit.
+            bit = self._binding_to_bit.setdefault(
+                binding, 1 << next(self._next_index))
+        return bit
 
 
 class _InjectionContext(object):
     """The context of dependency-injecting some bound value."""
 
-    def __init__(self, injection_site_fn, binding_stack, scope_id,
-                 is_scope_usable_from_scope_fn):
+    __slots__ = ('_injection_site_fn', '_binding', '_parent',
+                 '_binding_stack_bits', '_scope_id',
+                 '_is_scope_usable_from_scope_fn', '_binding_bits')
+
+    def __init__(self, injection_site_fn, binding, parent, binding_stack_bits,
+                 scope_id, is_scope_usable_from_scope_fn, binding_bits):
         """Initializer.
 
         Args:
           injection_site_fn: the function currently being injected into
-          binding_stack: a sequence of the bindings whose use in injection is
-              in-progress, from the highest level (first) to the current level
-              (last)
+          binding: the Binding whose use in injection is in-progress at the
+              current level, or None at the top level
+          parent: the _InjectionContext of the level above, or None at the
+              top level
+          binding_stack_bits: the bits (from binding_bits) of the bindings of
+              this context and all its ancestors, OR'ed together
           scope_id: the scope ID of the current (last) binding's scope
           is_scope_usable_from_scope_fn: a function taking two scope IDs and
               returning whether an object in the first scope can be injected
               into an object from the second scope
+          binding_bits: the _BindingBits shared by all related contexts
         """
         self._injection_site_fn = injection_site_fn
-        self._binding_stack = binding_stack
+        self._binding = binding
+        self._parent = parent
+        self._binding_stack_bits = binding_stack_bits
         self._scope_id = scope_id
         self._is_scope_usable_from_scope_fn = is_scope_usable_from_scope_fn
+        self._binding_bits = binding_bits
 
     def get_child(self, injection_site_fn, binding):
         """Creates a child injection context.
@@ -80,17 +112,39 @@ class _InjectionContext(object):
           a new _InjectionContext
         """
         child_scope_id = binding.scope_id
-        new_binding_stack = self._binding_stack + [binding]
-        if binding in self._binding_stack:
-            raise errors.CyclicInjectionError(new_binding_stack)
+        binding_bit = self._binding_bits.get_bit(binding)
+        if self._binding_stack_bits & binding_bit:
+            raise errors.CyclicInjectionError(
+                self._get_binding_stack() + [binding])
+        self.verify_scope_usable(binding)
+        return _InjectionContext(
+            injection_site_fn, binding, self,
+            self._binding_stack_bits | binding_bit, child_scope_id,
+            self._is_scope_usable_from_scope_fn, self._binding_bits)
+
+    def verify_scope_usable(self, binding):
+        """Verifies that binding's scope is usable from the current scope.
+
+        Args:
+          binding: a Binding
+        Raises:
+          BadDependencyScopeError: binding's scope is not usable
+        """
         if not self._is_scope_usable_from_scope_fn(
-                child_scope_id, self._scope_id):
+                binding.scope_id, self._scope_id):
             raise errors.BadDependencyScopeError(
                 self.get_injection_site_desc(),
-                self._scope_id, child_scope_id, binding.binding_key)
-        return _InjectionContext(
-            injection_site_fn, new_binding_stack, child_scope_id,
-            self._is_scope_usable_from_scope_fn)
+                self._scope_id, binding.scope_id, binding.binding_key)
+
+    def _get_binding_stack(self):
+        """Returns the in-progress bindings, from the highest level first."""
+        binding_stack = []
+        injection_context = self
+        while injection_context._binding is not None:
+            binding_stack.append(injection_context._binding)
+            injection_context = injection_context._parent
+        binding_stack.reverse()
+        return binding_stack
 
     def get_injection_site_desc(self):
         """Returns a description of the current injection site."""
@@ -0,0 +1,112 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import importlib
+import inspect
+import sys
+import threading
+
+from . import errors
+
+
+class LazyClass(object):
+    """A reference to a class whose module is imported only when needed.
+
+    Attributes:
+      module_name: the name of the module defining the class
+      class_name: the name of the class in its module
+      loc: the "file:line" location of the class, or of the reference to it
+      is_explicitly_injectable: whether the class's initializer is known to
+          be decorated by Pinject's decorators
+      init_arg_names: a tuple of the names of the positional args (minus
+          self) of the class's initializer, or None if not known, e.g.,
+          because the class inherits its initializer
+    """
+
+    __slots__ = ('module_name', 'class_name', 'loc',
+                 'is_explicitly_injectable', 'init_arg_names', '_cls', '_lock')
+
+    def __init__(self, module_name, class_name, loc,
+                 is_explicitly_injectable=False, init_arg_names=None):
+        self.module_name = module_name
+        self.class_name = class_name
+        self.loc = loc
+        self.is_explicitly_injectable = is_explicitly_injectable
+        self.init_arg_names = init_arg_names
+        self._cls = None
+        self._lock = threading.Lock()
+
+    def get_if_imported(self):
+        """Returns the class if its module is already imported, else None."""
+        if self._cls is None:
+            module = sys.modules.get(self.module_name)
+            if module is not None:
+                cls = get_class_in_module(module, self.class_name)
+                if cls is not None:
+                    self._cls = cls
+        return self._cls
+
+    def resolve(self):
+        """Returns the class, importing its module if needed.
+
+        Raises:
+          ImportError: the class's module can't be imported
+          UnresolvableLazyClassError: the module has no such class
+        """
+        cls = self._cls
+        if cls is None:
+            with self._lock:
+                if self._cls is None:
+                    module = importlib.import_module(self.module_name)
+                    cls = get_class_in_module(module, self.class_name)
+                    if cls is None:
+                        raise errors.UnresolvableLazyClassError(self)
+                    self._cls = cls
+                cls = self._cls
+        return cls
+
+    def get_name_and_loc(self):
+        return '{0}.{1} at {2}'.format(
+            self.module_name, self.class_name, self.loc)
+
+    def __repr__(self):
+        return '<lazy class {0}:{1}>'.format(self.module_name, self.class_name)
+
+
+def new_from_import_path(import_path, loc):
+    """Creates a LazyClass from a "package.module:Class" import path.
+
+    Args:
+      import_path: the module name and the (possibly dotted) class name in
+          that module, separated by a colon
+      loc: the "file:line" location of the reference to the class
+    Returns:
+      a LazyClass
+    Raises:
+      InvalidImportPathError: import_path is not of the right form
+    """
+    module_name, _, class_name = import_path.partition(':')
+    if not module_name or not class_name:
+        raise errors.InvalidImportPathError(import_path, loc)
+    return LazyClass(module_name, class_name, loc)
+
+
+def get_class_in_module(module, class_name):
+    """Returns the class with a (possibly dotted) name in module, or None."""
+    thing = module
+    for name in class_name.split('.'):
+        thing = getattr(thing, name, None)
+    return thing if inspect.isclass(thing) else None
@@ -15,30 +15,143 @@ limitations under the License.
 
 
 import inspect
+import os
+import sys
+import weakref
 
 LOCALS_TOKEN = '<locals>'
+UNKNOWN_LOCATION = 'unknown location'
 
+_thing_to_file_and_line = weakref.WeakKeyDictionary()
 
-def get_loc(thing):
-    try:
-        return '{0}:{1}'.format(
-            inspect.getfile(thing), inspect.getsourcelines(thing)[1])
-    except (TypeError, IOError):
-        return 'unknown location'
+
+def get_loc(thing, use_source=False):
+    """Returns the "file:line" location of a class or function.
+
+    Line numbers come from code objects, so source files aren't read.  A
+    class's line is that of its initializer, or else of its first function.
+
+    Args:
+      thing: a class, function, or method
+      use_source: whether to read the source file when code objects don't
+          give the location (e.g., for a class without functions)
+    Returns:
+      a "file:line" location, or "unknown location"
+    """
+    file_and_line = _get_file_and_line(thing, use_source)
+    if file_and_line is None:
+        return UNKNOWN_LOCATION
+    return '{0}:{1}'.format(*file_and_line)
 
 
-def get_name_and_loc(thing):
+def get_name_and_loc(thing, use_source=False):
     try:
         type_name = _get_type_name(thing)
         class_name = '{0}.{1}'.format(type_name, thing.__name__)
     except (TypeError, IOError):
         class_name = '{0}.{1}'.format(
             inspect.getmodule(thing).__name__, thing.__name__)
+    file_and_line = _get_file_and_line(thing, use_source)
+    if file_and_line is None:
+        return class_name
+    return '{0} at {1}:{2}'.format(class_name, *file_and_line)
+
+
+def _get_file_and_line(thing, use_source):
+    key = getattr(thing, '__func__', thing)
+    try:
+        file_and_line = _thing_to_file_and_line.get(key)
+    except TypeError:
+        file_and_line = _get_code_file_and_line(key)
+    else:
+        if file_and_line is None:
+            file_and_line = _get_code_file_and_line(key)
+            if file_and_line is not None:
+                _thing_to_file_and_line[key] = file_and_line
+    if file_and_line is None and use_source:
+        file_and_line = _get_source_file_and_line(thing)
+    return file_and_line
+
+
+def _get_source_file_and_line(thing):
     try:
-        return '{0} at {1}:{2}'.format(class_name, inspect.getfile(thing),
-                                       inspect.getsourcelines(thing)[1])
+        return inspect.getfile(thing), inspect.getsourcelines(thing)[1]
     except (TypeError, IOError):
-        return class_name
+        return None
+
+
+def _get_code_file_and_line(thing):
+    if inspect.isclass(thing):
+        return _get_class_file_and_line(thing)
+    code = _get_code(thing)
+    if code is None:
+        return None
+    return code.co_filename, code.co_firstlineno
+
+
+def _get_class_file_and_line(cls):
+    # Code objects, not the module's __file__, give the source file, since a
+    # module imported from a .pyc file has a __file__ ending in ".pyc".
+    init_code = _get_code(cls.__dict__.get('__init__'))
+    codes = [code for code in (_get_code(member)
+                               for member in cls.__dict__.values())
+             if code is not None and code is not init_code]
+    if init_code is not None:
+        codes.insert(0, init_code)
+    module_filename = getattr(sys.modules.get(cls.__module__), '__file__',
+                              None)
+    filename = _get_class_filename(codes, module_filename)
+    if filename is None:
+        return None
+    firstlineno = cls.__dict__.get('__firstlineno__')  # python 3.13+
+    if firstlineno is None:
+        # Members defined elsewhere (e.g., functions assigned in the class
+        # body) don't give the class's line.
+        firstlinenos = [code.co_firstlineno for code in codes
+                        if code.co_filename == filename]
+        if not firstlinenos:
+            return None
+        if init_code is not None and init_code.co_filename == filename:
+            firstlineno = init_code.co_firstlineno
+        else:
+            firstlineno = min(firstlinenos)
+    return filename, firstlineno
+
+
+def _get_class_filename(codes, module_filename):
+    """Returns the source file that a class's members' code objects share.
+
+    Code objects from the module's own source file win; otherwise the file
+    of most of them (preferring the initializer's) does.
+    """
+    filenames = [code.co_filename for code in codes]
+    if module_filename is not None:
+        module_stem = _get_file_stem(module_filename)
+        module_filenames = [x for x in filenames
+                            if x == module_filename or
+                            _get_file_stem(x) == module_stem]
+        if module_filenames:
+            filenames = module_filenames
+    if not filenames:
+        return module_filename
+    return max(filenames, key=filenames.count)
+
+
+def _get_file_stem(filename):
+    # "mod.py", "mod.pyc", and "__pycache__/mod.cpython-311.pyc" share "mod".
+    return os.path.basename(filename).split('.', 1)[0]
+
+
+def _get_code(thing):
+    if isinstance(thing, (classmethod, staticmethod)):
+        thing = thing.__func__
+    thing = getattr(thing, '__func__', thing)
+    # Follow what decorators (including Pinject's) wrapped.
+    seen_ids = set()
+    while hasattr(thing, '__wrapped__') and id(thing) not in seen_ids:
+        seen_ids.add(id(thing))
+        thing = thing.__wrapped__
+    return getattr(thing, '__code__', None)
 
 
 def get_back_frame_loc():
@@ -47,6 +160,20 @@ def get_back_frame_loc():
                             back_frame.f_lineno)
 
 
+def get_back_frame_file_and_line():
+    """Returns the file and line of the caller's caller, unformatted.
+
+    This is cheaper than get_back_frame_loc(), for callers that only need a
+    location if something turns out to be wrong; see get_file_and_line_loc().
+    """
+    back_frame = sys._getframe(2)
+    return back_frame.f_code.co_filename, back_frame.f_lineno
+
+
+def get_file_and_line_loc(file_and_line):
+    return '{0}:{1}'.format(*file_and_line)
+
+
 def _get_type_name(target_thing):
     """
     Functions, bound methods and unbound methods change significantly in Python 3.
@@ -14,16 +14,21 @@ limitations under the License.
 """
 
 
+import threading
+import weakref
+
 from . import bindings
 from . import decorators
 from . import errors
 from . import finding
 from . import injection_contexts
+from . import lazy_classes
 from . import locations
 from . import object_providers
 from . import providing
 from . import required_bindings as required_bindings_lib
 from . import scoping
+from . import source_finding
 from . import support
 
 
@@ -37,17 +42,27 @@ def new_object_graph(
         get_arg_names_from_provider_fn_name=(
             providing.default_get_arg_names_from_provider_fn_name),
         id_to_scope=None, is_scope_usable_from_scope=lambda _1, _2: True,
-        use_short_stack_traces=True):
+        use_short_stack_traces=True, class_index_path=None,
+        exclude_modules=None, source_packages=None, num_source_processes=1,
+        cache_binding_specs=False, load_lazy_binding_specs=False):
     """Creates a new object graph.
 
     Args:
       modules: the modules in which to search for classes for which to create
-          implicit bindings; if None, then no modules; by default, all
-          modules imported at the time of calling this method
-      classes: the classes for which to create implicit bindings; if None (the
-          default), then no classes
+          implicit bindings, as a sequence of modules and module name
+          patterns (e.g., "myapp.*" matches the imported submodules of
+          myapp, and "myapp" matches myapp and its imported submodules); if
+          None, then no modules; if IMPORT_DISCOVERED_MODULES, then the
+          modules recorded as they were imported, since calling
+          discover_classes_on_import(); by default, all modules imported at
+          the time of calling this method
+      classes: the classes for which to create implicit bindings, as a
+          sequence of classes and "package.module:Class" import paths (whose
+          modules are imported only when an instance of the class is first
+          provided); if None (the default), then no classes
       binding_specs: the BindingSpec subclasses to get bindings and provider
-          methods from; if None (the default), then no binding specs
+          methods from, including LazyBindingSpecs; if None (the default),
+          then no binding specs
       only_use_explicit_bindings: whether to use only explicit bindings (i.e.,
           created by binding specs or @pinject.injectable, etc.)
       allow_injecting_none: whether to allow a provider method to provide None
@@ -68,6 +83,28 @@ def new_object_graph(
       use_short_stack_traces: whether to shorten the stack traces for
           exceptions that Pinject raises, so that they don't contain the
           innards of Pinject
+      class_index_path: the path of a file in which to record which classes
+          are found in which modules, so that later processes can skip
+          searching the modules whose source files haven't changed since; if
+          None (the default), then no such file is used
+      exclude_modules: a sequence of module name patterns (as for modules)
+          of the modules in which not to search for classes, or None (the
+          default) to exclude no modules
+      source_packages: the names of packages (found on sys.path) whose
+          source files to parse for classes for which to create implicit
+          bindings, without importing them until an instance of such a class
+          is first provided; if None (the default), then no packages
+      num_source_processes: the number of processes in which to parse the
+          source files of source_packages; by default, parse them in this
+          process
+      cache_binding_specs: whether to reuse, across object graphs, which
+          provider methods each binding spec class has and, for binding specs
+          whose is_pure is True, what their configure and dependencies
+          methods did the first time
+      load_lazy_binding_specs: whether to load the LazyBindingSpecs among
+          binding_specs (and their dependencies) when creating the object
+          graph, e.g., to validate them in tests; by default, each is loaded
+          when one of its binding names is first looked up
     Returns:
       an ObjectGraph
     Raises:
@@ -75,10 +112,24 @@ def new_object_graph(
 
     """
     try:
-        if modules is not None and modules is not finding.ALL_IMPORTED_MODULES:
-            support.verify_module_types(modules, 'modules')
+        if (modules is not None and
+                modules is not finding.ALL_IMPORTED_MODULES and
+                modules is not finding.IMPORT_DISCOVERED_MODULES):
+            support.verify_module_or_pattern_types(modules, 'modules')
+        if exclude_modules is not None:
+            support.verify_pattern_types(exclude_modules, 'exclude_modules')
+        if source_packages is not None:
+            support.verify_package_name_types(
+                source_packages, 'source_packages')
         if classes is not None:
-            support.verify_class_types(classes, 'classes')
+            support.verify_class_or_import_path_types(classes, 'classes')
+            classes_loc = locations.get_back_frame_loc()
+            lazy_classes_to_bind = [
+                lazy_classes.new_from_import_path(x, classes_loc)
+                for x in classes if support.is_string(x)]
+            classes = [x for x in classes if not support.is_string(x)]
+        else:
+            lazy_classes_to_bind = []
         if binding_specs is not None:
             support.verify_subclasses(
                 binding_specs, bindings.BindingSpec, 'binding_specs')
@@ -91,64 +142,62 @@ def new_object_graph(
         if is_scope_usable_from_scope is not None:
             support.verify_callable(is_scope_usable_from_scope,
                                     'is_scope_usable_from_scope')
+        decorators.validate_pending_decorations()
         injection_context_factory = injection_contexts.InjectionContextFactory(
             is_scope_usable_from_scope)
         id_to_scope = scoping.get_id_to_scope_with_defaults(id_to_scope)
         bindable_scopes = scoping.BindableScopes(id_to_scope)
         known_scope_ids = id_to_scope.keys()
 
-        found_classes = finding.find_classes(modules, classes)
         if only_use_explicit_bindings:
-            implicit_class_bindings = []
+            find_classes_fn = finding.find_explicitly_injectable_classes
         else:
-            implicit_class_bindings = bindings.get_implicit_class_bindings(
+            find_classes_fn = finding.find_classes
+        found_classes = find_classes_fn(
+            modules, classes, exclude_modules=exclude_modules,
+            class_index_path=class_index_path)
+        if source_packages is not None:
+            for lazy_class in source_finding.find_lazy_classes(
+                    source_packages, exclude_modules, num_source_processes):
+                cls = lazy_class.get_if_imported()
+                if cls is not None:
+                    found_classes.add(cls)
+                elif (lazy_class.is_explicitly_injectable or
+                      not only_use_explicit_bindings):
+                    found_classes.add(lazy_class)
+        for lazy_class in lazy_classes_to_bind:
+            cls = lazy_class.get_if_imported()
+            if cls is None and only_use_explicit_bindings:
+                # Whether the class is explicitly injectable isn't known
+                # without importing it.
+                cls = lazy_class.resolve()
+            found_classes.add(cls if cls is not None else lazy_class)
+        if only_use_explicit_bindings:
+            implicit_class_bindings = None
+        else:
+            implicit_class_bindings = bindings.ImplicitClassBindings(
                 found_classes, get_arg_names_from_class_name)
         explicit_bindings = bindings.get_explicit_class_bindings(
             found_classes, get_arg_names_from_class_name)
-        binder = bindings.Binder(explicit_bindings, known_scope_ids)
-        required_bindings = required_bindings_lib.RequiredBindings()
+        binding_spec_expander = _BindingSpecExpander(
+            known_scope_ids, configure_method_name, dependencies_method_name,
+            get_arg_names_from_provider_fn_name, cache_binding_specs)
         if binding_specs is not None:
-            binding_specs = list(binding_specs)
-            processed_binding_specs = set()
-            while binding_specs:
-                binding_spec = binding_specs.pop()
-                if binding_spec in processed_binding_specs:
-                    continue
-                processed_binding_specs.add(binding_spec)
-                all_kwargs = {'bind': binder.bind,
-                              'require': required_bindings.require}
-                has_configure = hasattr(binding_spec, configure_method_name)
-                if has_configure:
-                    configure_method = getattr(binding_spec, configure_method_name)
-                    configure_kwargs = _pare_to_present_args(
-                        all_kwargs, configure_method)
-                    if not configure_kwargs:
-                        raise errors.ConfigureMethodMissingArgsError(
-                            configure_method, all_kwargs.keys())
-                    try:
-                        configure_method(**configure_kwargs)
-                    except NotImplementedError:
-                        has_configure = False
-                dependencies = None
-                if hasattr(binding_spec, dependencies_method_name):
-                    dependencies_method = (
-                        getattr(binding_spec, dependencies_method_name))
-                    dependencies = dependencies_method()
-                    binding_specs.extend(dependencies)
-                provider_bindings = bindings.get_provider_bindings(
-                    binding_spec, known_scope_ids,
-                    get_arg_names_from_provider_fn_name)
-                explicit_bindings.extend(provider_bindings)
-                if (not has_configure and
-                    not dependencies and
-                    not provider_bindings):
-                    raise errors.EmptyBindingSpecError(binding_spec)
+            spec_bindings, required_bindings, lazy_binding_specs = (
+                binding_spec_expander.expand(binding_specs))
+            explicit_bindings.extend(spec_bindings)
+        else:
+            required_bindings, lazy_binding_specs = [], []
         binding_key_to_binding, collided_binding_key_to_bindings = (
             bindings.get_overall_binding_key_to_binding_maps(
-                [implicit_class_bindings, explicit_bindings]))
+                [explicit_bindings]))
         binding_mapping = bindings.BindingMapping(
-            binding_key_to_binding, collided_binding_key_to_bindings)
-        binding_mapping.verify_requirements(required_bindings.get())
+            binding_key_to_binding, collided_binding_key_to_bindings,
+            implicit_class_bindings, lazy_binding_specs,
+            binding_spec_expander.expand_lazy)
+        binding_mapping.verify_requirements(required_bindings)
+        if load_lazy_binding_specs:
+            binding_mapping.load_lazy_binding_specs()
     except errors.Error as e:
         if use_short_stack_traces:
             raise e
@@ -164,8 +213,166 @@ def new_object_graph(
         use_short_stack_traces)
 
 
+class _BindingSpecExpander(object):
+    """Gets the bindings that binding specs and their dependencies create."""
+
+    def __init__(self, known_scope_ids, configure_method_name,
+                 dependencies_method_name, get_arg_names_from_provider_fn_name,
+                 cache_binding_specs):
+        self._known_scope_ids = known_scope_ids
+        self._configure_method_name = configure_method_name
+        self._dependencies_method_name = dependencies_method_name
+        self._get_arg_names_from_provider_fn_name = (
+            get_arg_names_from_provider_fn_name)
+        self._cache_binding_specs = cache_binding_specs
+        self._processed_binding_specs = set()
+
+    def expand(self, binding_specs):
+        """Expands binding specs and their dependencies not expanded before.
+
+        LazyBindingSpecs among them are returned unexpanded.
+
+        Returns:
+          a (list of explicit Bindings, list of RequiredBindings, list of
+          LazyBindingSpecs) triple
+        """
+        explicit_bindings = []
+        binder = bindings.Binder(explicit_bindings, self._known_scope_ids)
+        required_bindings = required_bindings_lib.RequiredBindings()
+        lazy_binding_specs = []
+        binding_specs = list(binding_specs)
+        while binding_specs:
+            binding_spec = binding_specs.pop()
+            if binding_spec in self._processed_binding_specs:
+                continue
+            self._processed_binding_specs.add(binding_spec)
+            if isinstance(binding_spec, bindings.LazyBindingSpec):
+                lazy_binding_specs.append(binding_spec)
+                continue
+            if self._cache_binding_specs and binding_spec.is_pure:
+                configuration = _get_pure_binding_spec_configuration(
+                    binding_spec, self._known_scope_ids,
+                    self._configure_method_name,
+                    self._dependencies_method_name)
+                for binding in configuration.bindings:
+                    if binding.scope_id not in self._known_scope_ids:
+                        raise errors.UnknownScopeError(
+                            binding.scope_id, binding.get_binding_loc())
+                explicit_bindings.extend(configuration.bindings)
+                required_bindings.extend(configuration.required_bindings)
+                has_configure = configuration.has_configure
+                dependencies = configuration.dependencies
+            else:
+                has_configure, dependencies = _configure_binding_spec(
+                    binding_spec, binder, required_bindings,
+                    self._configure_method_name,
+                    self._dependencies_method_name)
+            if dependencies is not None:
+                binding_specs.extend(dependencies)
+            provider_bindings = bindings.get_provider_bindings(
+                binding_spec, self._known_scope_ids,
+                self._get_arg_names_from_provider_fn_name,
+                use_cache=self._cache_binding_specs)
+            explicit_bindings.extend(provider_bindings)
+            if (not has_configure and
+                not dependencies and
+                not provider_bindings):
+                raise errors.EmptyBindingSpecError(binding_spec)
+        return explicit_bindings, required_bindings.get(), lazy_binding_specs
+
+    def expand_lazy(self, lazy_binding_spec):
+        """Imports and expands a lazy binding spec, as expand() does.
+
+        If that fails, then the binding specs it would have expanded are
+        left unexpanded, so that it can be tried again.
+        """
+        processed_binding_specs = set(self._processed_binding_specs)
+        try:
+            return self.expand([lazy_binding_spec.new_binding_spec()])
+        except Exception:
+            self._processed_binding_specs = processed_binding_specs
+            raise
+
+
+def _configure_binding_spec(binding_spec, binder, required_bindings,
+                            configure_method_name, dependencies_method_name):
+    """Calls a binding spec's configure and dependencies methods.
+
+    Returns:
+      a (whether the binding spec has a configure method, the binding specs
+      on which it depends or None) pair
+    """
+    all_kwargs = {'bind': binder.bind,
+                  'bind_many': binder.bind_many,
+                  'require': required_bindings.require}
+    has_configure = hasattr(binding_spec, configure_method_name)
+    if has_configure:
+        configure_method = getattr(binding_spec, configure_method_name)
+        configure_kwargs = _pare_to_present_args(all_kwargs, configure_method)
+        if not configure_kwargs:
+            raise errors.ConfigureMethodMissingArgsError(
+                configure_method, all_kwargs.keys())
+        try:
+            configure_method(**configure_kwargs)
+        except NotImplementedError:
+            has_configure = False
+    dependencies = None
+    if hasattr(binding_spec, dependencies_method_name):
+        dependencies_method = getattr(binding_spec, dependencies_method_name)
+        dependencies = dependencies_method()
+    return has_configure, dependencies
+
+
+class _PureBindingSpecConfiguration(object):
+    """What configuring a pure binding spec did, for replaying it."""
+
+    __slots__ = ('has_configure', 'bindings', 'required_bindings',
+                 'dependencies')
+
+    def __init__(self, has_configure, bindings, required_bindings,
+                 dependencies):
+        self.has_configure = has_configure
+        self.bindings = bindings
+        self.required_bindings = required_bindings
+        self.dependencies = dependencies
+
+
+# From pure BindingSpec subclass to a map from (configure method name,
+# dependencies method name) to its _PureBindingSpecConfiguration.
+_binding_spec_class_to_pure_configurations = weakref.WeakKeyDictionary()
+_pure_configurations_lock = threading.Lock()
+
+
+def _get_pure_binding_spec_configuration(
+        binding_spec, known_scope_ids, configure_method_name,
+        dependencies_method_name):
+    method_names = (configure_method_name, dependencies_method_name)
+    with _pure_configurations_lock:
+        configuration = _binding_spec_class_to_pure_configurations.get(
+            type(binding_spec), {}).get(method_names)
+    if configuration is None:
+        recorded_bindings = []
+        recorded_required_bindings = required_bindings_lib.RequiredBindings()
+        has_configure, dependencies = _configure_binding_spec(
+            binding_spec,
+            bindings.Binder(recorded_bindings, known_scope_ids),
+            recorded_required_bindings, configure_method_name,
+            dependencies_method_name)
+        if dependencies is not None:
+            dependencies = list(dependencies)
+        configuration = _PureBindingSpecConfiguration(
+            has_configure, recorded_bindings,
+            recorded_required_bindings.get(), dependencies)
+        with _pure_configurations_lock:
+            configuration = (
+                _binding_spec_class_to_pure_configurations.setdefault(
+                    type(binding_spec), {}).setdefault(
+                        method_names, configuration))
+    return configuration
+
+
 def _pare_to_present_args(kwargs, fn):
-    arg_names, _, _, _ = support.get_method_args(fn)
+    arg_names = support.get_arg_spec(fn).arg_names
     return {arg: value
             for arg, value in support.items(kwargs) if arg in arg_names}
 
@@ -203,3 +410,15 @@ class ObjectGraph(object):
                 raise e
             else:
                 raise
+
+    def get_plan_cache_stats(self):
+        """Returns the hit and miss counts of this graph's resolution plans.
+
+        The first time a class or provider function is provided, the
+        bindings and scopes of its injected args are looked up and cached in
+        a resolution plan, which later provides reuse.
+
+        Returns:
+          a PlanCacheStats, with hits, misses, and size attributes
+        """
+        return self._obj_provider.get_plan_cache_stats()
@@ -15,9 +15,12 @@ limitations under the License.
 
 
 from . import support
-from . import arg_binding_keys
 from . import decorators
 from . import errors
+from . import resolution_plans
+
+
+_NOT_PROVIDED = object()
 
 
 class ObjectProvider(object):
@@ -26,20 +29,51 @@ class ObjectProvider(object):
         self._binding_mapping = binding_mapping
         self._bindable_scopes = bindable_scopes
         self._allow_injecting_none = allow_injecting_none
+        self._plan_cache = resolution_plans.PlanCache()
+
+    def get_plan_cache_stats(self):
+        return self._plan_cache.get_stats()
 
     def provide_from_arg_binding_key(
             self, injection_site_fn, arg_binding_key, injection_context):
-        binding_key = arg_binding_key.binding_key
         binding = self._binding_mapping.get(
-            binding_key, injection_context.get_injection_site_desc())
-        scope = self._bindable_scopes.get_sub_scope(binding)
+            arg_binding_key.binding_key,
+            injection_context.get_injection_site_desc)
+        return self._provide_from_binding(
+            injection_site_fn, arg_binding_key, binding,
+            self._bindable_scopes.get_sub_scope(binding), injection_context)
+
+    def _provide_from_arg_resolution(
+            self, injection_site_fn, arg_resolution, injection_context):
+        binding = arg_resolution.binding
+        if binding is None:
+            return self.provide_from_arg_binding_key(
+                injection_site_fn, arg_resolution.arg_binding_key,
+                injection_context)
+        singleton_scope = arg_resolution.singleton_scope
+        if singleton_scope is not None:
+            # Fast path: an already provided singleton needs no child
+            # context, since it can't be part of a cycle.
+            provided = singleton_scope.get_if_provided(
+                arg_resolution.scope_key, _NOT_PROVIDED)
+            if (provided is not _NOT_PROVIDED and
+                    (provided is not None or self._allow_injecting_none)):
+                injection_context.verify_scope_usable(binding)
+                return provided
+        return self._provide_from_binding(
+            injection_site_fn, arg_resolution.arg_binding_key,
+            arg_resolution.binding, arg_resolution.scope, injection_context)
+
+    def _provide_from_binding(self, injection_site_fn, arg_binding_key,
+                              binding, scope, injection_context):
+        scope_key = binding.scope_key
         def Provide(*pargs, **kwargs):
             # TODO(kurts): probably capture back frame's file:line for
             # DirectlyPassingInjectedArgsError.
             child_injection_context = injection_context.get_child(
                 injection_site_fn, binding)
             provided = scope.provide(
-                binding_key,
+                scope_key,
                 lambda: binding.proviser_fn(child_injection_context, self,
                                             pargs, kwargs))
             if (provided is None) and not self._allow_injecting_none:
@@ -60,10 +94,10 @@ class ObjectProvider(object):
 
     def provide_class(self, cls, injection_context,
                       direct_init_pargs, direct_init_kwargs):
-        if support.is_constructor_defined(cls):
-            init_pargs, init_kwargs = self.get_injection_pargs_kwargs(
-                cls.__init__, injection_context,
-                direct_init_pargs, direct_init_kwargs)
+        plan = self._plan_cache.get(cls, lambda: self._compile_class_plan(cls))
+        if plan is not resolution_plans.NO_INITIALIZER_PLAN:
+            init_pargs, init_kwargs = self._get_planned_pargs_kwargs(
+                plan, injection_context, direct_init_pargs, direct_init_kwargs)
         else:
             init_pargs = direct_init_pargs
             init_kwargs = direct_init_kwargs
@@ -77,11 +111,17 @@ class ObjectProvider(object):
 
     def get_injection_pargs_kwargs(self, fn, injection_context,
                                    direct_pargs, direct_kwargs):
-        di_kwargs = arg_binding_keys.create_kwargs(
-            decorators.get_injectable_arg_binding_keys(
-                fn, direct_pargs, direct_kwargs),
-            lambda abk: self.provide_from_arg_binding_key(
-                fn, abk, injection_context))
+        return self._get_planned_pargs_kwargs(
+            self._get_fn_plan(fn), injection_context,
+            direct_pargs, direct_kwargs)
+
+    def _get_planned_pargs_kwargs(self, plan, injection_context,
+                                  direct_pargs, direct_kwargs):
+        fn = plan.injection_site_fn
+        di_kwargs = {
+            arg_resolution.arg_name: self._provide_from_arg_resolution(
+                fn, arg_resolution, injection_context)
+            for arg_resolution in plan.arg_resolutions}
         duplicated_args = set(di_kwargs.keys()) & set(direct_kwargs.keys())
         if duplicated_args:
             raise errors.DirectlyPassingInjectedArgsError(
@@ -90,3 +130,25 @@ class ObjectProvider(object):
         all_kwargs = dict(di_kwargs)
         all_kwargs.update(direct_kwargs)
         return direct_pargs, all_kwargs
+
+    def _get_fn_plan(self, fn):
+        return self._plan_cache.get(fn, lambda: self._compile_fn_plan(fn))
+
+    def _compile_class_plan(self, cls):
+        if support.is_constructor_defined(cls):
+            return self._get_fn_plan(cls.__init__)
+        return resolution_plans.NO_INITIALIZER_PLAN
+
+    def _compile_fn_plan(self, fn):
+        # The arg binding keys of fn don't depend on what's passed directly.
+        arg_resolutions = []
+        for arg_binding_key in decorators.get_injectable_arg_binding_keys(
+                fn, direct_pargs=[], direct_kwargs={}):
+            binding = self._binding_mapping.find(arg_binding_key.binding_key)
+            if binding is not None:
+                scope = self._bindable_scopes.get_sub_scope(binding)
+            else:
+                scope = None
+            arg_resolutions.append(resolution_plans.ArgResolution(
+                arg_binding_key, binding, scope))
+        return resolution_plans.ResolutionPlan(fn, arg_resolutions)
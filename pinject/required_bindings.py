@@ -20,6 +20,8 @@ from . import locations
 
 class RequiredBinding(object):
 
+    __slots__ = ('binding_key', 'require_loc')
+
     def __init__(self, binding_key, require_loc):
         self.binding_key = binding_key
         self.require_loc = require_loc
@@ -35,5 +37,8 @@ class RequiredBindings(object):
             binding_keys.new(arg_name, annotated_with),
             locations.get_back_frame_loc()))
 
+    def extend(self, required_bindings):
+        self._req_bindings.extend(required_bindings)
+
     def get(self):
         return self._req_bindings
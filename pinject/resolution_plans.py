@@ -0,0 +1,149 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import weakref
+
+from . import provider_indirections
+from . import scoping
+
+
+class ArgResolution(object):
+    """How to provide one injected arg of a function.
+
+    Attributes:
+      arg_name: the name of the injected arg
+      arg_binding_key: the ArgBindingKey for the arg
+      binding: the Binding for the arg, or None if no single binding exists
+          (in which case looking the binding up again raises the right error)
+      scope: the Scope of binding, or None if binding is None
+      scope_key: the key under which scope caches what binding provides, or
+          None if binding is None
+      provider_indirection: the provider indirection of arg_binding_key
+      singleton_scope: scope, if it's a SingletonScope and the arg is
+          injected without provider indirection (so that an already provided
+          instance can be injected as is), else None
+    """
+
+    def __init__(self, arg_binding_key, binding, scope):
+        self.arg_name = arg_binding_key._arg_name
+        self.arg_binding_key = arg_binding_key
+        self.binding = binding
+        self.scope = scope
+        self.scope_key = binding.scope_key if binding is not None else None
+        self.provider_indirection = arg_binding_key.provider_indirection
+        if (isinstance(scope, scoping.SingletonScope) and
+                self.provider_indirection is
+                provider_indirections.NO_INDIRECTION):
+            self.singleton_scope = scope
+        else:
+            self.singleton_scope = None
+
+
+class ResolutionPlan(object):
+    """The resolutions of all injected args of a function.
+
+    The plan of whatever a binding provides is itself cached (and compiled on
+    first use) under the binding's target, so plans form a tree whose
+    children are found by walking from each ArgResolution's binding.
+
+    The plan refers to its function only weakly: it's cached under the
+    function (or its class), and an initializer using super() refers to its
+    class, so a strong reference would keep the cache's key alive.
+
+    Attributes:
+      arg_resolutions: a tuple of ArgResolution, in injection order
+    """
+
+    def __init__(self, injection_site_fn, arg_resolutions):
+        """Initializer.
+
+        Args:
+          injection_site_fn: the function being injected into, or None if the
+              plan is for a class without its own initializer
+          arg_resolutions: the ArgResolutions, in injection order
+        """
+        if injection_site_fn is None:
+            self._injection_site_fn_ref = None
+        else:
+            try:
+                self._injection_site_fn_ref = weakref.ref(injection_site_fn)
+            except TypeError:
+                # Such functions are never cached under, so keeping them alive
+                # is harmless.
+                self._injection_site_fn_ref = lambda: injection_site_fn
+        self.arg_resolutions = tuple(arg_resolutions)
+
+    @property
+    def injection_site_fn(self):
+        """The function being injected into, or None if there's none."""
+        if self._injection_site_fn_ref is None:
+            return None
+        return self._injection_site_fn_ref()
+
+
+NO_INITIALIZER_PLAN = ResolutionPlan(None, [])
+
+
+class PlanCacheStats(object):
+    """A snapshot of a PlanCache's counters."""
+
+    def __init__(self, hits, misses, size):
+        self.hits = hits
+        self.misses = misses
+        self.size = size
+
+    def __repr__(self):
+        return '<PlanCacheStats hits={0} misses={1} size={2}>'.format(
+            self.hits, self.misses, self.size)
+
+
+class PlanCache(object):
+    """A cache of ResolutionPlans, weakly keyed by class or function.
+
+    Classes and functions created at runtime are not kept alive by the
+    cache.  Keys that can't be weakly referenced are compiled every time.
+    """
+
+    def __init__(self):
+        self._key_to_plan = weakref.WeakKeyDictionary()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key, compile_plan_fn):
+        """Returns the plan for key, compiling it if needed.
+
+        Args:
+          key: the class or function being planned for
+          compile_plan_fn: a function taking no args and returning a new
+              ResolutionPlan for key
+        Returns:
+          a ResolutionPlan
+        """
+        try:
+            plan = self._key_to_plan.get(key)
+        except TypeError:
+            self._misses += 1
+            return compile_plan_fn()
+        if plan is not None:
+            self._hits += 1
+            return plan
+        self._misses += 1
+        plan = compile_plan_fn()
+        self._key_to_plan[key] = plan
+        return plan
+
+    def get_stats(self):
+        return PlanCacheStats(self._hits, self._misses, len(self._key_to_plan))
@@ -51,19 +51,83 @@ class SingletonScope(object):
 
     def __init__(self):
         self._binding_key_to_instance = {}
-        self._providing_binding_keys = set()
-        # The lock is re-entrant so that default_provider_fn can provide
-        # something else in singleton scope.
-        self._rlock = threading.RLock()
+        self._binding_key_to_flight = {}
+        self._thread_to_awaited = {}
+        # The lock guards the maps above, and is never held while calling a
+        # default_provider_fn, so unrelated singletons are constructed in
+        # parallel.
+        self._lock = threading.Lock()
+
+    def get_if_provided(self, binding_key, default=None):
+        """Returns the instance already provided for binding_key, or default."""
+        return self._binding_key_to_instance.get(binding_key, default)
 
     def provide(self, binding_key, default_provider_fn):
-        with self._rlock:
+        # Reading an already provided instance needs no lock; the lock is
+        # only taken (and the instance looked up again) on a miss.
+        try:
+            return self._binding_key_to_instance[binding_key]
+        except KeyError:
+            pass
+        thread = threading.current_thread()
+        while True:
+            with self._lock:
+                try:
+                    return self._binding_key_to_instance[binding_key]
+                except KeyError:
+                    pass
+                flight = self._binding_key_to_flight.get(binding_key)
+                if flight is None:
+                    flight = _SingletonFlight(thread)
+                    self._binding_key_to_flight[binding_key] = flight
+                    is_constructing = True
+                else:
+                    self._verify_not_deadlocked(thread, binding_key, flight)
+                    self._thread_to_awaited[thread] = (binding_key, flight)
+                    is_constructing = False
+            if is_constructing:
+                return self._construct(binding_key, default_provider_fn,
+                                       flight)
             try:
-                return self._binding_key_to_instance[binding_key]
-            except KeyError:
-                instance = default_provider_fn()
-                self._binding_key_to_instance[binding_key] = instance
-                return instance
+                flight.done.wait()
+            finally:
+                with self._lock:
+                    del self._thread_to_awaited[thread]
+            # Either the instance now exists, or constructing it failed in
+            # the other thread and this thread gets to try.
+
+    def _construct(self, binding_key, default_provider_fn, flight):
+        is_constructed = False
+        try:
+            instance = default_provider_fn()
+            is_constructed = True
+        finally:
+            with self._lock:
+                if is_constructed:
+                    self._binding_key_to_instance[binding_key] = instance
+                del self._binding_key_to_flight[binding_key]
+            flight.done.set()
+        return instance
+
+    def _verify_not_deadlocked(self, thread, binding_key, flight):
+        awaited_binding_keys = [binding_key]
+        owner = flight.owner
+        while owner is not thread:
+            awaited = self._thread_to_awaited.get(owner)
+            if awaited is None:
+                return
+            owner_binding_key, owner_flight = awaited
+            awaited_binding_keys.append(owner_binding_key)
+            owner = owner_flight.owner
+        raise errors.SingletonDeadlockError(awaited_binding_keys)
+
+
+class _SingletonFlight(object):
+    """A singleton's in-progress construction, by its owner thread."""
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.done = threading.Event()
 
 
 class _UnscopedScopeId(object):
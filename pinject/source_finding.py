@@ -0,0 +1,181 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import ast
+import os
+import sys
+import threading
+
+from . import finding
+from . import lazy_classes
+from . import support
+
+_PINJECT_DECORATOR_NAMES = frozenset(
+    ['annotate_arg', 'inject', 'injectable', 'provides'])
+
+# From (source file path, modification time, size, module name) to the
+# LazyClasses found in that source file.
+_file_key_to_lazy_classes = {}
+_file_key_to_lazy_classes_lock = threading.Lock()
+
+
+def find_lazy_classes(packages, exclude_modules=None, num_processes=1):
+    """Finds classes by parsing source files, without importing them.
+
+    Args:
+      packages: a sequence of the names of packages (or modules), found on
+          sys.path, whose source files to parse, including subpackages
+      exclude_modules: a sequence of module name patterns (see
+          finding.find_classes()) of modules not to parse, or None
+      num_processes: the number of processes in which to parse source files
+          not parsed before; if 1, then source files are parsed in this
+          process
+    Returns:
+      a list of LazyClass, for the top-level classes defined in the source
+    """
+    if exclude_modules:
+        is_excluded_fn = finding.get_module_name_matches_fn(exclude_modules)
+    else:
+        is_excluded_fn = lambda _: None
+    file_keys = []
+    for package in packages:
+        for module_name, file_path in _get_module_names_and_files(package):
+            if is_excluded_fn(module_name):
+                continue
+            try:
+                stat = os.stat(file_path)
+            except (IOError, OSError):
+                continue
+            file_keys.append(
+                (file_path, stat.st_mtime, stat.st_size, module_name))
+
+    with _file_key_to_lazy_classes_lock:
+        unparsed_file_keys = [x for x in file_keys
+                              if x not in _file_key_to_lazy_classes]
+    if unparsed_file_keys:
+        file_paths = [file_path for file_path, _, _, _ in unparsed_file_keys]
+        if num_processes > 1 and len(file_paths) > 1:
+            # Imported here, since most graphs never need a process pool.
+            from concurrent import futures
+            with futures.ProcessPoolExecutor(num_processes) as executor:
+                all_class_infos = list(executor.map(
+                    _parse_source_file, file_paths,
+                    chunksize=max(1, len(file_paths) // (num_processes * 4))))
+        else:
+            all_class_infos = [_parse_source_file(x) for x in file_paths]
+        with _file_key_to_lazy_classes_lock:
+            for file_key, class_infos in zip(unparsed_file_keys,
+                                             all_class_infos):
+                file_path, _, _, module_name = file_key
+                _file_key_to_lazy_classes[file_key] = [
+                    lazy_classes.LazyClass(
+                        module_name, class_name,
+                        '{0}:{1}'.format(file_path, line),
+                        is_explicitly_injectable, init_arg_names)
+                    for (class_name, line, is_explicitly_injectable,
+                         init_arg_names) in class_infos]
+
+    with _file_key_to_lazy_classes_lock:
+        return [lazy_class for file_key in file_keys
+                for lazy_class in _file_key_to_lazy_classes[file_key]]
+
+
+def _get_module_names_and_files(package):
+    """Yields the module names and source files of a package on sys.path."""
+    relative_path = os.path.join(*package.split('.'))
+    for sys_path_entry in sys.path:
+        if not support.is_string(sys_path_entry):
+            continue
+        package_dir = os.path.join(sys_path_entry or os.curdir, relative_path)
+        if os.path.isfile(os.path.join(package_dir, '__init__.py')):
+            for dir_path, dir_names, file_names in os.walk(package_dir):
+                # Only regular packages' submodules are importable by name.
+                dir_names[:] = sorted(
+                    x for x in dir_names
+                    if os.path.isfile(os.path.join(dir_path, x, '__init__.py')))
+                relative_dir_path = os.path.relpath(dir_path, package_dir)
+                if relative_dir_path == os.curdir:
+                    dir_package = package
+                else:
+                    dir_package = '.'.join(
+                        [package] + relative_dir_path.split(os.sep))
+                for file_name in sorted(file_names):
+                    if not file_name.endswith('.py'):
+                        continue
+                    if file_name == '__init__.py':
+                        module_name = dir_package
+                    else:
+                        module_name = '{0}.{1}'.format(
+                            dir_package, file_name[:-len('.py')])
+                    yield module_name, os.path.join(dir_path, file_name)
+            return
+        if os.path.isfile(package_dir + '.py'):
+            yield package, package_dir + '.py'
+            return
+
+
+def _parse_source_file(file_path):
+    """Returns class infos for each top-level class in a source file.
+
+    Each class info is (class name, line, is explicitly injectable, initializer
+    arg names), where the initializer arg names are None unless the class
+    defines __init__ itself.  This runs in worker processes, so it takes and returns only picklable
+    things.
+    """
+    try:
+        with open(file_path, 'rb') as source_file:
+            tree = ast.parse(source_file.read(), file_path)
+    except (IOError, OSError, SyntaxError, ValueError):
+        return []
+    class_infos = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        is_explicitly_injectable = False
+        init_arg_names = None
+        for class_node in node.body:
+            if (isinstance(class_node, ast.FunctionDef) and
+                    class_node.name == '__init__'):
+                is_explicitly_injectable = any(
+                    _get_decorator_name(x) in _PINJECT_DECORATOR_NAMES
+                    for x in class_node.decorator_list)
+                init_arg_names = _get_init_arg_names(class_node)
+        class_infos.append((node.name, node.lineno, is_explicitly_injectable,
+                            init_arg_names))
+    return class_infos
+
+
+def _get_init_arg_names(init_node):
+    """Returns the names of an __init__'s positional args, minus self."""
+    arg_nodes = (list(getattr(init_node.args, 'posonlyargs', [])) +
+                 list(init_node.args.args))
+    is_static = any(_get_decorator_name(x) == 'staticmethod'
+                    for x in init_node.decorator_list)
+    if not is_static:
+        arg_nodes = arg_nodes[1:]
+    # Python 2's ast has Name nodes for args, and Python 3's has arg nodes.
+    return tuple(getattr(x, 'arg', None) or getattr(x, 'id', None)
+                 for x in arg_nodes)
+
+
+def _get_decorator_name(decorator_node):
+    if isinstance(decorator_node, ast.Call):
+        decorator_node = decorator_node.func
+    if isinstance(decorator_node, ast.Attribute):
+        return decorator_node.attr
+    if isinstance(decorator_node, ast.Name):
+        return decorator_node.id
+    return None
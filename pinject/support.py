@@ -14,8 +14,10 @@ limitations under the License.
 """
 
 
+import collections
 import six
 import inspect
+import weakref
 
 from . import errors
 
@@ -31,6 +33,10 @@ def items(dict_instance):
     return six.iteritems(dict_instance)
 
 
+def is_mapping(arg_value):
+    return isinstance(arg_value, collections_abc.Mapping)
+
+
 def is_sequence(arg_value):
     return isinstance(arg_value, collections_abc.Sequence)
 
@@ -45,12 +51,101 @@ def is_constructor_defined(cls):
     return inspect.ismethod(cls.__init__)
 
 
+if six.PY3:
+    _getargspec = inspect.getfullargspec
+else:
+    _getargspec = inspect.getargspec
+
+
+class ArgSpec(collections.namedtuple(
+        'ArgSpec', ['arg_names', 'varargs', 'varkw', 'defaults',
+                    'required_arg_names', 'code', 'wrapped_id_and_ref'])):
+    """The introspected args of a function.
+
+    Attributes:
+      arg_names: a tuple of the names of the named args
+      varargs: the name of the *pargs arg, or None
+      varkw: the name of the **kwargs arg, or None
+      defaults: a tuple of the default values of the last named args, or None
+      required_arg_names: a tuple of the named args without defaults, minus
+          a leading "self"
+      code: the __code__ of the function when it was introspected, or None
+      wrapped_id_and_ref: the id() of the __wrapped__ of the function when
+          it was introspected (or of None), and a weakref to it (or None, if
+          it can't be weakly referenced); the __wrapped__ itself isn't kept,
+          since it may refer to a class that the cache mustn't keep alive
+    """
+    __slots__ = ()
+
+
+_fn_to_arg_spec = weakref.WeakKeyDictionary()
+
+
+def get_arg_spec(fn):
+    """Returns the (cached) ArgSpec of a function.
+
+    The cache is keyed by the underlying function of fn, so bound methods
+    share the ArgSpec of their function.  A cached ArgSpec is recomputed if
+    the function's __code__ or __wrapped__ has been replaced since.
+
+    Args:
+      fn: a function or method
+    Returns:
+      an ArgSpec
+    Raises:
+      TypeError: fn is not introspectable
+    """
+    key = getattr(fn, '__func__', fn)
+    code = getattr(key, '__code__', None)
+    wrapped = getattr(key, '__wrapped__', None)
+    try:
+        arg_spec = _fn_to_arg_spec.get(key)
+    except TypeError:
+        return _new_arg_spec(fn, code, wrapped)
+    if (arg_spec is None or arg_spec.code is not code or
+            not _is_same_wrapped(arg_spec, wrapped)):
+        arg_spec = _new_arg_spec(fn, code, wrapped)
+        _fn_to_arg_spec[key] = arg_spec
+    return arg_spec
+
+
+def _new_arg_spec(fn, code, wrapped):
+    spec = _getargspec(fn)
+    arg_names = tuple(spec[0])
+    defaults = spec[3]
+    if defaults:
+        required_arg_names = arg_names[:-len(defaults)]
+    else:
+        required_arg_names = arg_names
+    # TODO(kurts): this feels icky.  Is there no way around this, because
+    # cls.__init__() takes self but instance.__init__() doesn't, and python is
+    # awkward here?
+    if required_arg_names and required_arg_names[0] == 'self':
+        required_arg_names = required_arg_names[1:]
+    return ArgSpec(arg_names, spec[1], spec[2], defaults,
+                   required_arg_names, code, _get_id_and_ref(wrapped))
+
+
+def _get_id_and_ref(wrapped):
+    if wrapped is None:
+        return id(None), None
+    try:
+        return id(wrapped), weakref.ref(wrapped)
+    except TypeError:
+        return id(wrapped), None
+
+
+def _is_same_wrapped(arg_spec, wrapped):
+    wrapped_id, wrapped_ref = arg_spec.wrapped_id_and_ref
+    if wrapped_id != id(wrapped):
+        return False
+    return wrapped_ref is None or wrapped_ref() is wrapped
+
+
 def get_method_args(fn):
-    if six.PY3:
-        spec = inspect.getfullargspec(fn)
-        return spec.args, spec.varargs, spec.varkw, spec.defaults
-    arg_names, varargs, keywords, defaults = inspect.getargspec(fn)
-    return arg_names, varargs, keywords, defaults
+    arg_spec = get_arg_spec(fn)
+    return (list(arg_spec.arg_names), arg_spec.varargs, arg_spec.varkw,
+            arg_spec.defaults)
 
 
 def verify_callable(fn, arg_name):
@@ -77,10 +172,28 @@ def verify_module_types(modules, arg_name):
     _verify_types(inspect.ismodule, modules, arg_name, 'module')
 
 
+def verify_module_or_pattern_types(modules, arg_name):
+    _verify_types(lambda x: inspect.ismodule(x) or is_string(x), modules,
+                  arg_name, 'module or module name pattern')
+
+
+def verify_pattern_types(patterns, arg_name):
+    _verify_types(is_string, patterns, arg_name, 'module name pattern')
+
+
+def verify_package_name_types(package_names, arg_name):
+    _verify_types(is_string, package_names, arg_name, 'package name')
+
+
 def verify_class_types(seq, arg_name):
     _verify_types(inspect.isclass, seq, arg_name, 'class')
 
 
+def verify_class_or_import_path_types(seq, arg_name):
+    _verify_types(lambda x: inspect.isclass(x) or is_string(x), seq, arg_name,
+                  'class or import path')
+
+
 def verify_class_type(elt, arg_name):
     _verify_type(inspect.isclass, elt, arg_name, 'class')
 
@@ -0,0 +1,380 @@
+#!/usr/bin/python
+
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import gc
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+from pinject import bindings
+from pinject import decorators
+from pinject import finding
+from pinject import object_graph
+from pinject import scoping
+from pinject import source_finding
+
+
+def benchmark_bytes_per_implicit_binding(num_classes=20000):
+    classes = [type('Class{0}'.format(i), (object,), {})
+               for i in range(num_classes)]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        implicit_bindings = bindings.get_implicit_class_bindings(classes)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return '{0:.0f} bytes per implicit binding'.format(
+        float(after - before) / len(implicit_bindings))
+
+
+def _get_decorated_module_source(num_classes):
+    class_source = '''
+class Class{0}(object):
+    @pinject.annotate_arg('foo', 'an-annotation')
+    @pinject.inject(['foo', 'bar'])
+    def __init__(self, foo, bar, baz=None):
+        pass
+'''
+    return 'import pinject\n' + ''.join(
+        class_source.format(i) for i in range(num_classes))
+
+
+def _time_import(code, num_times=5):
+    best_secs = None
+    for _ in range(num_times):
+        module = types.ModuleType('decorated_module')
+        start = time.perf_counter()
+        exec(code, module.__dict__)
+        secs = time.perf_counter() - start
+        # Outside the timing, so that the next run starts with nothing
+        # deferred.
+        decorators.validate_pending_decorations()
+        if best_secs is None or secs < best_secs:
+            best_secs = secs
+    return best_secs
+
+
+def benchmark_decorated_module_import_time(num_classes=2000):
+    code = compile(_get_decorated_module_source(num_classes),
+                   'decorated_module.py', 'exec')
+    results = []
+    for wrap_fns, validate_eagerly in [(True, True), (True, False),
+                                       (False, True), (False, False)]:
+        decorators.set_decorators_wrap_fns(wrap_fns)
+        decorators.set_decorators_validate_eagerly(validate_eagerly)
+        try:
+            secs = _time_import(code)
+        finally:
+            decorators.set_decorators_wrap_fns(True)
+            decorators.set_decorators_validate_eagerly(True)
+        results.append('wrap_fns={0} validate_eagerly={1}: {2:.1f} ms'.format(
+            wrap_fns, validate_eagerly, secs * 1000))
+    return '{0} decorated classes\n  {1}'.format(
+        num_classes, '\n  '.join(results))
+
+
+def benchmark_class_bindings(num_classes=500):
+    classes = [type('Class{0}'.format(i), (object,), {})
+               for i in range(num_classes)]
+    arg_names = ['foo{0}'.format(i) for i in range(num_classes)]
+    class SomeBindingSpec(bindings.BindingSpec):
+        def configure(self, bind):
+            for arg_name, cls in zip(arg_names, classes):
+                bind(arg_name, to_class=cls, in_scope=scoping.PROTOTYPE)
+    namespace = {}
+    exec('def __init__(self, {0}):\n    pass\n'.format(', '.join(arg_names)),
+         namespace)
+    Consumer = type('Consumer', (object,), {'__init__': namespace['__init__']})
+    best_build_secs = best_provide_secs = None
+    for _ in range(5):
+        start = time.perf_counter()
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[Consumer],
+            binding_specs=[SomeBindingSpec()])
+        build_secs = time.perf_counter() - start
+        obj_graph.provide(Consumer)
+        start = time.perf_counter()
+        for _ in range(10):
+            obj_graph.provide(Consumer)
+        provide_secs = (time.perf_counter() - start) / 10
+        best_build_secs = min(best_build_secs or build_secs, build_secs)
+        best_provide_secs = min(best_provide_secs or provide_secs,
+                                provide_secs)
+    return ('{0} class bindings: {1:.1f} ms to build graph, {2:.2f} ms to'
+            ' provide all'.format(num_classes, best_build_secs * 1000,
+                                  best_provide_secs * 1000))
+
+
+def benchmark_instance_bindings(num_bindings=2000):
+    config = {'config{0}'.format(i): i for i in range(num_bindings)}
+    class BindBindingSpec(bindings.BindingSpec):
+        def configure(self, bind):
+            for arg_name, value in config.items():
+                bind(arg_name, to_instance=value)
+    class BindManyBindingSpec(bindings.BindingSpec):
+        def configure(self, bind_many):
+            bind_many(to_instances=config)
+    results = []
+    for binding_spec in [BindBindingSpec(), BindManyBindingSpec()]:
+        best_secs = None
+        for _ in range(5):
+            start = time.perf_counter()
+            object_graph.new_object_graph(
+                modules=None, binding_specs=[binding_spec])
+            secs = time.perf_counter() - start
+            best_secs = min(best_secs or secs, secs)
+        results.append('{0}: {1:.1f} ms'.format(
+            type(binding_spec).__name__, best_secs * 1000))
+    return '{0} instance bindings\n  {1}'.format(
+        num_bindings, '\n  '.join(results))
+
+
+def _new_binding_spec_hierarchy(num_binding_specs):
+    binding_spec_classes = []
+    for idx in range(num_binding_specs):
+        def configure(self, bind, idx=idx):
+            bind('foo{0}'.format(idx), to_instance=idx)
+        def dependencies(self, deps=list(binding_spec_classes)):
+            return [binding_spec_class() for binding_spec_class in deps[-3:]]
+        def provide_bar(self, idx=idx):
+            return idx
+        provide_bar.__name__ = 'provide_bar{0}'.format(idx)
+        binding_spec_classes.append(type(
+            'BindingSpec{0}'.format(idx), (bindings.BindingSpec,),
+            {'is_pure': True, 'configure': configure,
+             'dependencies': dependencies,
+             provide_bar.__name__: provide_bar}))
+    return binding_spec_classes[-1]
+
+
+def benchmark_graphs_from_same_binding_specs(num_binding_specs=100,
+                                             num_graphs=100):
+    top_binding_spec_class = _new_binding_spec_hierarchy(num_binding_specs)
+    results = []
+    for cache_binding_specs in [False, True]:
+        start = time.perf_counter()
+        for _ in range(num_graphs):
+            object_graph.new_object_graph(
+                modules=None, binding_specs=[top_binding_spec_class()],
+                cache_binding_specs=cache_binding_specs)
+        results.append('cache_binding_specs={0}: {1:.2f} ms per graph'.format(
+            cache_binding_specs,
+            (time.perf_counter() - start) * 1000 / num_graphs))
+    return '{0} binding specs\n  {1}'.format(
+        num_binding_specs, '\n  '.join(results))
+
+
+def benchmark_graph_with_class_import_path_binding(num_modules=200):
+    temp_dir = tempfile.mkdtemp()
+    sys.path.insert(0, temp_dir)
+    try:
+        _write_source_package(os.path.join(temp_dir, 'benchmarkheavy'),
+                              num_modules, num_classes=20)
+        with open(os.path.join(temp_dir, 'benchmarkheavy', 'client.py'),
+                  'w') as client_file:
+            for module_idx in range(num_modules):
+                client_file.write('from . import mod{0}\n'.format(module_idx))
+            client_file.write('class Client(object):\n'
+                              '    pass\n')
+        def get_client_class():
+            return importlib.import_module('benchmarkheavy.client').Client
+        results = []
+        for desc, get_to_class_fn in [
+                ('class', get_client_class),
+                ('import path', lambda: 'benchmarkheavy.client:Client')]:
+            for module_name in list(sys.modules):
+                if module_name.split('.')[0] == 'benchmarkheavy':
+                    del sys.modules[module_name]
+            class SomeBindingSpec(bindings.BindingSpec):
+                def configure(self, bind):
+                    bind('client', to_class=get_to_class_fn())
+            start = time.perf_counter()
+            object_graph.new_object_graph(
+                modules=None, binding_specs=[SomeBindingSpec()])
+            results.append('{0}: {1:.1f} ms to create'.format(
+                desc, (time.perf_counter() - start) * 1000))
+    finally:
+        sys.path.remove(temp_dir)
+        shutil.rmtree(temp_dir)
+    return 'class importing {0} modules\n  {1}'.format(
+        num_modules, '\n  '.join(results))
+
+
+def benchmark_graph_with_lazy_binding_spec(num_modules=200):
+    temp_dir = tempfile.mkdtemp()
+    sys.path.insert(0, temp_dir)
+    try:
+        _write_source_package(os.path.join(temp_dir, 'benchmarkspecs'),
+                              num_modules, num_classes=20)
+        with open(os.path.join(temp_dir, 'benchmarkspecs', 'specs.py'),
+                  'w') as specs_file:
+            for module_idx in range(num_modules):
+                specs_file.write('from . import mod{0}\n'.format(module_idx))
+            specs_file.write(
+                'import pinject\n'
+                'class SubsystemBindingSpec(pinject.BindingSpec):\n'
+                '    def configure(self, bind):\n'
+                '        bind("subsystem", to_instance="a-subsystem")\n')
+        def new_eager_binding_spec():
+            return importlib.import_module(
+                'benchmarkspecs.specs').SubsystemBindingSpec()
+        def new_lazy_binding_spec():
+            return bindings.LazyBindingSpec(
+                'benchmarkspecs.specs:SubsystemBindingSpec', ['subsystem'])
+        results = []
+        for desc, new_binding_spec_fn in [('eager', new_eager_binding_spec),
+                                          ('lazy', new_lazy_binding_spec)]:
+            for module_name in list(sys.modules):
+                if module_name.split('.')[0] == 'benchmarkspecs':
+                    del sys.modules[module_name]
+            start = time.perf_counter()
+            object_graph.new_object_graph(
+                modules=None, binding_specs=[new_binding_spec_fn()])
+            results.append('{0}: {1:.1f} ms to create'.format(
+                desc, (time.perf_counter() - start) * 1000))
+    finally:
+        sys.path.remove(temp_dir)
+        shutil.rmtree(temp_dir)
+    return 'binding spec importing {0} modules\n  {1}'.format(
+        num_modules, '\n  '.join(results))
+
+
+def benchmark_find_classes_in_all_imported_modules(num_times=5):
+    secs = []
+    for _ in range(num_times):
+        start = time.perf_counter()
+        finding.find_classes(finding.ALL_IMPORTED_MODULES, classes=None)
+        secs.append(time.perf_counter() - start)
+    return '{0} modules: {1:.1f} ms first, {2:.1f} ms after'.format(
+        len(sys.modules), secs[0] * 1000, min(secs[1:]) * 1000)
+
+
+def benchmark_first_find_classes_with_class_index(num_times=5):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        class_index_path = os.path.join(temp_dir, 'class-index.json')
+        results = []
+        for desc, path in [('without index', None),
+                           ('with index', class_index_path)]:
+            best_secs = None
+            for _ in range(num_times):
+                # Start each time as if in a new process.
+                finding._module_to_dict_len_and_classes.clear()
+                finding._path_to_class_index.clear()
+                start = time.perf_counter()
+                finding.find_classes(finding.ALL_IMPORTED_MODULES,
+                                     classes=None, class_index_path=path)
+                secs = time.perf_counter() - start
+                best_secs = min(best_secs or secs, secs)
+            results.append('{0}: {1:.1f} ms'.format(desc, best_secs * 1000))
+    finally:
+        shutil.rmtree(temp_dir)
+    return '{0} modules\n  {1}'.format(len(sys.modules), '\n  '.join(results))
+
+
+def benchmark_graph_over_all_imported_modules(num_times=5):
+    secs = []
+    for _ in range(num_times):
+        start = time.perf_counter()
+        obj_graph = object_graph.new_object_graph()
+        secs.append(time.perf_counter() - start)
+    class NeedsSingletonScope(object):
+        def __init__(self, singleton_scope):
+            pass
+    start = time.perf_counter()
+    obj_graph.provide(NeedsSingletonScope)
+    first_provide_secs = time.perf_counter() - start
+    return ('{0} modules: {1:.1f} ms to create, {2:.1f} ms to first'
+            ' provide'.format(len(sys.modules), min(secs) * 1000,
+                              first_provide_secs * 1000))
+
+
+def benchmark_explicit_only_graph_over_all_imported_modules(num_times=5):
+    gc.collect()  # Drop the classes decorated by other benchmarks.
+    best_secs = None
+    for _ in range(num_times):
+        finding._module_to_dict_len_and_classes.clear()
+        start = time.perf_counter()
+        object_graph.new_object_graph(only_use_explicit_bindings=True)
+        secs = time.perf_counter() - start
+        best_secs = min(best_secs or secs, secs)
+    return '{0} modules, {1} decorated initializers: {2:.2f} ms'.format(
+        len(sys.modules), len(decorators.get_decorated_init_fns()),
+        best_secs * 1000)
+
+
+def _write_source_package(package_dir, num_modules, num_classes):
+    os.mkdir(package_dir)
+    with open(os.path.join(package_dir, '__init__.py'), 'w') as init_file:
+        init_file.write('')
+    for module_idx in range(num_modules):
+        module_path = os.path.join(package_dir, 'mod{0}.py'.format(module_idx))
+        with open(module_path, 'w') as module_file:
+            for class_idx in range(num_classes):
+                module_file.write(
+                    'class Class{0}x{1}(object):\n'
+                    '    def __init__(self):\n'
+                    '        pass\n'.format(module_idx, class_idx))
+
+
+def benchmark_graph_over_unimported_package(num_modules=200, num_classes=50):
+    temp_dir = tempfile.mkdtemp()
+    sys.path.insert(0, temp_dir)
+    try:
+        _write_source_package(os.path.join(temp_dir, 'benchmarkapp'),
+                              num_modules, num_classes)
+        def import_and_search():
+            for module_idx in range(num_modules):
+                importlib.import_module('benchmarkapp.mod{0}'.format(module_idx))
+            object_graph.new_object_graph(modules=['benchmarkapp'])
+        def parse(num_processes):
+            # Start as if in a new process.
+            source_finding._file_key_to_lazy_classes.clear()
+            object_graph.new_object_graph(
+                modules=None, source_packages=['benchmarkapp'],
+                num_source_processes=num_processes)
+        results = []
+        for desc, fn in [('importing', import_and_search),
+                         ('parsing', lambda: parse(1)),
+                         ('parsing in 4 processes', lambda: parse(4))]:
+            for module_name in list(sys.modules):
+                if module_name.split('.')[0] == 'benchmarkapp':
+                    del sys.modules[module_name]
+            start = time.perf_counter()
+            fn()
+            results.append('{0}: {1:.1f} ms'.format(
+                desc, (time.perf_counter() - start) * 1000))
+    finally:
+        sys.path.remove(temp_dir)
+        shutil.rmtree(temp_dir)
+    return '{0} modules of {1} classes\n  {2}'.format(
+        num_modules, num_classes, '\n  '.join(results))
+
+
+all_benchmarks = sorted(
+    (name, value) for name, value in vars(sys.modules[__name__]).items()
+    if name.startswith('benchmark_'))
+for name, benchmark in all_benchmarks:
+    print('{0}: {1}'.format(name, benchmark()))
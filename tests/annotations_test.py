@@ -40,6 +40,15 @@ class AnnotationTest(unittest.TestCase):
                             hash(annotations.Annotation('bar')))
 
 
+class NewAnnotationTest(unittest.TestCase):
+
+    def test_interns_equal_annotations(self):
+        self.assertIs(annotations.new('foo'), annotations.new('foo'))
+
+    def test_new_annotation_equals_constructed_annotation(self):
+        self.assertEqual(annotations.Annotation('foo'), annotations.new('foo'))
+
+
 class NoAnnotationTest(unittest.TestCase):
 
     def test_as_correct_adjective(self):
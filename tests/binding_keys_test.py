@@ -42,6 +42,11 @@ class BindingKeyTest(unittest.TestCase):
         self.assertEqual('annotated with "an-annotation"',
                          binding_key.annotation_as_adjective())
 
+    def test_arg_name(self):
+        binding_key = binding_keys.BindingKey(
+            'an-arg-name', annotations.Annotation('an-annotation'))
+        self.assertEqual('an-arg-name', binding_key.arg_name)
+
     def test_equal_if_same_arg_name_and_annotation(self):
         binding_key_one = binding_keys.BindingKey(
             'an-arg-name', annotations.Annotation('an-annotation'))
@@ -82,3 +87,13 @@ class NewBindingKeyTest(unittest.TestCase):
         self.assertEqual(
             'the binding name "an-arg-name" (annotated with "an-annotation")',
             str(binding_key))
+
+    def test_interns_equal_binding_keys(self):
+        self.assertIs(binding_keys.new('an-arg-name', 'an-annotation'),
+                      binding_keys.new('an-arg-name', 'an-annotation'))
+        self.assertIs(binding_keys.new('an-arg-name'),
+                      binding_keys.new('an-arg-name'))
+
+    def test_does_not_intern_different_binding_keys(self):
+        self.assertIsNot(binding_keys.new('an-arg-name', 'an-annotation'),
+                         binding_keys.new('an-arg-name'))
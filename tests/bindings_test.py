@@ -17,6 +17,8 @@ limitations under the License.
 import threading
 import unittest
 
+import mock
+
 from pinject import bindings as bindings_lib
 from pinject import binding_keys
 from pinject import decorators
@@ -38,7 +40,46 @@ def new_in_default_scope(binding_key):
     """
     return bindings_lib.new_binding_to_instance(
         binding_key, 'unused', scoping.DEFAULT_SCOPE,
-        get_binding_loc_fn=lambda: 'unknown')
+        binding_loc='unknown')
+
+
+class BindingTest(unittest.TestCase):
+
+    def test_has_no_instance_dict(self):
+        class SomeClass(object):
+            pass
+        for binding in [
+                bindings_lib.new_binding_to_class(
+                    binding_keys.new('foo'), SomeClass, 'a-scope', 'a-loc'),
+                bindings_lib.new_binding_to_instance(
+                    binding_keys.new('foo'), 'an-instance', 'a-scope',
+                    'a-loc')]:
+            self.assertFalse(hasattr(binding, '__dict__'))
+
+    def test_str_includes_given_loc(self):
+        binding = bindings_lib.new_binding_to_instance(
+            binding_keys.new('foo'), 'an-instance', 'a-scope', 'a-file:42')
+        self.assertIn('a-file:42', str(binding))
+
+    def test_str_includes_loc_of_given_class(self):
+        class SomeClass(object):
+            def __init__(self):
+                pass
+        binding = bindings_lib.new_binding_to_class(
+            binding_keys.new('foo'), SomeClass, 'a-scope', SomeClass)
+        self.assertIn('bindings_test.py', str(binding))
+
+    def test_invalid_target_error_includes_loc_of_given_class(self):
+        class SomeClass(object):
+            def __init__(self):
+                pass
+        try:
+            bindings_lib.new_binding_to_class(
+                binding_keys.new('foo'), 'not-a-class', 'a-scope', SomeClass)
+            self.fail('expected InvalidBindingTargetError')
+        except errors.InvalidBindingTargetError as e:
+            self.assertIn('bindings_test.py', str(e))
+            self.assertNotIn('SomeClass', str(e))
 
 
 class GetBindingKeyToBindingMapsTest(unittest.TestCase):
@@ -156,14 +197,15 @@ class BindingMappingTest(unittest.TestCase):
             {'a-binding-key': 'a-binding'}, {})
         self.assertEqual(
             'a-binding',
-            binding_mapping.get('a-binding-key', 'injection-site-desc'))
+            binding_mapping.get('a-binding-key',
+                                lambda: 'injection-site-desc'))
 
     def test_unknown_binding_raises_error(self):
         binding_mapping = bindings_lib.BindingMapping(
             {'a-binding-key': 'a-binding'}, {})
         self.assertRaises(errors.NothingInjectableForArgError,
                           binding_mapping.get,
-                          'unknown-binding-key', 'injection-site-desc')
+                          'unknown-binding-key', lambda: 'injection-site-desc')
 
     def test_colliding_bindings_raises_error(self):
         binding_key = binding_keys.new('unused')
@@ -172,7 +214,17 @@ class BindingMappingTest(unittest.TestCase):
         binding_mapping = bindings_lib.BindingMapping(
             {}, {'colliding-binding-key': [binding_one, binding_two]})
         self.assertRaises(errors.AmbiguousArgNameError, binding_mapping.get,
-                          'colliding-binding-key', 'injection-site-desc')
+                          'colliding-binding-key',
+                          lambda: 'injection-site-desc')
+
+    def test_success_does_not_get_injection_site_desc(self):
+        binding_mapping = bindings_lib.BindingMapping(
+            {'a-binding-key': 'a-binding'}, {})
+        def get_injection_site_desc():
+            self.fail('injection site desc needlessly gotten')
+        self.assertEqual(
+            'a-binding',
+            binding_mapping.get('a-binding-key', get_injection_site_desc))
 
     def test_verifying_ok_bindings_passes(self):
         binding_mapping = bindings_lib.BindingMapping(
@@ -196,12 +248,154 @@ class BindingMappingTest(unittest.TestCase):
                               'unknown-binding-key', 'a-require-loc')])
 
 
+    def test_uses_implicit_binding_for_unmapped_binding_key(self):
+        class SomeClass(object):
+            pass
+        binding_mapping = bindings_lib.BindingMapping(
+            {}, {}, bindings_lib.ImplicitClassBindings([SomeClass]))
+        binding = binding_mapping.get(binding_keys.new('some_class'),
+                                      lambda: 'injection-site-desc')
+        self.assertEqual('a-provided-SomeClass', call_provisor_fn(binding))
+
+    def test_prefers_mapped_binding_to_implicit_binding(self):
+        class SomeClass(object):
+            pass
+        binding_key = binding_keys.new('some_class')
+        binding_mapping = bindings_lib.BindingMapping(
+            {binding_key: 'a-binding'}, {},
+            bindings_lib.ImplicitClassBindings([SomeClass]))
+        self.assertEqual('a-binding', binding_mapping.find(binding_key))
+
+    def test_colliding_implicit_bindings_raises_error(self):
+        class SomeClass(object):
+            pass
+        class _SomeClass(object):
+            pass
+        binding_mapping = bindings_lib.BindingMapping(
+            {}, {}, bindings_lib.ImplicitClassBindings([SomeClass, _SomeClass]))
+        binding_key = binding_keys.new('some_class')
+        self.assertIsNone(binding_mapping.find(binding_key))
+        self.assertRaises(errors.AmbiguousArgNameError, binding_mapping.get,
+                          binding_key, lambda: 'injection-site-desc')
+        self.assertRaises(errors.ConflictingRequiredBindingError,
+                          binding_mapping.verify_requirements,
+                          [required_bindings.RequiredBinding(
+                              binding_key, 'unused-require-loc')])
+
+
+class BindingMappingNestedLazyBindingSpecsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.outer_spec = bindings_lib.LazyBindingSpec(
+            'some.module:OuterBindingSpec', ['x', 'y'])
+        self.inner_spec = bindings_lib.LazyBindingSpec(
+            'some.module:InnerBindingSpec', ['y'])
+        self.x_binding = bindings_lib.new_binding_to_instance(
+            binding_keys.new('x'), 'an-x', scoping.DEFAULT_SCOPE, 'a-loc')
+        self.y_binding = bindings_lib.new_binding_to_instance(
+            binding_keys.new('y'), 'a-y', scoping.DEFAULT_SCOPE, 'a-loc')
+        self.spec_to_loaded = {
+            self.outer_spec: ([self.x_binding], [], [self.inner_spec]),
+            self.inner_spec: ([self.y_binding], [], [])}
+
+    def new_binding_mapping(self, lazy_binding_specs):
+        return bindings_lib.BindingMapping(
+            {}, {}, lazy_binding_specs=lazy_binding_specs,
+            load_lazy_binding_spec_fn=self.spec_to_loaded.get)
+
+    def test_loads_nested_spec_when_its_binding_key_is_first_looked_up(self):
+        binding_mapping = self.new_binding_mapping([self.outer_spec])
+        self.assertIs(self.y_binding,
+                      binding_mapping.find(binding_keys.new('y')))
+        self.assertIs(self.x_binding,
+                      binding_mapping.find(binding_keys.new('x')))
+
+    def test_raises_error_if_nested_spec_declares_undeclared_binding_key(
+            self):
+        outer_spec = bindings_lib.LazyBindingSpec(
+            'some.module:OuterBindingSpec', ['x'])
+        self.spec_to_loaded[outer_spec] = (
+            [self.x_binding], [], [self.inner_spec])
+        binding_mapping = self.new_binding_mapping([outer_spec])
+        self.assertRaises(errors.UndeclaredLazyBindingError,
+                          binding_mapping.find, binding_keys.new('x'))
+
+    def test_raises_error_if_nested_spec_declares_looked_up_binding_key(
+            self):
+        other_spec = bindings_lib.LazyBindingSpec(
+            'some.module:OtherBindingSpec', ['y'])
+        self.spec_to_loaded[other_spec] = ([], [], [])
+        binding_mapping = self.new_binding_mapping(
+            [other_spec, self.outer_spec])
+        self.assertIsNone(binding_mapping.find(binding_keys.new('y')))
+        self.assertRaises(errors.LazyBindingAlreadyLookedUpError,
+                          binding_mapping.find, binding_keys.new('x'))
+
+
+class ImplicitClassBindingsTest(unittest.TestCase):
+
+    def test_returns_no_bindings_for_unknown_binding_key(self):
+        class SomeClass(object):
+            pass
+        implicit_class_bindings = bindings_lib.ImplicitClassBindings(
+            [SomeClass])
+        self.assertEqual((), implicit_class_bindings.get(
+            binding_keys.new('unknown')))
+
+    def test_returns_bindings_for_binding_key(self):
+        class SomeClass(object):
+            pass
+        class _SomeClass(object):
+            pass
+        class OtherClass(object):
+            pass
+        implicit_class_bindings = bindings_lib.ImplicitClassBindings(
+            [SomeClass, _SomeClass, OtherClass])
+        implicit_bindings = implicit_class_bindings.get(
+            binding_keys.new('some_class'))
+        self.assertEqual(
+            set(['a-provided-SomeClass', 'a-provided-_SomeClass']),
+            set(call_provisor_fn(x) for x in implicit_bindings))
+
+    def test_returns_same_bindings_each_time(self):
+        class SomeClass(object):
+            pass
+        implicit_class_bindings = bindings_lib.ImplicitClassBindings(
+            [SomeClass])
+        binding_key = binding_keys.new('some_class')
+        self.assertIs(implicit_class_bindings.get(binding_key),
+                      implicit_class_bindings.get(binding_key))
+
+    def test_maps_class_names_only_when_first_looked_up(self):
+        class SomeClass(object):
+            pass
+        class_names = []
+        def get_arg_names_from_class_name(class_name):
+            class_names.append(class_name)
+            return ['foo']
+        implicit_class_bindings = bindings_lib.ImplicitClassBindings(
+            [SomeClass], get_arg_names_from_class_name)
+        self.assertEqual([], class_names)
+        [implicit_binding] = implicit_class_bindings.get(
+            binding_keys.new('foo'))
+        implicit_class_bindings.get(binding_keys.new('bar'))
+        self.assertEqual(['SomeClass'], class_names)
+        self.assertEqual('a-provided-SomeClass',
+                         call_provisor_fn(implicit_binding))
+
+
 class DefaultGetArgNamesFromClassNameTest(unittest.TestCase):
 
     def test_single_word_lowercased(self):
         self.assertEqual(
             ['foo'], bindings_lib.default_get_arg_names_from_class_name('Foo'))
 
+    def test_returns_new_list_each_time(self):
+        arg_names = bindings_lib.default_get_arg_names_from_class_name('Foo')
+        arg_names.append('bar')
+        self.assertEqual(
+            ['foo'], bindings_lib.default_get_arg_names_from_class_name('Foo'))
+
     def test_leading_underscore_stripped(self):
         self.assertEqual(
             ['foo'], bindings_lib.default_get_arg_names_from_class_name('_Foo'))
@@ -315,6 +509,21 @@ class GetProviderBindingsTest(unittest.TestCase):
         self.assertEqual(binding_keys.new('foo'),
                          implicit_binding.binding_key)
 
+    def test_reuses_provider_methods_of_binding_spec_class_if_caching(self):
+        class SomeBindingSpec(bindings_lib.BindingSpec):
+            def __init__(self, foo):
+                self.foo = foo
+            def provide_foo(self):
+                return self.foo
+        bindings_lib.get_provider_bindings(
+            SomeBindingSpec('unused'), scoping._BUILTIN_SCOPES, use_cache=True)
+        with mock.patch.object(bindings_lib.inspect, 'getmembers') as mock_fn:
+            [implicit_binding] = bindings_lib.get_provider_bindings(
+                SomeBindingSpec('a-foo'), scoping._BUILTIN_SCOPES,
+                use_cache=True)
+            self.assertFalse(mock_fn.called)
+        self.assertEqual('a-foo', call_provisor_fn(implicit_binding))
+
     def test_raises_exception_if_scope_unknown(self):
         class SomeBindingSpec(bindings_lib.BindingSpec):
             def provide_foo(self):
@@ -323,6 +532,18 @@ class GetProviderBindingsTest(unittest.TestCase):
                           bindings_lib.get_provider_bindings,
                           SomeBindingSpec(), known_scope_ids=[])
 
+    def test_creates_each_provider_binding_once_if_not_caching(self):
+        class SomeBindingSpec(bindings_lib.BindingSpec):
+            def provide_foo(self):
+                return 'a-foo'
+        with mock.patch.object(
+                bindings_lib, '_ProviderFnBinding',
+                wraps=bindings_lib._ProviderFnBinding) as mock_class:
+            [implicit_binding] = bindings_lib.get_provider_bindings(
+                SomeBindingSpec(), scoping._BUILTIN_SCOPES)
+        self.assertEqual(1, mock_class.call_count)
+        self.assertEqual('a-foo', call_provisor_fn(implicit_binding))
+
 
 class GetImplicitClassBindingsTest(unittest.TestCase):
 
@@ -366,6 +587,45 @@ class GetImplicitClassBindingsTest(unittest.TestCase):
                          implicit_binding.binding_key)
 
 
+class LazyBindingSpecTest(unittest.TestCase):
+
+    def test_declares_binding_keys(self):
+        lazy_binding_spec = bindings_lib.LazyBindingSpec(
+            'pinject.bindings:BindingSpec', ['foo', ('bar', 'an-annotation')])
+        self.assertEqual(
+            frozenset([binding_keys.new('foo'),
+                       binding_keys.new('bar', 'an-annotation')]),
+            lazy_binding_spec.binding_keys)
+
+    def test_equal_if_same_import_path(self):
+        self.assertEqual(
+            bindings_lib.LazyBindingSpec('some.module:SomeBindingSpec', []),
+            bindings_lib.LazyBindingSpec('some.module:SomeBindingSpec',
+                                         ['foo']))
+        self.assertNotEqual(
+            bindings_lib.LazyBindingSpec('some.module:SomeBindingSpec', []),
+            bindings_lib.LazyBindingSpec('some.module:OtherBindingSpec', []))
+
+    def test_does_not_import_binding_spec_until_needed(self):
+        bindings_lib.LazyBindingSpec('nosuchmodule:SomeBindingSpec', ['foo'])
+
+    def test_creates_binding_spec(self):
+        lazy_binding_spec = bindings_lib.LazyBindingSpec(
+            'pinject.bindings:BindingSpec', ['foo'])
+        self.assertIsInstance(lazy_binding_spec.new_binding_spec(),
+                              bindings_lib.BindingSpec)
+
+    def test_raises_error_if_import_path_is_invalid(self):
+        self.assertRaises(errors.InvalidImportPathError,
+                          bindings_lib.LazyBindingSpec,
+                          'some.module.SomeBindingSpec', ['foo'])
+
+    def test_raises_error_if_binding_names_is_wrong_type(self):
+        self.assertRaises(errors.WrongArgTypeError,
+                          bindings_lib.LazyBindingSpec,
+                          'some.module:SomeBindingSpec', 'foo')
+
+
 class BinderTest(unittest.TestCase):
 
     def setUp(self):
@@ -378,11 +638,66 @@ class BinderTest(unittest.TestCase):
         class SomeClass(object):
             pass
         self.binder.bind('an-arg-name', to_class=SomeClass)
-        [expected_binding] = [
-            b for b in self.collected_bindings
-            if b.binding_key == binding_keys.new('an-arg-name')]
-        # TODO(kurts): test the proviser fn after the dust settles on how
-        # exactly to do class bindings.
+        [only_binding] = self.collected_bindings
+        self.assertEqual(binding_keys.new('an-arg-name'),
+                         only_binding.binding_key)
+        self.assertEqual('a-provided-SomeClass',
+                         call_provisor_fn(only_binding))
+
+    def test_class_bindings_in_same_scope_share_scope_key(self):
+        class SomeClass(object):
+            pass
+        self.binder.bind('an-arg-name', to_class=SomeClass)
+        self.binder.bind('another-arg-name', to_class=SomeClass)
+        binding_one, binding_two = self.collected_bindings
+        self.assertEqual(binding_one.scope_key, binding_two.scope_key)
+
+    def test_class_bindings_in_different_scopes_have_different_scope_keys(
+            self):
+        class SomeClass(object):
+            pass
+        self.binder.bind('an-arg-name', to_class=SomeClass)
+        self.binder.bind('another-arg-name', to_class=SomeClass,
+                         in_scope='known-scope')
+        binding_one, binding_two = self.collected_bindings
+        self.assertNotEqual(binding_one.scope_key, binding_two.scope_key)
+
+    def test_can_bind_to_class_import_path(self):
+        self.binder.bind('an-arg-name',
+                         to_class='pinject.scoping:SingletonScope')
+        [only_binding] = self.collected_bindings
+        self.assertEqual('a-provided-SingletonScope',
+                         call_provisor_fn(only_binding))
+
+    def test_binding_to_class_import_path_does_not_import_it(self):
+        self.binder.bind('an-arg-name', to_class='nosuchmodule:SomeClass')
+        [only_binding] = self.collected_bindings
+        self.assertRaises(ImportError, call_provisor_fn, only_binding)
+
+    def test_class_import_path_bindings_in_same_scope_share_scope_key(self):
+        self.binder.bind('an-arg-name', to_class='some.module:SomeClass')
+        self.binder.bind_many(
+            to_classes={'another-arg-name': 'some.module:SomeClass'})
+        binding_one, binding_two = self.collected_bindings
+        self.assertEqual(binding_one.scope_key, binding_two.scope_key)
+
+    def test_class_and_its_import_path_in_same_scope_share_scope_key(self):
+        self.binder.bind('an-arg-name', to_class=scoping.SingletonScope)
+        self.binder.bind('another-arg-name',
+                         to_class='pinject.scoping:SingletonScope')
+        binding_one, binding_two = self.collected_bindings
+        self.assertEqual(binding_one.scope_key, binding_two.scope_key)
+
+    def test_binding_to_invalid_class_import_path_raises_error(self):
+        self.assertRaises(errors.InvalidImportPathError,
+                          self.binder.bind, 'unused-arg-name',
+                          to_class='some.module:')
+
+    def test_instance_binding_scope_key_is_binding_key(self):
+        self.binder.bind('an-arg-name', to_instance='an-instance')
+        [only_binding] = self.collected_bindings
+        self.assertEqual(binding_keys.new('an-arg-name'),
+                         only_binding.scope_key)
 
     def test_can_bind_to_instance(self):
         an_instance = object()
@@ -427,6 +742,74 @@ class BinderTest(unittest.TestCase):
                           self.binder.bind, 'unused-arg-name',
                           to_class='not-a-class')
 
+    def test_can_bind_many_to_instances(self):
+        self.binder.bind_many(to_instances={'foo': 'a-foo', 'bar': 'a-bar'})
+        binding_key_to_instance = {
+            b.binding_key: call_provisor_fn(b) for b in self.collected_bindings}
+        self.assertEqual({binding_keys.new('foo'): 'a-foo',
+                          binding_keys.new('bar'): 'a-bar'},
+                         binding_key_to_instance)
+
+    def test_can_bind_many_to_classes(self):
+        class SomeClass(object):
+            pass
+        self.binder.bind_many(to_classes={'foo': SomeClass, 'bar': SomeClass})
+        binding_one, binding_two = self.collected_bindings
+        self.assertEqual(
+            set([binding_keys.new('foo'), binding_keys.new('bar')]),
+            set([binding_one.binding_key, binding_two.binding_key]))
+        self.assertEqual('a-provided-SomeClass', call_provisor_fn(binding_one))
+        self.assertEqual(binding_one.scope_key, binding_two.scope_key)
+
+    def test_can_bind_many_with_annotations(self):
+        self.binder.bind_many(
+            to_instances={('an-arg-name', 'an-annotation'): 'an-instance'})
+        [only_binding] = self.collected_bindings
+        self.assertEqual(
+            binding_keys.new('an-arg-name', 'an-annotation'),
+            only_binding.binding_key)
+
+    def test_can_bind_many_with_scope(self):
+        self.binder.bind_many(to_instances={'an-arg-name': 'an-instance'},
+                              in_scope='known-scope')
+        [only_binding] = self.collected_bindings
+        self.assertEqual('known-scope', only_binding.scope_id)
+
+    def test_binding_many_to_nothing_raises_error(self):
+        self.assertRaises(errors.EmptyBindManyError, self.binder.bind_many)
+        self.assertEqual([], self.collected_bindings)
+
+    def test_binding_many_to_empty_mapping_binds_nothing(self):
+        self.binder.bind_many(to_instances={})
+        self.assertEqual([], self.collected_bindings)
+
+    def test_binding_many_to_unknown_scope_raises_error(self):
+        self.assertRaises(
+            errors.UnknownScopeError, self.binder.bind_many,
+            to_instances={'unused-arg-name': 'unused-instance'},
+            in_scope='unknown-scope')
+
+    def test_binding_many_to_non_mapping_raises_error(self):
+        self.assertRaises(errors.WrongArgTypeError, self.binder.bind_many,
+                          to_instances=['not-a-mapping'])
+
+    def test_binding_many_to_none_raises_error(self):
+        self.assertRaises(errors.NoBindingTargetArgsError,
+                          self.binder.bind_many,
+                          to_instances={'unused-arg-name': None})
+
+    def test_binding_many_to_non_class_raises_error(self):
+        self.assertRaises(errors.InvalidBindingTargetError,
+                          self.binder.bind_many,
+                          to_classes={'unused-arg-name': 'not-a-class'})
+
+    def test_binding_many_binds_nothing_if_any_binding_is_invalid(self):
+        self.assertRaises(
+            errors.InvalidBindingTargetError, self.binder.bind_many,
+            to_instances={'foo': 'a-foo'},
+            to_classes={'unused-arg-name': 'not-a-class'})
+        self.assertEqual([], self.collected_bindings)
+
 
 class BindingSpecTest(unittest.TestCase):
 
@@ -21,6 +21,7 @@ from pinject import bindings
 from pinject import binding_keys
 from pinject import decorators
 from pinject import errors
+from pinject import object_graph
 from pinject import scoping
 from pinject import support
 
@@ -153,6 +154,156 @@ class InjectableTest(unittest.TestCase):
             hasattr(SomeClass.__init__, decorators._IS_WRAPPER_ATTR))
 
 
+class UnwrappedDecoratorsTest(unittest.TestCase):
+
+    def setUp(self):
+        decorators.set_decorators_wrap_fns(False)
+
+    def tearDown(self):
+        decorators.set_decorators_wrap_fns(True)
+
+    def test_returns_decorated_fn_unchanged(self):
+        def some_function(foo, bar):
+            pass
+        self.assertIs(some_function, decorators.inject(['foo'])(some_function))
+        self.assertIs(
+            some_function,
+            decorators.annotate_arg('foo', 'an-annotation')(some_function))
+        self.assertIs(some_function,
+                      decorators.provides('foo')(some_function))
+
+    def test_sets_metadata_on_decorated_fn(self):
+        @decorators.annotate_arg('foo', 'an-annotation')
+        @decorators.inject(['foo'])
+        def some_function(foo, bar):
+            pass
+        self.assertEqual([arg_binding_keys.new('foo', 'an-annotation')],
+                         list(decorators.get_injectable_arg_binding_keys(
+                             some_function, [], {})))
+
+    def test_marks_class_explicitly_injectable(self):
+        class SomeClass(object):
+            @decorators.inject()
+            def __init__(self, foo):
+                pass
+        self.assertTrue(decorators.is_explicitly_injectable(SomeClass))
+
+    def test_still_validates_decorations(self):
+        def do_bad_inject():
+            @decorators.inject(arg_names=['bar'])
+            def some_function(foo):
+                pass
+        self.assertRaises(errors.NoSuchArgError, do_bad_inject)
+
+
+class DeferredValidationTest(unittest.TestCase):
+
+    def setUp(self):
+        decorators.set_decorators_validate_eagerly(False)
+
+    def tearDown(self):
+        decorators.set_decorators_validate_eagerly(True)
+        del decorators._pending_fn_refs[:]
+
+    def test_bad_decoration_does_not_raise_when_applied(self):
+        @decorators.inject(arg_names=['bar'])
+        def some_function(foo):
+            pass
+
+    def test_bad_decoration_raises_when_validated(self):
+        @decorators.inject(arg_names=['bar'])
+        def some_function(foo):
+            pass
+        self.assertRaises(errors.NoSuchArgError,
+                          decorators.validate_pending_decorations)
+
+    def test_bad_decoration_raises_every_time_validated(self):
+        @decorators.annotate_arg('foo', 'an-annotation')
+        def some_function(bar):
+            pass
+        self.assertRaises(errors.NoSuchArgToInjectError,
+                          decorators.validate_pending_decorations)
+        self.assertRaises(errors.NoSuchArgToInjectError,
+                          decorators.validate_pending_decorations)
+
+    def test_duplicate_decorations_raise_when_validated(self):
+        @decorators.inject(['foo'])
+        @decorators.inject(['foo'])
+        def some_function(foo, bar):
+            pass
+        self.assertRaises(errors.DuplicateDecoratorError,
+                          decorators.validate_pending_decorations)
+
+    def test_error_loc_is_where_decorator_was_applied(self):
+        @decorators.inject(arg_names=['bar'])
+        def some_function(foo):
+            pass
+        try:
+            decorators.validate_pending_decorations()
+            self.fail('failed to raise')
+        except errors.NoSuchArgError as e:
+            self.assertIn('decorators_test.py', str(e))
+
+    def test_validates_when_metadata_is_needed(self):
+        @decorators.annotate_arg('foo', 'an-annotation')
+        @decorators.inject(['foo'])
+        def some_function(foo, bar):
+            pass
+        self.assertEqual([arg_binding_keys.new('foo', 'an-annotation')],
+                         list(decorators.get_injectable_arg_binding_keys(
+                             some_function, [], {})))
+        decorators.validate_pending_decorations()
+
+    def test_validates_provider_decorations_when_needed(self):
+        @decorators.provides('foo', annotated_with='an-annotation')
+        def provide_bar():
+            pass
+        self.assertEqual(
+            [decorators.ProviderDecoration(
+                'foo', 'an-annotation', scoping.DEFAULT_SCOPE)],
+            decorators.get_provider_fn_decorations(provide_bar, ['bar']))
+
+    def test_new_object_graph_validates_pending_decorations(self):
+        class SomeClass(object):
+            @decorators.inject(arg_names=['bar'])
+            def __init__(self, foo):
+                pass
+        self.assertRaises(errors.NoSuchArgError, object_graph.new_object_graph,
+                          modules=None, classes=[SomeClass])
+
+    def test_injects_validated_decorations(self):
+        class SomeClass(object):
+            @decorators.annotate_arg('foo', 'an-annotation')
+            @decorators.inject(['foo'])
+            def __init__(self, foo, bar=None):
+                self.foo = foo
+        class SomeBindingSpec(bindings.BindingSpec):
+            @decorators.provides(annotated_with='an-annotation')
+            def provide_foo(self):
+                return 'a-foo'
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass],
+            binding_specs=[SomeBindingSpec()])
+        self.assertEqual('a-foo', obj_graph.provide(SomeClass).foo)
+
+
+class GetDecoratedInitFnsTest(unittest.TestCase):
+
+    def test_includes_decorated_initializers(self):
+        class SomeClass(object):
+            @decorators.annotate_arg('foo', 'an-annotation')
+            @decorators.inject()
+            def __init__(self, foo):
+                pass
+        self.assertIn(SomeClass.__init__, decorators.get_decorated_init_fns())
+
+    def test_excludes_other_decorated_functions(self):
+        @decorators.inject()
+        def some_function(foo):
+            pass
+        self.assertNotIn(some_function, decorators.get_decorated_init_fns())
+
+
 class ProvidesTest(unittest.TestCase):
 
     def test_sets_arg_values(self):
@@ -314,7 +465,7 @@ class GetInjectableArgBindingKeysTest(unittest.TestCase):
     def assert_fn_has_injectable_arg_binding_keys(self, fn, arg_binding_keys):
         self.assertEqual(
             arg_binding_keys,
-            decorators.get_injectable_arg_binding_keys(fn, [], {}))
+            list(decorators.get_injectable_arg_binding_keys(fn, [], {})))
 
     def test_fn_with_no_args_returns_nothing(self):
         self.assert_fn_has_injectable_arg_binding_keys(lambda: None, [])
@@ -340,3 +491,26 @@ class GetInjectableArgBindingKeysTest(unittest.TestCase):
         self.assert_fn_has_injectable_arg_binding_keys(
             fn, [arg_binding_keys.new('foo', 'an-annotation'),
                  arg_binding_keys.new('bar')])
+
+    def test_memoizes_arg_binding_keys_when_nothing_passed_directly(self):
+        def fn(foo, bar):
+            pass
+        self.assertIs(decorators.get_injectable_arg_binding_keys(fn, [], {}),
+                      decorators.get_injectable_arg_binding_keys(fn, [], {}))
+
+    def test_does_not_memoize_when_args_passed_directly(self):
+        def fn(foo, bar):
+            pass
+        self.assertIsNot(
+            decorators.get_injectable_arg_binding_keys(fn, ['a-foo'], {}),
+            decorators.get_injectable_arg_binding_keys(fn, ['a-foo'], {}))
+
+    def test_memoized_arg_binding_keys_reflect_later_decorations(self):
+        @decorators.annotate_arg('foo', 'an-annotation')
+        def fn(foo, bar):
+            pass
+        decorators.get_injectable_arg_binding_keys(fn, [], {})
+        fn = decorators.annotate_arg('bar', 'another-annotation')(fn)
+        self.assert_fn_has_injectable_arg_binding_keys(
+            fn, [arg_binding_keys.new('foo', 'an-annotation'),
+                 arg_binding_keys.new('bar', 'another-annotation')])
@@ -15,10 +15,16 @@ limitations under the License.
 
 
 import inspect
+import json
 import mock
+import os
+import shutil
 import sys
+import tempfile
+import types
 import unittest
 
+from pinject import errors
 from pinject import finding
 
 
@@ -27,6 +33,9 @@ foo = "some other mock attribute"
 
 class FindClassesTest(unittest.TestCase):
 
+    def setUp(self):
+        finding._module_to_dict_len_and_classes.clear()
+
     def test_finds_passed_in_classes(self):
         class SomeClass(object):
             pass
@@ -71,6 +80,7 @@ class FindClassesTest(unittest.TestCase):
                     finding.find_classes(modules=[this_module], classes=None))
 
         # Tests that the wrong error type is let through.
+        finding._module_to_dict_len_and_classes.clear()
         def cvar_raises_valueerror(value):
             if value == cvar:
                 raise ValueError()
@@ -81,6 +91,7 @@ class FindClassesTest(unittest.TestCase):
                 finding.find_classes(modules=[this_module], classes=None)
 
         # Tests that an error relating to another attribute is let through.
+        finding._module_to_dict_len_and_classes.clear()
         def foo_raises_nameerror(value):
             if value == foo:
                 raise NameError()
@@ -103,3 +114,424 @@ class FindClassesTest(unittest.TestCase):
         this_module.__bases__ = 0
         self.assertIn(FindClassesTest,
                       finding.find_classes(modules=[this_module], classes=None))
+
+    def test_reuses_classes_found_in_unchanged_module(self):
+        module = types.ModuleType('some_module')
+        class SomeClass(object):
+            pass
+        module.SomeClass = SomeClass
+        self.assertIn(SomeClass,
+                      finding.find_classes(modules=[module], classes=None))
+        with mock.patch.object(inspect, 'isclass') as mock_isclass:
+            self.assertIn(SomeClass,
+                          finding.find_classes(modules=[module], classes=None))
+            self.assertFalse(mock_isclass.called)
+
+    def test_finds_classes_again_if_module_dict_changes_size(self):
+        module = types.ModuleType('some_module')
+        finding.find_classes(modules=[module], classes=None)
+        class SomeClass(object):
+            pass
+        module.SomeClass = SomeClass
+        self.assertIn(SomeClass,
+                      finding.find_classes(modules=[module], classes=None))
+
+    def test_finds_classes_again_if_module_is_replaced(self):
+        class SomeClass(object):
+            pass
+        class OtherClass(object):
+            pass
+        module = types.ModuleType('some_module')
+        module.SomeClass = SomeClass
+        finding.find_classes(modules=[module], classes=None)
+        module = types.ModuleType('some_module')
+        module.OtherClass = OtherClass
+        classes = finding.find_classes(modules=[module], classes=None)
+        self.assertIn(OtherClass, classes)
+        self.assertNotIn(SomeClass, classes)
+
+    def test_does_not_trigger_lazy_module_attributes(self):
+        module = types.ModuleType('some_module')
+        module.__getattr__ = mock.Mock(side_effect=AttributeError)
+        finding.find_classes(modules=[module], classes=None)
+        self.assertFalse(module.__getattr__.called)
+
+
+
+class FindClassesWithModuleNamePatternsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.name_to_class = {}
+        self.name_to_module = {}
+        for module_name in ['myapp', 'myapp.foo', 'myapp.foo.bar',
+                            'myapp_other', 'otherapp', 'otherapp.myapp']:
+            module = types.ModuleType(module_name)
+            cls = type('Class', (object,), {})
+            module.Class = cls
+            self.name_to_class[module_name] = cls
+            self.name_to_module[module_name] = module
+        self.patcher = mock.patch.dict(sys.modules, self.name_to_module)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def find_class_module_names(self, modules, exclude_modules=None):
+        classes = finding.find_classes(modules, classes=None,
+                                       exclude_modules=exclude_modules)
+        return set(name for name, cls in self.name_to_class.items()
+                   if cls in classes)
+
+    def test_package_name_matches_package_and_submodules(self):
+        self.assertEqual(set(['myapp', 'myapp.foo', 'myapp.foo.bar']),
+                         self.find_class_module_names(['myapp']))
+
+    def test_glob_pattern_matches_module_names(self):
+        self.assertEqual(set(['myapp.foo', 'myapp.foo.bar']),
+                         self.find_class_module_names(['myapp.*']))
+        self.assertEqual(set(['myapp_other']),
+                         self.find_class_module_names(['myapp_*']))
+        self.assertEqual(set(['otherapp.myapp']),
+                         self.find_class_module_names(['*.myapp']))
+
+    def test_patterns_can_be_mixed_with_modules(self):
+        self.assertEqual(
+            set(['otherapp', 'myapp.foo', 'myapp.foo.bar']),
+            self.find_class_module_names(
+                [self.name_to_module['otherapp'], 'myapp.foo']))
+
+    def test_excludes_modules_from_all_imported_modules(self):
+        found = self.find_class_module_names(
+            finding.ALL_IMPORTED_MODULES, exclude_modules=['myapp', 'other*'])
+        self.assertEqual(set(['myapp_other']), found)
+
+    def test_excludes_modules_from_patterns(self):
+        self.assertEqual(
+            set(['myapp']),
+            self.find_class_module_names(['myapp'],
+                                         exclude_modules=['myapp.foo']))
+
+    def test_excludes_explicit_modules(self):
+        self.assertEqual(
+            set(),
+            self.find_class_module_names([self.name_to_module['myapp']],
+                                         exclude_modules=['myapp']))
+
+    def test_pattern_matching_nothing_finds_nothing(self):
+        self.assertEqual(set(),
+                         self.find_class_module_names(['no_such_app.*']))
+
+
+class GetModuleNameMatchesFnTest(unittest.TestCase):
+
+    def test_module_name_matches_module_and_submodules(self):
+        matches_fn = finding.get_module_name_matches_fn(['myapp.sub'])
+        self.assertTrue(matches_fn('myapp.sub'))
+        self.assertTrue(matches_fn('myapp.sub.mod'))
+        self.assertFalse(matches_fn('myapp'))
+        self.assertFalse(matches_fn('myapp.subway'))
+
+    def test_wildcard_pattern_matches_like_fnmatch(self):
+        matches_fn = finding.get_module_name_matches_fn(['myapp.*_test'])
+        self.assertTrue(matches_fn('myapp.foo_test'))
+        self.assertFalse(matches_fn('myapp.foo'))
+
+
+class ClassIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.temp_dir, 'class-index.json')
+        module_path = os.path.join(self.temp_dir, 'some_indexed_module.py')
+        self.module_path = module_path
+        with open(module_path, 'w') as module_file:
+            module_file.write('class SomeClass(object):\n'
+                              '    pass\n'
+                              'not_a_class = 42\n')
+        self.module = types.ModuleType('some_indexed_module')
+        self.module.__file__ = module_path
+        with open(module_path) as module_file:
+            exec(module_file.read(), self.module.__dict__)
+        self.start_new_process()
+
+    def tearDown(self):
+        self.start_new_process()
+        shutil.rmtree(self.temp_dir)
+
+    def start_new_process(self):
+        finding._module_to_dict_len_and_classes.clear()
+        finding._path_to_class_index.clear()
+
+    def find_classes(self):
+        return finding.find_classes(modules=[self.module], classes=None,
+                                    class_index_path=self.index_path)
+
+    def read_index(self):
+        with open(self.index_path) as index_file:
+            return json.load(index_file)
+
+    def test_writes_index(self):
+        self.assertEqual(set([self.module.SomeClass]), self.find_classes())
+        record = self.read_index()['modules'][self.module_path]
+        self.assertEqual(['SomeClass'], record['class_names'])
+
+    def test_reuses_index_in_later_process(self):
+        self.find_classes()
+        self.start_new_process()
+        with mock.patch.object(
+                finding, '_find_named_classes_in_module_dict') as mock_find:
+            self.assertEqual(set([self.module.SomeClass]), self.find_classes())
+            self.assertFalse(mock_find.called)
+
+    def test_scans_module_if_module_dict_changed_size(self):
+        self.find_classes()
+        self.start_new_process()
+        class OtherClass(object):
+            pass
+        self.module.OtherClass = OtherClass
+        self.assertEqual(set([self.module.SomeClass, OtherClass]),
+                         self.find_classes())
+        record = self.read_index()['modules'][self.module_path]
+        self.assertEqual(['OtherClass', 'SomeClass'], record['class_names'])
+
+    def test_scans_module_if_source_file_changed(self):
+        self.find_classes()
+        self.start_new_process()
+        index = self.read_index()
+        index['modules'][self.module_path]['mtime'] -= 1
+        with open(self.index_path, 'w') as index_file:
+            json.dump(index, index_file)
+        with mock.patch.object(
+                finding, '_find_named_classes_in_module_dict',
+                wraps=finding._find_named_classes_in_module_dict) as mock_find:
+            self.assertEqual(set([self.module.SomeClass]), self.find_classes())
+            self.assertTrue(mock_find.called)
+
+    def test_scans_module_if_recorded_class_is_missing(self):
+        self.find_classes()
+        self.start_new_process()
+        self.module.SomeClass = 'not-a-class-anymore'
+        self.assertEqual(set(), self.find_classes())
+
+    def test_ignores_corrupt_index(self):
+        with open(self.index_path, 'w') as index_file:
+            index_file.write('{not json')
+        self.assertEqual(set([self.module.SomeClass]), self.find_classes())
+        self.assertIn(self.module_path, self.read_index()['modules'])
+
+    def test_ignores_unwritable_index(self):
+        self.index_path = os.path.join(self.temp_dir, 'no-such-dir', 'index')
+        self.assertEqual(set([self.module.SomeClass]), self.find_classes())
+        self.assertFalse(os.path.exists(self.index_path))
+
+    def test_leaves_no_temp_files(self):
+        self.find_classes()
+        self.assertEqual(['class-index.json', 'some_indexed_module.py'],
+                         sorted(os.listdir(self.temp_dir)))
+
+    def test_merges_records_of_concurrent_writers(self):
+        other_module_path = os.path.join(self.temp_dir, 'other_module.py')
+        with open(other_module_path, 'w') as module_file:
+            module_file.write('')
+        other_module = types.ModuleType('other_module')
+        other_module.__file__ = other_module_path
+        finding.find_classes(modules=[other_module], classes=None,
+                             class_index_path=self.index_path)
+        self.start_new_process()
+        self.find_classes()
+        self.assertEqual(set([other_module_path, self.module_path]),
+                         set(self.read_index()['modules']))
+
+    def test_distinguishes_modules_with_same_name(self):
+        other_module_path = os.path.join(self.temp_dir, 'other_module.py')
+        with open(other_module_path, 'w') as module_file:
+            module_file.write('')
+        other_module = types.ModuleType('some_indexed_module')
+        other_module.__file__ = other_module_path
+        finding.find_classes(modules=[self.module, other_module],
+                             classes=None, class_index_path=self.index_path)
+        self.start_new_process()
+        self.assertEqual(
+            set([self.module.SomeClass]),
+            finding.find_classes(modules=[self.module, other_module],
+                                 classes=None,
+                                 class_index_path=self.index_path))
+
+
+class DiscoverClassesOnImportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.write_module('hookedapp/__init__.py', 'class AppClass(object):\n'
+                                                   '    pass\n')
+        self.write_module('hookedapp/foo.py', 'class Foo(object):\n'
+                                              '    pass\n')
+        self.write_module('hookedapp/bar.py', 'class Bar(object):\n'
+                                              '    pass\n')
+        self.write_module('hookedapp/broken.py', 'class Broken(object):\n'
+                                                 '    pass\n'
+                                                 'raise ValueError()\n')
+        self.write_module('unhookedapp.py', 'class Unhooked(object):\n'
+                                            '    pass\n')
+        sys.path.insert(0, self.temp_dir)
+
+    def tearDown(self):
+        finding._import_discovered_classes.reset()
+        sys.path.remove(self.temp_dir)
+        for module_name in list(sys.modules):
+            if module_name.split('.')[0] in ['hookedapp', 'unhookedapp']:
+                del sys.modules[module_name]
+        shutil.rmtree(self.temp_dir)
+
+    def write_module(self, relative_path, source):
+        path = os.path.join(self.temp_dir, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as module_file:
+            module_file.write(source)
+
+    def find_class_names(self, exclude_modules=None):
+        return set(cls.__name__ for cls in finding.find_classes(
+            finding.IMPORT_DISCOVERED_MODULES, classes=None,
+            exclude_modules=exclude_modules))
+
+    def test_records_classes_of_matching_modules_when_imported(self):
+        finding.discover_classes_on_import(['hookedapp'])
+        import hookedapp.foo
+        import unhookedapp
+        self.assertEqual(set(['AppClass', 'Foo']), self.find_class_names())
+
+    def test_records_already_imported_matching_modules(self):
+        import hookedapp.foo
+        finding.discover_classes_on_import(['hookedapp'])
+        self.assertEqual(set(['AppClass', 'Foo']), self.find_class_names())
+
+    def test_picks_up_modules_imported_later(self):
+        finding.discover_classes_on_import(['hookedapp'])
+        import hookedapp.foo
+        self.assertEqual(set(['AppClass', 'Foo']), self.find_class_names())
+        import hookedapp.bar
+        self.assertEqual(set(['AppClass', 'Foo', 'Bar']),
+                         self.find_class_names())
+
+    def test_does_not_search_modules_when_finding_classes(self):
+        finding.discover_classes_on_import(['hookedapp'])
+        import hookedapp.foo
+        with mock.patch.object(finding, '_find_classes_in_module') as mock_find:
+            self.find_class_names()
+            self.assertFalse(mock_find.called)
+
+    def test_excludes_modules(self):
+        finding.discover_classes_on_import(['hookedapp'])
+        import hookedapp.foo
+        import hookedapp.bar
+        self.assertEqual(set(['AppClass', 'Bar']),
+                         self.find_class_names(exclude_modules=['*.foo']))
+
+    def test_restores_real_loader(self):
+        finding.discover_classes_on_import(['hookedapp'])
+        import hookedapp.foo
+        self.assertNotIsInstance(hookedapp.foo.__loader__,
+                                 finding._ClassDiscoveringLoader)
+        self.assertNotIsInstance(hookedapp.foo.__spec__.loader,
+                                 finding._ClassDiscoveringLoader)
+
+    def test_does_not_record_module_that_fails_to_import(self):
+        finding.discover_classes_on_import(['hookedapp'])
+        def import_broken():
+            import hookedapp.broken
+        self.assertRaises(ValueError, import_broken)
+        self.assertEqual(set(['AppClass']), self.find_class_names())
+
+    def test_raises_error_if_patterns_are_wrong_type(self):
+        self.assertRaises(errors.WrongArgElementTypeError,
+                          finding.discover_classes_on_import, [42])
+
+    def test_reset_keeps_lock_and_forgets_classes(self):
+        finding.discover_classes_on_import(['hookedapp'])
+        import hookedapp
+        lock = finding._import_discovered_classes._lock
+        finding._import_discovered_classes.reset()
+        self.assertIs(lock, finding._import_discovered_classes._lock)
+        self.assertEqual(set(), self.find_class_names())
+
+
+class FindExplicitlyInjectableClassesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.module = types.ModuleType('registered_module')
+        exec('import functools\n'
+             'import pinject\n'
+             'def logged(fn):\n'
+             '    @functools.wraps(fn)\n'
+             '    def wrapper(*pargs, **kwargs):\n'
+             '        return fn(*pargs, **kwargs)\n'
+             '    return wrapper\n'
+             'class Injectable(object):\n'
+             '    @pinject.inject()\n'
+             '    def __init__(self, foo):\n'
+             '        pass\n'
+             'class RewrappedInjectable(object):\n'
+             '    @logged\n'
+             '    @pinject.inject()\n'
+             '    def __init__(self, foo):\n'
+             '        pass\n'
+             'class InheritsInjectable(Injectable):\n'
+             '    pass\n'
+             'class OverridesInjectable(Injectable):\n'
+             '    def __init__(self):\n'
+             '        pass\n'
+             'class NotInjectable(object):\n'
+             '    pass\n'
+             'class Outer(object):\n'
+             '    class Nested(object):\n'
+             '        @pinject.inject()\n'
+             '        def __init__(self, foo):\n'
+             '            pass\n',
+             self.module.__dict__)
+        self.patcher = mock.patch.dict(
+            sys.modules, {'registered_module': self.module})
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def find_class_names(self, modules=finding.ALL_IMPORTED_MODULES,
+                         classes=None, exclude_modules=None):
+        return set(
+            cls.__name__ for cls in finding.find_explicitly_injectable_classes(
+                modules, classes, exclude_modules=exclude_modules)
+            if cls.__module__ == 'registered_module')
+
+    def test_finds_decorated_classes_and_inheriting_subclasses(self):
+        self.assertEqual(set(['Injectable', 'InheritsInjectable',
+                              'RewrappedInjectable']),
+                         self.find_class_names())
+
+    def test_finds_class_whose_decorated_initializer_is_rewrapped(self):
+        self.assertIn('RewrappedInjectable', self.find_class_names())
+
+    def test_does_not_search_modules(self):
+        with mock.patch.object(finding, '_find_classes_in_module') as mock_find:
+            self.find_class_names()
+            self.assertFalse(mock_find.called)
+
+    def test_includes_passed_in_classes(self):
+        self.assertIn('NotInjectable', self.find_class_names(
+            classes=[self.module.NotInjectable]))
+
+    def test_excludes_modules(self):
+        self.assertEqual(
+            set(), self.find_class_names(exclude_modules=['registered_*']))
+
+    def test_does_not_find_classes_of_unimported_modules(self):
+        self.patcher.stop()
+        try:
+            self.assertEqual(set(), self.find_class_names())
+        finally:
+            self.patcher.start()
+
+    def test_searches_given_modules(self):
+        self.assertEqual(set(['Injectable', 'InheritsInjectable',
+                              'RewrappedInjectable']),
+                         self.find_class_names(modules=[self.module]))
@@ -31,7 +31,7 @@ class InjectionContextTest(unittest.TestCase):
         self.binding_key = binding_keys.new('foo')
         self.binding = bindings.new_binding_to_instance(
             self.binding_key, 'an-instance', 'curr-scope',
-            lambda: 'unused-desc')
+            'unused-loc')
         injection_context_factory = injection_contexts.InjectionContextFactory(
             lambda to_scope, from_scope: to_scope != 'unusable-scope')
         top_injection_context = injection_context_factory.new(
@@ -45,13 +45,39 @@ class InjectionContextTest(unittest.TestCase):
             _UNUSED_INJECTION_SITE_FN,
             bindings.new_binding_to_instance(
                 other_binding_key, 'unused-instance', 'new-scope',
-                lambda: 'unused-desc'))
+                'unused-loc'))
 
     def test_get_child_raises_error_when_binding_already_seen(self):
         self.assertRaises(errors.CyclicInjectionError,
                           self.injection_context.get_child,
                           _UNUSED_INJECTION_SITE_FN, self.binding)
 
+    def test_cyclic_injection_error_lists_whole_binding_stack_in_order(self):
+        other_binding = bindings.new_binding_to_instance(
+            binding_keys.new('bar'), 'unused-instance', 'curr-scope',
+            'unused-loc')
+        child_injection_context = self.injection_context.get_child(
+            _UNUSED_INJECTION_SITE_FN, other_binding)
+        try:
+            child_injection_context.get_child(
+                _UNUSED_INJECTION_SITE_FN, self.binding)
+            self.fail('expected CyclicInjectionError')
+        except errors.CyclicInjectionError as e:
+            message = str(e)
+        foo_index = message.index('"foo"')
+        bar_index = message.index('"bar"')
+        self.assertLess(foo_index, bar_index)
+        self.assertIn('"foo"', message[bar_index:])
+
+    def test_sibling_contexts_do_not_see_each_others_bindings(self):
+        other_binding = bindings.new_binding_to_instance(
+            binding_keys.new('bar'), 'unused-instance', 'curr-scope',
+            'unused-loc')
+        self.injection_context.get_child(
+            _UNUSED_INJECTION_SITE_FN, other_binding)
+        self.injection_context.get_child(
+            _UNUSED_INJECTION_SITE_FN, other_binding)
+
     def test_get_child_raises_error_when_scope_not_usable(self):
         other_binding_key = binding_keys.new('bar')
         self.assertRaises(
@@ -59,7 +85,7 @@ class InjectionContextTest(unittest.TestCase):
             _UNUSED_INJECTION_SITE_FN,
             bindings.new_binding_to_instance(
                 other_binding_key, 'unused-instance', 'unusable-scope',
-                lambda: 'unused-desc'))
+                'unused-loc'))
 
     def test_get_injection_site_desc(self):
         injection_context_factory = injection_contexts.InjectionContextFactory(
@@ -0,0 +1,96 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from pinject import errors
+from pinject import lazy_classes
+
+
+class LazyClassTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.temp_dir, 'lazymodule.py'),
+                  'w') as module_file:
+            module_file.write('class SomeClass(object):\n'
+                              '    class Inner(object):\n'
+                              '        pass\n'
+                              'not_a_class = 42\n')
+        sys.path.insert(0, self.temp_dir)
+
+    def tearDown(self):
+        sys.path.remove(self.temp_dir)
+        sys.modules.pop('lazymodule', None)
+        shutil.rmtree(self.temp_dir)
+
+    def test_is_not_imported_until_resolved(self):
+        lazy_class = lazy_classes.LazyClass(
+            'lazymodule', 'SomeClass', 'lazymodule.py:1')
+        self.assertIsNone(lazy_class.get_if_imported())
+        self.assertNotIn('lazymodule', sys.modules)
+        cls = lazy_class.resolve()
+        self.assertEqual('SomeClass', cls.__name__)
+        self.assertIs(sys.modules['lazymodule'], sys.modules[cls.__module__])
+        self.assertIs(cls, lazy_class.get_if_imported())
+
+    def test_gets_class_if_already_imported(self):
+        import lazymodule
+        lazy_class = lazy_classes.LazyClass(
+            'lazymodule', 'SomeClass', 'lazymodule.py:1')
+        self.assertIs(lazymodule.SomeClass, lazy_class.get_if_imported())
+
+    def test_resolves_nested_class(self):
+        lazy_class = lazy_classes.LazyClass(
+            'lazymodule', 'SomeClass.Inner', 'lazymodule.py:2')
+        self.assertEqual('Inner', lazy_class.resolve().__name__)
+
+    def test_raises_error_if_module_has_no_such_class(self):
+        lazy_class = lazy_classes.LazyClass(
+            'lazymodule', 'not_a_class', 'lazymodule.py:4')
+        self.assertRaises(errors.UnresolvableLazyClassError,
+                          lazy_class.resolve)
+
+    def test_raises_import_error_if_module_is_missing(self):
+        lazy_class = lazy_classes.LazyClass(
+            'nosuchlazymodule', 'SomeClass', 'nosuchlazymodule.py:1')
+        self.assertRaises(ImportError, lazy_class.resolve)
+
+    def test_name_and_loc(self):
+        lazy_class = lazy_classes.LazyClass(
+            'lazymodule', 'SomeClass', 'lazymodule.py:1')
+        self.assertEqual('lazymodule.SomeClass at lazymodule.py:1',
+                         lazy_class.get_name_and_loc())
+
+
+class NewFromImportPathTest(unittest.TestCase):
+
+    def test_splits_module_and_class_names(self):
+        lazy_class = lazy_classes.new_from_import_path(
+            'some.module:SomeClass.Inner', 'a-loc')
+        self.assertEqual('some.module', lazy_class.module_name)
+        self.assertEqual('SomeClass.Inner', lazy_class.class_name)
+        self.assertEqual('a-loc', lazy_class.loc)
+
+    def test_raises_error_if_no_class_name(self):
+        for import_path in ['some.module', 'some.module:', ':SomeClass']:
+            self.assertRaises(errors.InvalidImportPathError,
+                              lazy_classes.new_from_import_path,
+                              import_path, 'a-loc')
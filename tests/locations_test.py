@@ -14,8 +14,17 @@ limitations under the License.
 """
 
 
+import inspect
+import os
+import py_compile
+import shutil
+import sys
+import tempfile
 import unittest
 
+import mock
+
+from pinject import decorators
 from pinject import locations
 
 
@@ -29,19 +38,102 @@ class GetTypeLocTest(unittest.TestCase):
     def test_known(self):
         class SomeObject(object):
             pass
-        self.assertIn('locations_test.py', locations.get_loc(SomeObject))
+        self.assertIn('locations_test.py',
+                      locations.get_loc(SomeObject, use_source=True))
+
+    def test_known_from_initializer_without_reading_source(self):
+        class SomeObject(object):
+            def __init__(self):
+                pass
+        with mock.patch.object(inspect, 'getsourcelines') as getsourcelines:
+            loc = locations.get_loc(SomeObject)
+        self.assertEqual(0, getsourcelines.call_count)
+        self.assertEqual(
+            '{0}:{1}'.format(SomeObject.__init__.__code__.co_filename,
+                             SomeObject.__init__.__code__.co_firstlineno),
+            loc)
+
+    def test_known_function_matches_source_location(self):
+        def some_function():
+            pass
+        self.assertEqual(locations.get_loc(some_function, use_source=True),
+                         locations.get_loc(some_function))
+
+    def test_known_decorated_function_is_located_at_original(self):
+        @decorators.inject()
+        def some_function(foo):
+            pass
+        self.assertEqual(locations.get_loc(some_function, use_source=True),
+                         locations.get_loc(some_function))
+
+    def test_class_without_functions_located_without_reading_source(self):
+        class SomeObject(object):
+            pass
+        with mock.patch.object(inspect, 'getsourcelines') as getsourcelines:
+            locations.get_loc(SomeObject)
+        self.assertEqual(0, getsourcelines.call_count)
 
     def test_unknown(self):
         unknown_class = type('UnknownClass', (object,), {})
         self.assertEqual('unknown location', locations.get_loc(unknown_class))
 
 
+class GetLocOfPycOnlyModuleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.temp_dir, 'pyconlymod.py')
+        with open(self.source_path, 'w') as source_file:
+            source_file.write('import posixpath\n'
+                              '\n'
+                              'class WithInit(object):\n'
+                              '    join = posixpath.join\n'
+                              '    def __init__(self):\n'
+                              '        pass\n'
+                              '\n'
+                              'class WithoutInit(object):\n'
+                              '    join = posixpath.join\n'
+                              '    def method(self):\n'
+                              '        pass\n')
+        py_compile.compile(
+            self.source_path,
+            cfile=os.path.join(self.temp_dir, 'pyconlymod.pyc'),
+            doraise=True)
+        os.remove(self.source_path)
+        sys.path.insert(0, self.temp_dir)
+        import pyconlymod
+        self.module = pyconlymod
+
+    def tearDown(self):
+        sys.path.remove(self.temp_dir)
+        sys.modules.pop('pyconlymod', None)
+        shutil.rmtree(self.temp_dir)
+
+    def test_module_is_imported_from_pyc(self):
+        self.assertTrue(self.module.__file__.endswith('.pyc'))
+
+    def test_class_is_located_at_initializer(self):
+        cls = self.module.WithInit
+        # Python 3.13+ records the line of the class statement itself.
+        line = cls.__dict__.get('__firstlineno__', 5)
+        self.assertEqual('{0}:{1}'.format(self.source_path, line),
+                         locations.get_loc(cls))
+
+    def test_class_is_located_at_own_function_not_assigned_one(self):
+        cls = self.module.WithoutInit
+        # Python 3.13+ records the line of the class statement itself.
+        line = cls.__dict__.get('__firstlineno__', 10)
+        self.assertEqual('{0}:{1}'.format(self.source_path, line),
+                         locations.get_loc(cls))
+
+
 class GetClassNameAndLocTest(unittest.TestCase):
 
     def test_known(self):
         class OtherObject(object):
             pass
-        class_name_and_loc = locations.get_name_and_loc(OtherObject)
+        class_name_and_loc = locations.get_name_and_loc(
+            OtherObject, use_source=True)
         self.assertIn('OtherObject', class_name_and_loc)
         self.assertIn('locations_test.py', class_name_and_loc)
 
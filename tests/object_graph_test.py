@@ -14,11 +14,22 @@ limitations under the License.
 """
 
 
+import gc
+import inspect
+import linecache
+import os
+import shutil
+import sys
+import tempfile
 import unittest
+import weakref
+
+import mock
 
 from pinject import bindings
 from pinject import decorators
 from pinject import errors
+from pinject import finding
 from pinject import object_graph
 from pinject import scoping
 
@@ -33,6 +44,27 @@ class NewObjectGraphTest(unittest.TestCase):
         self.assertIsInstance(obj_graph.provide(errors.Error),
                               errors.Error)
 
+    def test_creates_object_graph_using_given_module_name_patterns(self):
+        obj_graph = object_graph.new_object_graph(modules=['pinject.errors'])
+        self.assertIsInstance(obj_graph.provide(errors.Error),
+                              errors.Error)
+
+    def test_creates_object_graph_excluding_given_modules(self):
+        obj_graph = object_graph.new_object_graph(
+            modules=['pinject'], exclude_modules=['pinject.errors'])
+        self.assertRaises(errors.NothingInjectableForArgError,
+                          obj_graph.provide, errors.NoSuchArgError)
+
+    def test_creates_object_graph_using_import_discovered_modules(self):
+        finding.discover_classes_on_import(['pinject.errors'])
+        try:
+            obj_graph = object_graph.new_object_graph(
+                modules=finding.IMPORT_DISCOVERED_MODULES)
+            self.assertIsInstance(obj_graph.provide(errors.Error),
+                                  errors.Error)
+        finally:
+            finding._import_discovered_classes.reset()
+
     def test_creates_object_graph_using_given_classes(self):
         class SomeClass(object):
             pass
@@ -175,9 +207,25 @@ class NewObjectGraphTest(unittest.TestCase):
         self.assertRaises(errors.WrongArgTypeError,
                           object_graph.new_object_graph, modules=42)
 
+    def test_raises_exception_if_exclude_modules_is_wrong_type(self):
+        self.assertRaises(errors.WrongArgTypeError,
+                          object_graph.new_object_graph, exclude_modules=42)
+        self.assertRaises(errors.WrongArgElementTypeError,
+                          object_graph.new_object_graph,
+                          exclude_modules=[errors])
+
+    def test_raises_exception_if_source_packages_is_wrong_type(self):
+        self.assertRaises(errors.WrongArgTypeError,
+                          object_graph.new_object_graph, source_packages=42)
+        self.assertRaises(errors.WrongArgElementTypeError,
+                          object_graph.new_object_graph,
+                          source_packages=[errors])
+
     def test_raises_exception_if_classes_is_wrong_type(self):
         self.assertRaises(errors.WrongArgTypeError,
                           object_graph.new_object_graph, classes=42)
+        self.assertRaises(errors.WrongArgElementTypeError,
+                          object_graph.new_object_graph, classes=[42])
 
     def test_raises_exception_if_binding_specs_is_wrong_type(self):
         self.assertRaises(errors.WrongArgTypeError,
@@ -228,6 +276,389 @@ class NewObjectGraphTest(unittest.TestCase):
                           binding_specs=[SomeBindingSpec()])
 
 
+class NewObjectGraphSourcePackagesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.write_module('graphsourceapp/__init__.py', '')
+        self.write_module('graphsourceapp/foo.py',
+                          'import pinject\n'
+                          'class Foo(object):\n'
+                          '    def __init__(self, bar):\n'
+                          '        self.bar = bar\n'
+                          'class ExplicitFoo(object):\n'
+                          '    @pinject.inject()\n'
+                          '    def __init__(self):\n'
+                          '        pass\n')
+        self.write_module('graphsourceapp/bar.py', 'class Bar(object):\n'
+                                                   '    pass\n')
+        self.write_module('graphsourceapp/gone.py', 'class Gone(object):\n'
+                                                    '    pass\n'
+                                                    'del Gone\n')
+        sys.path.insert(0, self.temp_dir)
+
+    def tearDown(self):
+        sys.path.remove(self.temp_dir)
+        for module_name in list(sys.modules):
+            if module_name.split('.')[0] == 'graphsourceapp':
+                del sys.modules[module_name]
+        shutil.rmtree(self.temp_dir)
+
+    def write_module(self, relative_path, source):
+        path = os.path.join(self.temp_dir, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as module_file:
+            module_file.write(source)
+
+    def test_imports_modules_only_when_providing(self):
+        class SomeClass(object):
+            def __init__(self, foo):
+                self.foo = foo
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass],
+            source_packages=['graphsourceapp'])
+        self.assertNotIn('graphsourceapp.foo', sys.modules)
+        self.assertNotIn('graphsourceapp.gone', sys.modules)
+        some_class = obj_graph.provide(SomeClass)
+        self.assertEqual('Foo', some_class.foo.__class__.__name__)
+        self.assertEqual('Bar', some_class.foo.bar.__class__.__name__)
+        self.assertNotIn('graphsourceapp.gone', sys.modules)
+
+    def test_uses_already_imported_classes(self):
+        from graphsourceapp import foo
+        class SomeClass(object):
+            def __init__(self, foo):
+                self.foo = foo
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass],
+            source_packages=['graphsourceapp'])
+        self.assertIsInstance(obj_graph.provide(SomeClass).foo, foo.Foo)
+
+    def test_only_binds_explicitly_injectable_classes_if_so_configured(self):
+        class SomeClass(object):
+            @decorators.inject()
+            def __init__(self, explicit_foo):
+                self.explicit_foo = explicit_foo
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass],
+            source_packages=['graphsourceapp'],
+            only_use_explicit_bindings=True)
+        self.assertEqual(
+            'ExplicitFoo',
+            obj_graph.provide(SomeClass).explicit_foo.__class__.__name__)
+        self.assertNotIn('graphsourceapp.bar', sys.modules)
+
+    def test_imports_classes_given_by_import_path_only_when_providing(self):
+        class SomeClass(object):
+            def __init__(self, bar):
+                self.bar = bar
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass, 'graphsourceapp.bar:Bar'])
+        self.assertNotIn('graphsourceapp.bar', sys.modules)
+        self.assertEqual('Bar',
+                         obj_graph.provide(SomeClass).bar.__class__.__name__)
+
+    def test_binds_to_class_import_paths(self):
+        class SomeClass(object):
+            def __init__(self, foo, another_foo):
+                self.foo = foo
+                self.another_foo = another_foo
+        class SomeBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                bind('foo', to_class='graphsourceapp.bar:Bar',
+                     in_scope=scoping.SINGLETON)
+                bind('another_foo', to_class='graphsourceapp.bar:Bar',
+                     in_scope=scoping.SINGLETON)
+        obj_graph = object_graph.new_object_graph(
+            modules=None, binding_specs=[SomeBindingSpec()])
+        self.assertNotIn('graphsourceapp.bar', sys.modules)
+        some_class = obj_graph.provide(SomeClass)
+        self.assertEqual('Bar', some_class.foo.__class__.__name__)
+        self.assertIs(some_class.foo, some_class.another_foo)
+
+    def test_binds_class_and_its_import_path_to_same_singleton(self):
+        from graphsourceapp import bar
+        class SomeClass(object):
+            def __init__(self, foo, another_foo):
+                self.foo = foo
+                self.another_foo = another_foo
+        class SomeBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                bind('foo', to_class=bar.Bar, in_scope=scoping.SINGLETON)
+                bind('another_foo', to_class='graphsourceapp.bar:Bar',
+                     in_scope=scoping.SINGLETON)
+        obj_graph = object_graph.new_object_graph(
+            modules=None, binding_specs=[SomeBindingSpec()])
+        some_class = obj_graph.provide(SomeClass)
+        self.assertIsInstance(some_class.foo, bar.Bar)
+        self.assertIs(some_class.foo, some_class.another_foo)
+
+    def test_imports_class_import_paths_if_only_using_explicit_bindings(self):
+        class SomeClass(object):
+            @decorators.inject()
+            def __init__(self, explicit_foo):
+                self.explicit_foo = explicit_foo
+        obj_graph = object_graph.new_object_graph(
+            modules=None,
+            classes=[SomeClass, 'graphsourceapp.foo:ExplicitFoo'],
+            only_use_explicit_bindings=True)
+        self.assertEqual(
+            'ExplicitFoo',
+            obj_graph.provide(SomeClass).explicit_foo.__class__.__name__)
+
+    def test_raises_error_if_module_lacks_class_found_in_source(self):
+        class SomeClass(object):
+            def __init__(self, gone):
+                pass
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass],
+            source_packages=['graphsourceapp'])
+        self.assertRaises(errors.UnresolvableLazyClassError,
+                          obj_graph.provide, SomeClass)
+
+
+class NewObjectGraphCacheBindingSpecsTest(unittest.TestCase):
+
+    def new_binding_spec_class(self, is_pure, configure_calls):
+        class SomeClass(object):
+            def __init__(self, foo):
+                self.foo = foo
+        class SomeBindingSpec(bindings.BindingSpec):
+            def configure(self, bind, require):
+                configure_calls.append(self)
+                bind('foo', to_instance='a-foo')
+                require('foo')
+            def provide_bar(self):
+                return 'a-bar'
+        SomeBindingSpec.is_pure = is_pure
+        return SomeClass, SomeBindingSpec
+
+    def test_replays_configure_of_pure_binding_spec(self):
+        configure_calls = []
+        SomeClass, SomeBindingSpec = self.new_binding_spec_class(
+            True, configure_calls)
+        for _ in range(2):
+            obj_graph = object_graph.new_object_graph(
+                modules=None, classes=[SomeClass],
+                binding_specs=[SomeBindingSpec()], cache_binding_specs=True)
+            self.assertEqual('a-foo', obj_graph.provide(SomeClass).foo)
+        self.assertEqual(1, len(configure_calls))
+
+    def test_configures_impure_binding_spec_each_time(self):
+        configure_calls = []
+        SomeClass, SomeBindingSpec = self.new_binding_spec_class(
+            False, configure_calls)
+        for _ in range(2):
+            obj_graph = object_graph.new_object_graph(
+                modules=None, classes=[SomeClass],
+                binding_specs=[SomeBindingSpec()], cache_binding_specs=True)
+            self.assertEqual('a-foo', obj_graph.provide(SomeClass).foo)
+        self.assertEqual(2, len(configure_calls))
+
+    def test_configures_pure_binding_spec_each_time_if_not_caching(self):
+        configure_calls = []
+        SomeClass, SomeBindingSpec = self.new_binding_spec_class(
+            True, configure_calls)
+        for _ in range(2):
+            object_graph.new_object_graph(
+                modules=None, classes=[SomeClass],
+                binding_specs=[SomeBindingSpec()])
+        self.assertEqual(2, len(configure_calls))
+
+    def test_replays_dependencies_of_pure_binding_spec(self):
+        class SomeClass(object):
+            def __init__(self, foo):
+                self.foo = foo
+        class DependencyBindingSpec(bindings.BindingSpec):
+            def provide_foo(self):
+                return 'a-foo'
+        class SomeBindingSpec(bindings.BindingSpec):
+            is_pure = True
+            def dependencies(self):
+                return [DependencyBindingSpec()]
+        for _ in range(2):
+            obj_graph = object_graph.new_object_graph(
+                modules=None, classes=[SomeClass],
+                binding_specs=[SomeBindingSpec()], cache_binding_specs=True)
+            self.assertEqual('a-foo', obj_graph.provide(SomeClass).foo)
+
+    def test_raises_error_if_replayed_binding_scope_is_unknown(self):
+        class SomeBindingSpec(bindings.BindingSpec):
+            is_pure = True
+            def configure(self, bind):
+                bind('foo', to_instance='a-foo', in_scope='foo-scope')
+        object_graph.new_object_graph(
+            modules=None, binding_specs=[SomeBindingSpec()],
+            id_to_scope={'foo-scope': scoping.SingletonScope()},
+            cache_binding_specs=True)
+        self.assertRaises(errors.UnknownScopeError,
+                          object_graph.new_object_graph, modules=None,
+                          binding_specs=[SomeBindingSpec()],
+                          cache_binding_specs=True)
+
+
+class NewObjectGraphLazyBindingSpecsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.temp_dir, 'lazyspecs.py'),
+                  'w') as module_file:
+            module_file.write(
+                'import pinject\n'
+                'class FooBindingSpec(pinject.BindingSpec):\n'
+                '    def configure(self, bind, require):\n'
+                '        bind("foo", to_instance="a-foo")\n'
+                '        require("bar")\n'
+                '    def provide_baz(self):\n'
+                '        return "a-baz"\n'
+                'class UndeclaringBindingSpec(pinject.BindingSpec):\n'
+                '    def configure(self, bind):\n'
+                '        bind("foo", to_instance="a-foo")\n'
+                '        bind("undeclared", to_instance="unused")\n'
+                'class NotABindingSpec(object):\n'
+                '    pass\n'
+                'num_configure_calls = []\n'
+                'class FailsOnceBindingSpec(pinject.BindingSpec):\n'
+                '    def configure(self, bind):\n'
+                '        num_configure_calls.append(1)\n'
+                '        if len(num_configure_calls) == 1:\n'
+                '            raise RuntimeError("failing once")\n'
+                '        bind("foo", to_instance="a-foo")\n'
+                'class OuterBindingSpec(pinject.BindingSpec):\n'
+                '    def configure(self, bind):\n'
+                '        bind("x", to_instance="spec-x")\n'
+                '    def dependencies(self):\n'
+                '        return [pinject.LazyBindingSpec(\n'
+                '            "lazyspecs:InnerBindingSpec", ["y"])]\n'
+                'class InnerBindingSpec(pinject.BindingSpec):\n'
+                '    def configure(self, bind):\n'
+                '        bind("y", to_instance="spec-y")\n')
+        sys.path.insert(0, self.temp_dir)
+
+    def tearDown(self):
+        sys.path.remove(self.temp_dir)
+        sys.modules.pop('lazyspecs', None)
+        shutil.rmtree(self.temp_dir)
+
+    def new_foo_binding_spec(self):
+        return bindings.LazyBindingSpec('lazyspecs:FooBindingSpec',
+                                        ['foo', 'baz'])
+
+    def test_loads_binding_spec_when_binding_name_is_first_needed(self):
+        class SomeClass(object):
+            def __init__(self, foo, baz):
+                self.foobaz = foo + baz
+        class BarBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                bind('bar', to_instance='a-bar')
+        obj_graph = object_graph.new_object_graph(
+            modules=None,
+            binding_specs=[self.new_foo_binding_spec(), BarBindingSpec()])
+        self.assertNotIn('lazyspecs', sys.modules)
+        self.assertEqual('a-fooa-baz', obj_graph.provide(SomeClass).foobaz)
+        self.assertIn('lazyspecs', sys.modules)
+
+    def test_never_loads_binding_spec_if_not_needed(self):
+        class SomeClass(object):
+            def __init__(self, bar):
+                self.bar = bar
+        class BarBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                bind('bar', to_instance='a-bar')
+        obj_graph = object_graph.new_object_graph(
+            modules=None,
+            binding_specs=[self.new_foo_binding_spec(), BarBindingSpec()])
+        self.assertEqual('a-bar', obj_graph.provide(SomeClass).bar)
+        self.assertNotIn('lazyspecs', sys.modules)
+
+    def test_loads_binding_specs_when_creating_graph_if_so_configured(self):
+        self.assertRaises(
+            errors.MissingRequiredBindingError, object_graph.new_object_graph,
+            modules=None, binding_specs=[self.new_foo_binding_spec()],
+            load_lazy_binding_specs=True)
+
+    def test_lazy_binding_spec_bindings_override_implicit_bindings(self):
+        class Foo(object):
+            pass
+        class SomeClass(object):
+            def __init__(self, foo):
+                self.foo = foo
+        class BarBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                bind('bar', to_instance='a-bar')
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[Foo],
+            binding_specs=[self.new_foo_binding_spec(), BarBindingSpec()])
+        self.assertEqual('a-foo', obj_graph.provide(SomeClass).foo)
+
+    def test_raises_error_if_binding_spec_binds_undeclared_binding_name(self):
+        class SomeClass(object):
+            def __init__(self, foo):
+                pass
+        obj_graph = object_graph.new_object_graph(
+            modules=None, binding_specs=[bindings.LazyBindingSpec(
+                'lazyspecs:UndeclaringBindingSpec', ['foo'])])
+        self.assertRaises(errors.UndeclaredLazyBindingError,
+                          obj_graph.provide, SomeClass)
+
+    def test_raises_error_if_binding_spec_conflicts_with_explicit_binding(self):
+        class SomeClass(object):
+            def __init__(self, baz):
+                pass
+        class OtherFooBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                bind('foo', to_instance='another-foo')
+                bind('bar', to_instance='a-bar')
+        obj_graph = object_graph.new_object_graph(
+            modules=None,
+            binding_specs=[self.new_foo_binding_spec(), OtherFooBindingSpec()])
+        self.assertRaises(errors.ConflictingExplicitBindingsError,
+                          obj_graph.provide, SomeClass)
+
+    def test_raises_same_error_each_time_binding_spec_fails_to_load(self):
+        class SomeClass(object):
+            def __init__(self, bar):
+                pass
+        obj_graph = object_graph.new_object_graph(
+            modules=None, binding_specs=[bindings.LazyBindingSpec(
+                'nosuchlazyspecs:BindingSpec', ['bar'])])
+        self.assertRaises(ImportError, obj_graph.provide, SomeClass)
+        self.assertRaises(ImportError, obj_graph.provide, SomeClass)
+
+    def test_loads_binding_spec_again_after_failing_to_load_it(self):
+        class SomeClass(object):
+            def __init__(self, foo):
+                self.foo = foo
+        obj_graph = object_graph.new_object_graph(
+            modules=None, binding_specs=[bindings.LazyBindingSpec(
+                'lazyspecs:FailsOnceBindingSpec', ['foo'])])
+        self.assertRaises(RuntimeError, obj_graph.provide, SomeClass)
+        self.assertEqual('a-foo', obj_graph.provide(SomeClass).foo)
+
+    def test_nested_binding_spec_binds_regardless_of_lookup_order(self):
+        class Y(object):
+            pass
+        class NeedsX(object):
+            def __init__(self, x):
+                self.x = x
+        class NeedsY(object):
+            def __init__(self, y):
+                self.y = y
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[Y], binding_specs=[bindings.LazyBindingSpec(
+                'lazyspecs:OuterBindingSpec', ['x', 'y'])])
+        self.assertEqual('spec-y', obj_graph.provide(NeedsY).y)
+        self.assertEqual('spec-x', obj_graph.provide(NeedsX).x)
+
+    def test_raises_error_if_import_path_is_not_of_binding_spec(self):
+        self.assertRaises(
+            errors.WrongArgTypeError, object_graph.new_object_graph,
+            modules=None, binding_specs=[bindings.LazyBindingSpec(
+                'lazyspecs:NotABindingSpec', ['foo'])],
+            load_lazy_binding_specs=True)
+
+
 class PareToPresentArgsTest(unittest.TestCase):
 
     def test_removes_only_args_not_present(self):
@@ -398,6 +829,21 @@ class ObjectGraphProvideTest(unittest.TestCase):
         some_class = obj_graph.provide(SomeClass)
         self.assertIs(some_class.foo, some_class.bar)
 
+    def test_configure_method_can_bind_many(self):
+        class SomeClass(object):
+            def __init__(self, foo, bar):
+                self.foo = foo
+                self.bar = bar
+        class SomeBindingSpec(bindings.BindingSpec):
+            def configure(self, bind_many):
+                bind_many(to_instances={'foo': 'a-foo', 'bar': 'a-bar'})
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass],
+            binding_specs=[SomeBindingSpec()])
+        some_class = obj_graph.provide(SomeClass)
+        self.assertEqual('a-foo', some_class.foo)
+        self.assertEqual('a-bar', some_class.bar)
+
     def test_raises_error_if_only_binding_has_different_annotation(self):
         class ClassOne(object):
             @decorators.annotate_arg('foo', 'an-annotation')
@@ -726,3 +1172,72 @@ class ObjectGraphProvideTest(unittest.TestCase):
         obj_graph = object_graph.new_object_graph(
             modules=None, classes=[SomeClass])
         self.assertRaises(errors.WrongArgTypeError, obj_graph.provide, 42)
+
+    def test_reuses_resolution_plans_across_provides(self):
+        class ClassOne(object):
+            def __init__(self, class_two):
+                self.class_two = class_two
+        class ClassTwo(object):
+            def __init__(self, foo):
+                self.foo = foo
+        class SomeBindingSpec(bindings.BindingSpec):
+            def provide_foo(self):
+                return 'a-foo'
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[ClassOne, ClassTwo],
+            binding_specs=[SomeBindingSpec()])
+        obj_graph.provide(ClassOne)
+        misses = obj_graph.get_plan_cache_stats().misses
+        class_one = obj_graph.provide(ClassOne)
+        self.assertEqual('a-foo', class_one.class_two.foo)
+        stats = obj_graph.get_plan_cache_stats()
+        self.assertEqual(misses, stats.misses)
+        self.assertGreater(stats.hits, 0)
+
+    def test_does_not_keep_provided_classes_alive(self):
+        obj_graph = object_graph.new_object_graph(modules=None)
+        def new_class():
+            class SomeClass(object):
+                def __init__(self):
+                    super().__init__()
+            return SomeClass
+        some_class = new_class()
+        obj_graph.provide(some_class)
+        class_ref = weakref.ref(some_class)
+        del some_class
+        gc.collect()
+        self.assertIsNone(class_ref())
+
+    def test_successful_provide_does_no_source_file_io(self):
+        class ClassOne(object):
+            def __init__(self, class_two, foo):
+                self.class_two = class_two
+        class ClassTwo(object):
+            def __init__(self, provide_foo):
+                self.foo = provide_foo()
+        class SomeBindingSpec(bindings.BindingSpec):
+            def configure(self, bind):
+                bind('bar', to_instance='a-bar')
+            def provide_foo(self, bar):
+                return 'a-foo-and-' + bar
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[ClassOne, ClassTwo],
+            binding_specs=[SomeBindingSpec()])
+        with mock.patch.object(inspect, 'getsourcelines') as getsourcelines, \
+                mock.patch.object(inspect, 'getfile') as getfile, \
+                mock.patch.object(linecache, 'getlines') as getlines:
+            class_one = obj_graph.provide(ClassOne)
+        self.assertEqual('a-foo-and-a-bar', class_one.class_two.foo)
+        self.assertEqual(0, getsourcelines.call_count)
+        self.assertEqual(0, getfile.call_count)
+        self.assertEqual(0, getlines.call_count)
+
+    def test_planned_missing_binding_still_raises_error_each_time(self):
+        class SomeClass(object):
+            def __init__(self, foo):
+                pass
+        obj_graph = object_graph.new_object_graph(
+            modules=None, classes=[SomeClass])
+        for _ in range(2):
+            self.assertRaises(errors.NothingInjectableForArgError,
+                              obj_graph.provide, SomeClass)
@@ -16,6 +16,8 @@ limitations under the License.
 
 import unittest
 
+import mock
+
 from pinject import arg_binding_keys
 from pinject import bindings
 from pinject import decorators
@@ -25,13 +27,14 @@ from pinject import object_providers
 from pinject import scoping
 
 
-def new_obj_provider(arg_binding_key, instance, allow_injecting_none=True):
+def new_obj_provider(arg_binding_key, instance, allow_injecting_none=True,
+                     scope=None):
     binding_key = arg_binding_key.binding_key
     binding = bindings.new_binding_to_instance(
-        binding_key, instance, 'a-scope', lambda: 'unused-desc')
+        binding_key, instance, 'a-scope', 'unused-loc')
     binding_mapping = bindings.BindingMapping({binding_key: binding}, {})
     bindable_scopes = scoping.BindableScopes(
-        {'a-scope': scoping.PrototypeScope()})
+        {'a-scope': scope or scoping.PrototypeScope()})
     return object_providers.ObjectProvider(
         binding_mapping, bindable_scopes, allow_injecting_none)
 
@@ -124,3 +127,32 @@ class ObjectProviderTest(unittest.TestCase):
             foo, new_injection_context(), [], {})
         self.assertEqual([], pargs)
         self.assertEqual({'bar': 'a-bar'}, kwargs)
+
+    def test_provides_already_provided_singleton_without_child_context(self):
+        class Foo(object):
+            def __init__(self, bar):
+                self.bar = bar
+        obj_provider = new_obj_provider(
+            arg_binding_keys.new('bar'), 'a-bar',
+            scope=scoping.SingletonScope())
+        obj_provider.provide_class(Foo, new_injection_context(), [], {})
+        with mock.patch.object(injection_contexts._InjectionContext,
+                               'get_child') as get_child:
+            foo = obj_provider.provide_class(
+                Foo, new_injection_context(), [], {})
+        self.assertEqual('a-bar', foo.bar)
+        self.assertEqual(0, get_child.call_count)
+
+    def test_already_provided_singleton_still_checks_scope_usability(self):
+        class Foo(object):
+            def __init__(self, bar):
+                self.bar = bar
+        obj_provider = new_obj_provider(
+            arg_binding_keys.new('bar'), 'a-bar',
+            scope=scoping.SingletonScope())
+        obj_provider.provide_class(Foo, new_injection_context(), [], {})
+        injection_context = injection_contexts.InjectionContextFactory(
+            lambda _1, _2: False).new(lambda: None)
+        self.assertRaises(errors.BadDependencyScopeError,
+                          obj_provider.provide_class,
+                          Foo, injection_context, [], {})
@@ -0,0 +1,75 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import gc
+import unittest
+
+from pinject import resolution_plans
+
+
+class PlanCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.plan_cache = resolution_plans.PlanCache()
+        self.compile_count = [0]
+
+    def compile_plan(self):
+        self.compile_count[0] += 1
+        return resolution_plans.ResolutionPlan(None, [])
+
+    def test_compiles_plan_once_per_key(self):
+        def some_fn():
+            pass
+        plan = self.plan_cache.get(some_fn, self.compile_plan)
+        self.assertIs(plan, self.plan_cache.get(some_fn, self.compile_plan))
+        self.assertEqual(1, self.compile_count[0])
+
+    def test_counts_hits_and_misses(self):
+        def some_fn():
+            pass
+        def other_fn():
+            pass
+        self.plan_cache.get(some_fn, self.compile_plan)
+        self.plan_cache.get(some_fn, self.compile_plan)
+        self.plan_cache.get(other_fn, self.compile_plan)
+        stats = self.plan_cache.get_stats()
+        self.assertEqual(1, stats.hits)
+        self.assertEqual(2, stats.misses)
+        self.assertEqual(2, stats.size)
+
+    def test_does_not_keep_keys_alive(self):
+        class SomeClass(object):
+            pass
+        self.plan_cache.get(SomeClass, self.compile_plan)
+        del SomeClass
+        gc.collect()
+        self.assertEqual(0, self.plan_cache.get_stats().size)
+
+    def test_does_not_keep_key_alive_via_plan_function(self):
+        class SomeClass(object):
+            def __init__(self):
+                super().__init__()
+        self.plan_cache.get(SomeClass, lambda: resolution_plans.ResolutionPlan(
+            SomeClass.__init__, []))
+        del SomeClass
+        gc.collect()
+        self.assertEqual(0, self.plan_cache.get_stats().size)
+
+    def test_compiles_every_time_for_unreferenceable_key(self):
+        self.plan_cache.get(42, self.compile_plan)
+        self.plan_cache.get(42, self.compile_plan)
+        self.assertEqual(2, self.compile_count[0])
+        self.assertEqual(0, self.plan_cache.get_stats().size)
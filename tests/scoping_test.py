@@ -14,6 +14,8 @@ limitations under the License.
 """
 
 
+import threading
+import time
 import unittest
 
 from pinject import bindings
@@ -62,6 +64,114 @@ class SingletonScopeTest(unittest.TestCase):
                          self.scope.provide(self.binding_key_one,
                                             provide_from_singleton_scope))
 
+    def test_provides_each_singleton_once_under_thread_contention(self):
+        binding_keys_list = [binding_keys.new('key{0}'.format(i))
+                             for i in range(5)]
+        call_counts = [0]
+        call_counts_lock = threading.Lock()
+        def provider_fn():
+            with call_counts_lock:
+                call_counts[0] += 1
+            time.sleep(0.001)
+            return object()
+        start = threading.Event()
+        results = []
+        def provide_all():
+            start.wait()
+            results.append([self.scope.provide(binding_key, provider_fn)
+                            for _ in range(50)
+                            for binding_key in binding_keys_list])
+        threads = [threading.Thread(target=provide_all) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(binding_keys_list), call_counts[0])
+        self.assertEqual(20, len(results))
+        for result in results:
+            self.assertEqual(results[0], result)
+
+    def test_constructs_unrelated_singletons_in_parallel(self):
+        slow_started = threading.Event()
+        slow_may_finish = threading.Event()
+        def slow_provider_fn():
+            slow_started.set()
+            slow_may_finish.wait(5)
+            return 'slow'
+        slow_thread = threading.Thread(
+            target=self.scope.provide,
+            args=(self.binding_key_one, slow_provider_fn))
+        slow_thread.start()
+        try:
+            slow_started.wait(5)
+            self.assertEqual('fast', self.scope.provide(
+                self.binding_key_two, lambda: 'fast'))
+        finally:
+            slow_may_finish.set()
+            slow_thread.join()
+        self.assertEqual('slow', self.scope.provide(
+            self.binding_key_one, self.provider_fn))
+
+    def test_waiting_thread_retries_if_construction_fails(self):
+        first_started = threading.Event()
+        first_may_fail = threading.Event()
+        def failing_provider_fn():
+            first_started.set()
+            first_may_fail.wait(5)
+            raise ValueError('failed')
+        results = []
+        def provide_failing():
+            try:
+                self.scope.provide(self.binding_key_one, failing_provider_fn)
+            except ValueError:
+                results.append('failed')
+        failing_thread = threading.Thread(target=provide_failing)
+        failing_thread.start()
+        first_started.wait(5)
+        waiting_thread = threading.Thread(target=lambda: results.append(
+            self.scope.provide(self.binding_key_one, lambda: 'retried')))
+        waiting_thread.start()
+        first_may_fail.set()
+        failing_thread.join()
+        waiting_thread.join()
+        self.assertEqual(['failed', 'retried'], results)
+
+    def test_raises_error_when_thread_waits_for_itself(self):
+        def provide_one_again():
+            return self.scope.provide(self.binding_key_one, self.provider_fn)
+        self.assertRaises(errors.SingletonDeadlockError, self.scope.provide,
+                          self.binding_key_one, provide_one_again)
+
+    def test_raises_error_instead_of_deadlocking_across_threads(self):
+        one_started = threading.Event()
+        two_started = threading.Event()
+        def provide_one():
+            one_started.set()
+            two_started.wait(5)
+            return self.scope.provide(self.binding_key_two, lambda: 'two')
+        def provide_two():
+            two_started.set()
+            one_started.wait(5)
+            return self.scope.provide(self.binding_key_one, lambda: 'one')
+        errors_raised = []
+        def provide(binding_key, provider_fn):
+            try:
+                self.scope.provide(binding_key, provider_fn)
+            except errors.SingletonDeadlockError as e:
+                errors_raised.append(e)
+        threads = [
+            threading.Thread(target=provide,
+                             args=(self.binding_key_one, provide_one)),
+            threading.Thread(target=provide,
+                             args=(self.binding_key_two, provide_two))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+            self.assertFalse(thread.is_alive())
+        self.assertEqual(1, len(errors_raised))
+
 
 class GetIdToScopeWithDefaultsTest(unittest.TestCase):
 
@@ -97,6 +207,6 @@ class BindableScopesTest(unittest.TestCase):
     def test_get_sub_scope_successfully(self):
         usable_binding = bindings.new_binding_to_instance(
             binding_keys.new('foo'), 'unused-instance', 'usable-scope-id',
-            lambda: 'unused-desc')
+            'unused-loc')
         self.assertEqual(
             'usable-scope', self.bindable_scopes.get_sub_scope(usable_binding))
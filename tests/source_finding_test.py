@@ -0,0 +1,144 @@
+"""Copyright 2013 Google Inc. All Rights Reserved.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from pinject import source_finding
+
+
+class FindLazyClassesTest(unittest.TestCase):
+
+    def setUp(self):
+        source_finding._file_key_to_lazy_classes.clear()
+        self.temp_dir = tempfile.mkdtemp()
+        self.write_module('sourceapp/__init__.py', 'class AppClass(object):\n'
+                                                   '    pass\n')
+        self.write_module('sourceapp/foo.py',
+                          'import pinject\n'
+                          '\n'
+                          'class Foo(object):\n'
+                          '    @pinject.inject()\n'
+                          '    def __init__(self, bar):\n'
+                          '        pass\n'
+                          '    class Nested(object):\n'
+                          '        pass\n'
+                          'def make_class():\n'
+                          '    class Local(object):\n'
+                          '        pass\n')
+        self.write_module('sourceapp/sub/__init__.py', '')
+        self.write_module('sourceapp/sub/bar.py',
+                          'from pinject import injectable\n'
+                          'class Bar(object):\n'
+                          '    @injectable\n'
+                          '    def __init__(self):\n'
+                          '        pass\n'
+                          'class Unrelated(object):\n'
+                          '    @staticmethod\n'
+                          '    def __init__():\n'
+                          '        pass\n')
+        self.write_module('sourceapp/notapackage/baz.py',
+                          'class Baz(object):\n'
+                          '    pass\n')
+        self.write_module('sourceapp/broken.py', 'class Broken(\n')
+        self.write_module('sourcemodule.py', 'class Single(object):\n'
+                                             '    pass\n')
+        sys.path.insert(0, self.temp_dir)
+
+    def tearDown(self):
+        sys.path.remove(self.temp_dir)
+        shutil.rmtree(self.temp_dir)
+
+    def write_module(self, relative_path, source):
+        path = os.path.join(self.temp_dir, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as module_file:
+            module_file.write(source)
+
+    def find_names(self, packages, **kwargs):
+        return set(
+            (lazy_class.module_name, lazy_class.class_name,
+             lazy_class.is_explicitly_injectable)
+            for lazy_class in source_finding.find_lazy_classes(
+                packages, **kwargs))
+
+    def test_finds_top_level_classes_in_package_and_subpackages(self):
+        self.assertEqual(
+            set([('sourceapp', 'AppClass', False),
+                 ('sourceapp.foo', 'Foo', True),
+                 ('sourceapp.sub.bar', 'Bar', True),
+                 ('sourceapp.sub.bar', 'Unrelated', False)]),
+            self.find_names(['sourceapp']))
+
+    def test_does_not_import_modules(self):
+        self.find_names(['sourceapp'])
+        self.assertFalse([module_name for module_name in sys.modules
+                          if module_name.startswith('sourceapp')])
+
+    def test_finds_classes_in_single_module(self):
+        self.assertEqual(set([('sourcemodule', 'Single', False)]),
+                         self.find_names(['sourcemodule']))
+
+    def test_finds_classes_in_subpackage(self):
+        self.assertEqual(set([('sourceapp.sub.bar', 'Bar', True),
+                              ('sourceapp.sub.bar', 'Unrelated', False)]),
+                         self.find_names(['sourceapp.sub']))
+
+    def test_finds_nothing_for_unknown_package(self):
+        self.assertEqual(set(), self.find_names(['nosuchsourceapp']))
+
+    def test_excludes_modules(self):
+        self.assertEqual(
+            set([('sourceapp', 'AppClass', False),
+                 ('sourceapp.foo', 'Foo', True)]),
+            self.find_names(['sourceapp'], exclude_modules=['sourceapp.sub']))
+
+    def test_records_locations(self):
+        [lazy_class] = [
+            lazy_class
+            for lazy_class in source_finding.find_lazy_classes(['sourceapp'])
+            if lazy_class.class_name == 'Foo']
+        self.assertEqual(
+            '{0}:3'.format(os.path.join(self.temp_dir, 'sourceapp', 'foo.py')),
+            lazy_class.loc)
+
+    def test_records_init_arg_names(self):
+        class_name_to_init_arg_names = dict(
+            (lazy_class.class_name, lazy_class.init_arg_names)
+            for lazy_class in source_finding.find_lazy_classes(['sourceapp']))
+        self.assertEqual({'AppClass': None, 'Foo': ('bar',), 'Bar': (),
+                          'Unrelated': ()},
+                         class_name_to_init_arg_names)
+
+    def test_reuses_lazy_classes_of_unchanged_files(self):
+        lazy_classes = source_finding.find_lazy_classes(['sourcemodule'])
+        self.assertEqual(
+            lazy_classes, source_finding.find_lazy_classes(['sourcemodule']))
+        self.write_module('sourcemodule.py', 'class Changed(object):\n'
+                                             '    pass\n'
+                                             '\n')
+        self.assertEqual(set([('sourcemodule', 'Changed', False)]),
+                         self.find_names(['sourcemodule']))
+
+    def test_parses_in_several_processes(self):
+        names = self.find_names(['sourceapp'])
+        source_finding._file_key_to_lazy_classes.clear()
+        self.assertEqual(names,
+                         self.find_names(['sourceapp'], num_processes=2))
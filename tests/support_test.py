@@ -14,9 +14,11 @@ limitations under the License.
 """
 
 
+import gc
 import unittest
 import types
 import inspect
+import weakref
 
 from pinject import support
 from pinject import bindings
@@ -98,6 +100,42 @@ class VerifyModuleTypesTest(unittest.TestCase):
                           support.verify_module_types, 42, 'an-arg-name')
 
 
+class VerifyModuleOrPatternTypesTest(unittest.TestCase):
+
+    def test_verifies_module_and_pattern_types_ok(self):
+        support.verify_module_or_pattern_types([types, 'myapp.*'], 'unused')
+
+    def test_raises_exception_if_not_module_or_pattern_types(self):
+        self.assertRaises(errors.WrongArgElementTypeError,
+                          support.verify_module_or_pattern_types, [42],
+                          'an-arg-name')
+
+
+class VerifyPatternTypesTest(unittest.TestCase):
+
+    def test_verifies_pattern_types_ok(self):
+        support.verify_pattern_types(['myapp.*'], 'unused')
+
+    def test_raises_exception_if_not_pattern_types(self):
+        self.assertRaises(errors.WrongArgElementTypeError,
+                          support.verify_pattern_types, [types],
+                          'an-arg-name')
+
+
+class VerifyClassOrImportPathTypesTest(unittest.TestCase):
+
+    def test_verifies_class_and_import_path_types_ok(self):
+        class Foo(object):
+            pass
+        support.verify_class_or_import_path_types(
+            [Foo, 'some.module:Foo'], 'unused')
+
+    def test_raises_exception_if_not_class_or_import_path_types(self):
+        self.assertRaises(errors.WrongArgElementTypeError,
+                          support.verify_class_or_import_path_types, [42],
+                          'an-arg-name')
+
+
 class VerifyClassTypesTest(unittest.TestCase):
 
     def test_verifies_module_types_ok(self):
@@ -191,3 +229,72 @@ class GetMethodArgsTest(unittest.TestCase):
 
     def test_raises_exception_if_not_method(self):
         self.assertRaises(TypeError, support.get_method_args, None)
+
+
+class GetArgSpecTest(unittest.TestCase):
+
+    def test_strips_self_and_args_with_defaults_from_required_args(self):
+        class SomeClass(object):
+            def __init__(self, foo, bar='BAR'):
+                pass
+        arg_spec = support.get_arg_spec(SomeClass.__init__)
+        self.assertEqual(('self', 'foo', 'bar'), arg_spec.arg_names)
+        self.assertEqual(('foo',), arg_spec.required_arg_names)
+
+    def test_caches_arg_spec_per_function(self):
+        def simple(arg1):
+            pass
+        self.assertIs(support.get_arg_spec(simple),
+                      support.get_arg_spec(simple))
+
+    def test_bound_method_shares_arg_spec_of_function(self):
+        class SomeClass(object):
+            def a_method(self, foo):
+                pass
+        self.assertIs(support.get_arg_spec(SomeClass.a_method),
+                      support.get_arg_spec(SomeClass().a_method))
+
+    def test_recomputes_arg_spec_when_code_replaced(self):
+        def simple(arg1):
+            pass
+        def other(arg2):
+            pass
+        self.assertEqual(('arg1',), support.get_arg_spec(simple).arg_names)
+        simple.__code__ = other.__code__
+        self.assertEqual(('arg2',), support.get_arg_spec(simple).arg_names)
+
+    def test_recomputes_arg_spec_when_wrapped_replaced(self):
+        def simple(*pargs, **kwargs):
+            pass
+        def wrapped_one(arg1):
+            pass
+        def wrapped_two(arg2):
+            pass
+        simple.__wrapped__ = wrapped_one
+        arg_spec = support.get_arg_spec(simple)
+        self.assertIs(arg_spec, support.get_arg_spec(simple))
+        simple.__wrapped__ = wrapped_two
+        self.assertIsNot(arg_spec, support.get_arg_spec(simple))
+
+    def test_does_not_keep_class_of_wrapped_init_alive(self):
+        def new_class():
+            class SomeClass(object):
+                def __init__(self, foo):
+                    super().__init__()
+            def wrapper(*pargs, **kwargs):
+                pass
+            wrapper.__wrapped__ = SomeClass.__init__
+            SomeClass.__init__ = wrapper
+            return SomeClass
+        some_class = new_class()
+        support.get_arg_spec(some_class.__init__)
+        class_ref = weakref.ref(some_class)
+        del some_class
+        gc.collect()
+        self.assertIsNone(class_ref())
+
+    def test_arg_spec_is_immutable(self):
+        def simple(arg1):
+            pass
+        arg_spec = support.get_arg_spec(simple)
+        self.assertRaises(AttributeError, setattr, arg_spec, 'varargs', 'x')
@@ -22,10 +22,12 @@ import sys
 import traceback
 import types
 
+from pinject import binding_keys
 from pinject import bindings
 from pinject import decorators
 from pinject import errors
 from pinject import initializers
+from pinject import lazy_classes
 from pinject import object_graph
 from pinject import scoping
 
@@ -151,6 +153,15 @@ def print_duplicate_decorator_error():
     _print_raised_exception(errors.DuplicateDecoratorError, do_bad_inject)
 
 
+def print_empty_bind_many_error():
+    class SomeBindingSpec(bindings.BindingSpec):
+        def configure(self, bind_many):
+            bind_many()
+    _print_raised_exception(
+        errors.EmptyBindManyError, object_graph.new_object_graph,
+        modules=None, binding_specs=[SomeBindingSpec()])
+
+
 def print_empty_binding_spec_error():
     class EmptyBindingSpec(bindings.BindingSpec):
         pass
@@ -200,6 +211,48 @@ def print_invalid_binding_target_error():
         modules=None, binding_specs=[SomeBindingSpec()])
 
 
+def print_invalid_import_path_error():
+    _print_raised_exception(
+        errors.InvalidImportPathError, bindings.LazyBindingSpec,
+        'some.module.SomeBindingSpec', ['foo'])
+
+
+def print_lazy_binding_already_looked_up_error():
+    class InnerBindingSpec(bindings.BindingSpec):
+        def configure(self, bind):
+            bind('bar', to_instance='a-bar')
+    class OuterBindingSpec(bindings.BindingSpec):
+        def configure(self, bind):
+            bind('foo', to_instance='a-foo')
+        def dependencies(self):
+            return [bindings.LazyBindingSpec(
+                '{0}:InnerBindingSpec'.format(__name__), ['bar'])]
+    class ClaimingBindingSpec(bindings.BindingSpec):
+        def configure(self, bind):
+            bind('baz', to_instance='a-baz')
+    sys.modules[__name__].InnerBindingSpec = InnerBindingSpec
+    sys.modules[__name__].OuterBindingSpec = OuterBindingSpec
+    sys.modules[__name__].ClaimingBindingSpec = ClaimingBindingSpec
+    obj_graph = object_graph.new_object_graph(
+        modules=None, binding_specs=[
+            bindings.LazyBindingSpec('{0}:OuterBindingSpec'.format(__name__),
+                                     ['foo', 'bar']),
+            bindings.LazyBindingSpec(
+                '{0}:ClaimingBindingSpec'.format(__name__), ['bar', 'baz'])])
+    class NeedsBar(object):
+        def __init__(self, bar):
+            pass
+    class NeedsFoo(object):
+        def __init__(self, foo):
+            pass
+    try:
+        obj_graph.provide(NeedsBar)
+    except errors.NothingInjectableForArgError:
+        pass
+    _print_raised_exception(
+        errors.LazyBindingAlreadyLookedUpError, obj_graph.provide, NeedsFoo)
+
+
 def print_missing_required_binding_error():
     class SomeBindingSpec(bindings.BindingSpec):
         def configure(self, require):
@@ -318,6 +371,15 @@ def print_pargs_disallowed_when_copying_args_error():
         errors.PargsDisallowedWhenCopyingArgsError, do_bad_initializer)
 
 
+def print_singleton_deadlock_error():
+    scope = scoping.SingletonScope()
+    binding_key = binding_keys.new('foo')
+    def provide_foo_again():
+        return scope.provide(binding_key, lambda: 'unused')
+    _print_raised_exception(errors.SingletonDeadlockError,
+                            scope.provide, binding_key, provide_foo_again)
+
+
 def print_too_many_args_to_inject_decorator_error():
     def do_bad_inject():
         @decorators.inject(['foo'], all_except=['bar'])
@@ -327,6 +389,22 @@ def print_too_many_args_to_inject_decorator_error():
                             do_bad_inject)
 
 
+def print_undeclared_lazy_binding_error():
+    class SomeBindingSpec(bindings.BindingSpec):
+        def configure(self, bind):
+            bind('foo', to_instance='a-foo')
+            bind('bar', to_instance='a-bar')
+    sys.modules[__name__].SomeBindingSpec = SomeBindingSpec
+    obj_graph = object_graph.new_object_graph(
+        modules=None, binding_specs=[bindings.LazyBindingSpec(
+            '{0}:SomeBindingSpec'.format(__name__), ['foo'])])
+    class SomeClass(object):
+        def __init__(self, foo):
+            pass
+    _print_raised_exception(
+        errors.UndeclaredLazyBindingError, obj_graph.provide, SomeClass)
+
+
 def print_unknown_scope_error():
     class SomeBindingSpec(bindings.BindingSpec):
         def configure(self, bind):
@@ -336,6 +414,13 @@ def print_unknown_scope_error():
         modules=None, binding_specs=[SomeBindingSpec()])
 
 
+def print_unresolvable_lazy_class_error():
+    lazy_class = lazy_classes.LazyClass(
+        'pinject.errors', 'NoSuchClass', 'errors.py:1')
+    _print_raised_exception(
+        errors.UnresolvableLazyClassError, lazy_class.resolve)
+
+
 def print_wrong_arg_element_type_error():
     _print_raised_exception(
         errors.WrongArgElementTypeError, object_graph.new_object_graph,